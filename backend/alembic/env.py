@@ -83,8 +83,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # SQLite не умеет ALTER COLUMN / ADD CONSTRAINT - autogenerate пишет batch_alter_table
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite"
         )
 
         with context.begin_transaction():
@@ -0,0 +1,327 @@
+"""Create base schema (before multi-location baseline)
+
+Revision ID: 3a1d0b7c5e82
+Revises:
+Create Date: 2026-10-19 18:00:00.000000
+
+Схема, на которую рассчитана 9f48fc54de79: до Alembic её создавали
+create_all и ручные скрипты (migrate_to_multi_location.py и др.), поэтому
+пустая БД не поднималась через alembic upgrade head.
+
+Если таблицы уже есть (старая БД без alembic_version) - ничего не делает,
+дальше 9f48fc54de79 доводит схему как раньше. БД, созданную create_all из
+текущих моделей (AUTO_CREATE_TABLES=1), не мигрируют, а помечают:
+python scripts/migrate_db.py --stamp
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a1d0b7c5e82'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('ingredients'):
+        print("ℹ️  Таблицы уже созданы до Alembic - базовая схема пропущена")
+        return
+
+    op.create_table(
+        'categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('color', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categories_id'), 'categories', ['id'], unique=False)
+    op.create_index(op.f('ix_categories_name'), 'categories', ['name'], unique=False)
+
+    op.create_table(
+        'locations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_locations_id'), 'locations', ['id'], unique=False)
+
+    op.create_table(
+        'ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('unit', sa.String(), nullable=False),
+        sa.Column('packaging_info', sa.Text(), nullable=True),
+        sa.Column('purchase_price', sa.Float(), nullable=False),
+        sa.Column('stock_quantity', sa.Float(), nullable=False),
+        sa.Column('min_stock', sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingredients_id'), 'ingredients', ['id'], unique=False)
+    op.create_index(op.f('ix_ingredients_name'), 'ingredients', ['name'], unique=False)
+    op.create_index(op.f('ix_ingredients_category_id'), 'ingredients', ['category_id'], unique=False)
+
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('is_available', sa.Boolean(), nullable=True),
+        sa.Column('show_in_pos', sa.Boolean(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_index(op.f('ix_products_name'), 'products', ['name'], unique=False)
+    op.create_index(op.f('ix_products_category_id'), 'products', ['category_id'], unique=False)
+
+    op.create_table(
+        'recipes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('output_weight', sa.Float(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('is_weight_based', sa.Boolean(), nullable=True),
+        sa.Column('exclude_from_discounts', sa.Boolean(), nullable=True),
+        sa.Column('show_in_pos', sa.Boolean(), nullable=True),
+        sa.Column('image_url', sa.String(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipes_id'), 'recipes', ['id'], unique=False)
+    op.create_index(op.f('ix_recipes_name'), 'recipes', ['name'], unique=False)
+    op.create_index(op.f('ix_recipes_category_id'), 'recipes', ['category_id'], unique=False)
+
+    op.create_table(
+        'semifinished',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.Column('unit', sa.String(), nullable=False),
+        sa.Column('output_quantity', sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_semifinished_id'), 'semifinished', ['id'], unique=False)
+    op.create_index(op.f('ix_semifinished_name'), 'semifinished', ['name'], unique=False)
+    op.create_index(op.f('ix_semifinished_category_id'), 'semifinished', ['category_id'], unique=False)
+
+    op.create_table(
+        'recipe_ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('gross_weight', sa.Float(), nullable=False),
+        sa.Column('net_weight', sa.Float(), nullable=False),
+        sa.Column('cooking_method', sa.String(), nullable=True),
+        sa.Column('is_cleaned', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipe_ingredients_id'), 'recipe_ingredients', ['id'], unique=False)
+
+    op.create_table(
+        'semifinished_ingredients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('semifinished_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['semifinished_id'], ['semifinished.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_semifinished_ingredients_id'), 'semifinished_ingredients', ['id'], unique=False)
+
+    op.create_table(
+        'recipe_semifinished',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('semifinished_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['semifinished_id'], ['semifinished.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recipe_semifinished_id'), 'recipe_semifinished', ['id'], unique=False)
+
+    op.create_table(
+        'product_variants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('base_product_id', sa.Integer(), nullable=False),
+        sa.Column('recipe_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('size_code', sa.String(), nullable=True),
+        sa.Column('price_adjustment', sa.Float(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=True),
+        sa.Column('is_default', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['base_product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_variants_id'), 'product_variants', ['id'], unique=False)
+
+    op.create_table(
+        'modifier_groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('selection_type', sa.Enum('SINGLE', 'MULTIPLE', name='modifierselectiontype'), nullable=True),
+        sa.Column('min_selections', sa.Integer(), nullable=True),
+        sa.Column('max_selections', sa.Integer(), nullable=True),
+        sa.Column('is_required', sa.Boolean(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_modifier_groups_id'), 'modifier_groups', ['id'], unique=False)
+
+    op.create_table(
+        'modifiers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('ingredient_id', sa.Integer(), nullable=True),
+        sa.Column('quantity_per_use', sa.Float(), nullable=True),
+        sa.Column('display_order', sa.Integer(), nullable=True),
+        sa.Column('is_available', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['group_id'], ['modifier_groups.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_modifiers_id'), 'modifiers', ['id'], unique=False)
+
+    op.create_table(
+        'product_modifier_groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('modifier_group_id', sa.Integer(), nullable=False),
+        sa.Column('display_order', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['modifier_group_id'], ['modifier_groups.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_modifier_groups_id'), 'product_modifier_groups', ['id'], unique=False)
+
+    op.create_table(
+        'stocks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.Column('min_stock', sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('location_id', 'ingredient_id', name='uix_location_ingredient')
+    )
+    op.create_index(op.f('ix_stocks_id'), 'stocks', ['id'], unique=False)
+    op.create_index(op.f('ix_stocks_location_id'), 'stocks', ['location_id'], unique=False)
+    op.create_index(op.f('ix_stocks_ingredient_id'), 'stocks', ['ingredient_id'], unique=False)
+
+    op.create_table(
+        'settings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('business_name', sa.String(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('receipt_printer_ip', sa.String(), nullable=True),
+        sa.Column('label_printer_ip', sa.String(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_settings_id'), 'settings', ['id'], unique=False)
+
+    # location_id, variant_id и modifiers доводит 9f48fc54de79
+    op.create_table(
+        'orders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_number', sa.String(), nullable=True),
+        sa.Column('location_id', sa.Integer(), server_default=sa.text('1'), nullable=True),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('payment_method', sa.Enum('CASH', 'CARD', name='paymentmethod'), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'PAID', 'CANCELLED', name='orderstatus'), nullable=True),
+        sa.Column('items', sa.JSON(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_order_number'), 'orders', ['order_number'], unique=True)
+
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('item_type', sa.Enum('PRODUCT', 'RECIPE', name='itemtype'), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('recipe_id', sa.Integer(), nullable=True),
+        sa.Column('item_name', sa.String(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('subtotal', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+
+    # Точка по умолчанию (DEFAULT_LOCATION_ID) - на неё ссылаются заказы без location_id
+    locations = sa.table('locations', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                         sa.column('is_active', sa.Boolean))
+    op.bulk_insert(locations, [{'id': 1, 'name': 'Основная точка', 'is_active': True}])
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('locations', 'id'), 1)")
+
+
+def downgrade() -> None:
+    for table in [
+        'order_items', 'orders', 'settings', 'stocks', 'product_modifier_groups', 'modifiers',
+        'modifier_groups', 'product_variants', 'recipe_semifinished', 'semifinished_ingredients',
+        'recipe_ingredients', 'semifinished', 'recipes', 'products', 'ingredients', 'locations',
+        'categories',
+    ]:
+        op.drop_table(table)
+    if op.get_bind().dialect.name == 'postgresql':
+        for enum_name in ['itemtype', 'orderstatus', 'paymentmethod', 'modifierselectiontype']:
+            op.execute(f'DROP TYPE IF EXISTS {enum_name}')
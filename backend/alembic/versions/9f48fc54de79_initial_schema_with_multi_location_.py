@@ -1,7 +1,7 @@
 """Initial schema with multi-location support
 
 Revision ID: 9f48fc54de79
-Revises: 
+Revises: 3a1d0b7c5e82
 Create Date: 2026-01-03 01:41:01.357981
 
 """
@@ -13,46 +13,45 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '9f48fc54de79'
-down_revision: Union[str, None] = None
+down_revision: Union[str, None] = '3a1d0b7c5e82'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('ingredients', 'stock_quantity',
-               existing_type=sa.FLOAT(),
-               nullable=True)
-    op.alter_column('ingredients', 'min_stock',
-               existing_type=sa.FLOAT(),
-               nullable=True)
-    op.add_column('order_items', sa.Column('variant_id', sa.Integer(), nullable=True))
-    op.add_column('order_items', sa.Column('modifiers', sa.JSON(), nullable=True))
-    op.create_foreign_key(None, 'order_items', 'product_variants', ['variant_id'], ['id'], ondelete='SET NULL')
-    op.alter_column('orders', 'location_id',
-               existing_type=sa.INTEGER(),
-               nullable=False,
-               existing_server_default=sa.text('1'))
-    op.create_index(op.f('ix_orders_location_id'), 'orders', ['location_id'], unique=False)
-    op.create_foreign_key(None, 'orders', 'locations', ['location_id'], ['id'], ondelete='RESTRICT')
-    # ### end Alembic commands ###
+    # batch_alter_table: на PostgreSQL - обычные ALTER, на SQLite - пересоздание таблицы
+    with op.batch_alter_table('ingredients') as batch_op:
+        batch_op.alter_column('stock_quantity', existing_type=sa.FLOAT(), nullable=True)
+        batch_op.alter_column('min_stock', existing_type=sa.FLOAT(), nullable=True)
+    with op.batch_alter_table('order_items') as batch_op:
+        batch_op.add_column(sa.Column('variant_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('modifiers', sa.JSON(), nullable=True))
+        batch_op.create_foreign_key(
+            'order_items_variant_id_fkey', 'product_variants', ['variant_id'], ['id'], ondelete='SET NULL'
+        )
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.alter_column('location_id',
+                              existing_type=sa.INTEGER(),
+                              nullable=False,
+                              existing_server_default=sa.text('1'))
+        batch_op.create_index(batch_op.f('ix_orders_location_id'), ['location_id'], unique=False)
+        batch_op.create_foreign_key(
+            'orders_location_id_fkey', 'locations', ['location_id'], ['id'], ondelete='RESTRICT'
+        )
 
 
 def downgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_constraint(None, 'orders', type_='foreignkey')
-    op.drop_index(op.f('ix_orders_location_id'), table_name='orders')
-    op.alter_column('orders', 'location_id',
-               existing_type=sa.INTEGER(),
-               nullable=True,
-               existing_server_default=sa.text('1'))
-    op.drop_constraint(None, 'order_items', type_='foreignkey')
-    op.drop_column('order_items', 'modifiers')
-    op.drop_column('order_items', 'variant_id')
-    op.alter_column('ingredients', 'min_stock',
-               existing_type=sa.FLOAT(),
-               nullable=False)
-    op.alter_column('ingredients', 'stock_quantity',
-               existing_type=sa.FLOAT(),
-               nullable=False)
-    # ### end Alembic commands ###
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_constraint('orders_location_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_orders_location_id'))
+        batch_op.alter_column('location_id',
+                              existing_type=sa.INTEGER(),
+                              nullable=True,
+                              existing_server_default=sa.text('1'))
+    with op.batch_alter_table('order_items') as batch_op:
+        batch_op.drop_constraint('order_items_variant_id_fkey', type_='foreignkey')
+        batch_op.drop_column('modifiers')
+        batch_op.drop_column('variant_id')
+    with op.batch_alter_table('ingredients') as batch_op:
+        batch_op.alter_column('min_stock', existing_type=sa.FLOAT(), nullable=False)
+        batch_op.alter_column('stock_quantity', existing_type=sa.FLOAT(), nullable=False)
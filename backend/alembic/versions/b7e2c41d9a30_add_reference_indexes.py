@@ -0,0 +1,41 @@
+"""Add indexes on foreign keys used by usage checks
+
+Revision ID: b7e2c41d9a30
+Revises: 9f48fc54de79
+Create Date: 2026-10-19 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c41d9a30'
+down_revision: Union[str, None] = '9f48fc54de79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, колонка) - внешние ключи, по которым app/usage.py делает EXISTS/COUNT
+REFERENCE_COLUMNS = [
+    ('modifiers', 'ingredient_id'),
+    ('product_modifier_groups', 'product_id'),
+    ('order_items', 'product_id'),
+    ('order_items', 'recipe_id'),
+    ('product_variants', 'base_product_id'),
+    ('product_variants', 'recipe_id'),
+    ('recipe_ingredients', 'ingredient_id'),
+    ('semifinished_ingredients', 'ingredient_id'),
+    ('recipe_semifinished', 'semifinished_id'),
+]
+
+
+def upgrade() -> None:
+    for table, column in REFERENCE_COLUMNS:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in reversed(REFERENCE_COLUMNS):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
@@ -0,0 +1,55 @@
+"""Add ingredients.search_name with trigram index
+
+Revision ID: c4d8e2f61b07
+Revises: b7e2c41d9a30
+Create Date: 2026-10-19 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# backend/ уже в sys.path (alembic/env.py)
+from app.search import search_key
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2f61b07'
+down_revision: Union[str, None] = 'b7e2c41d9a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('ingredients', sa.Column('search_name', sa.String(), nullable=True))
+
+    # Заполняем search_name для существующих ингредиентов (транслитерация - на Python)
+    connection = op.get_bind()
+    ingredients = sa.table('ingredients', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                           sa.column('search_name', sa.String))
+    rows = connection.execute(sa.select(ingredients.c.id, ingredients.c.name)).all()
+    update = ingredients.update().where(ingredients.c.id == sa.bindparam('row_id')).values(
+        search_name=sa.bindparam('value')
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        connection.execute(update, [{'row_id': row.id, 'value': search_key(row.name)} for row in batch])
+
+    op.create_index(op.f('ix_ingredients_search_name'), 'ingredients', ['search_name'], unique=False)
+    if connection.dialect.name == 'postgresql':
+        # Триграммный индекс: LIKE '%молоко%' без полного просмотра таблицы
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX ix_ingredients_search_name_trgm ON ingredients '
+            'USING gin (search_name gin_trgm_ops)'
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_ingredients_search_name_trgm')
+    op.drop_index(op.f('ix_ingredients_search_name'), table_name='ingredients')
+    op.drop_column('ingredients', 'search_name')
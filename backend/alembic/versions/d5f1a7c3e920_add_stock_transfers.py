@@ -0,0 +1,67 @@
+"""Add stock transfers between locations
+
+Revision ID: d5f1a7c3e920
+Revises: c4d8e2f61b07
+Create Date: 2026-10-19 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f1a7c3e920'
+down_revision: Union[str, None] = 'c4d8e2f61b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_transfers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('number', sa.String(), nullable=False),
+        sa.Column('from_location_id', sa.Integer(), nullable=False),
+        sa.Column('to_location_id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.String(), nullable=True),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['from_location_id'], ['locations.id'], ondelete='RESTRICT'),
+        sa.ForeignKeyConstraint(['to_location_id'], ['locations.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_transfers_id'), 'stock_transfers', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_transfers_number'), 'stock_transfers', ['number'], unique=True)
+    op.create_index(op.f('ix_stock_transfers_from_location_id'), 'stock_transfers', ['from_location_id'], unique=False)
+    op.create_index(op.f('ix_stock_transfers_to_location_id'), 'stock_transfers', ['to_location_id'], unique=False)
+    op.create_index(op.f('ix_stock_transfers_batch_id'), 'stock_transfers', ['batch_id'], unique=False)
+
+    op.create_table(
+        'stock_transfer_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('transfer_id', sa.Integer(), nullable=False),
+        sa.Column('ingredient_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['transfer_id'], ['stock_transfers.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_transfer_items_id'), 'stock_transfer_items', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_transfer_items_transfer_id'), 'stock_transfer_items', ['transfer_id'], unique=False)
+    op.create_index(op.f('ix_stock_transfer_items_ingredient_id'), 'stock_transfer_items', ['ingredient_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_stock_transfer_items_ingredient_id'), table_name='stock_transfer_items')
+    op.drop_index(op.f('ix_stock_transfer_items_transfer_id'), table_name='stock_transfer_items')
+    op.drop_index(op.f('ix_stock_transfer_items_id'), table_name='stock_transfer_items')
+    op.drop_table('stock_transfer_items')
+    op.drop_index(op.f('ix_stock_transfers_batch_id'), table_name='stock_transfers')
+    op.drop_index(op.f('ix_stock_transfers_to_location_id'), table_name='stock_transfers')
+    op.drop_index(op.f('ix_stock_transfers_from_location_id'), table_name='stock_transfers')
+    op.drop_index(op.f('ix_stock_transfers_number'), table_name='stock_transfers')
+    op.drop_index(op.f('ix_stock_transfers_id'), table_name='stock_transfers')
+    op.drop_table('stock_transfers')
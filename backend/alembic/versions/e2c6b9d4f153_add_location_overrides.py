@@ -0,0 +1,51 @@
+"""Add per-location price and availability overrides
+
+Revision ID: e2c6b9d4f153
+Revises: d5f1a7c3e920
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6b9d4f153'
+down_revision: Union[str, None] = 'd5f1a7c3e920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'location_overrides',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('recipe_id', sa.Integer(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('is_available', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('location_id', 'product_id', name='uix_location_override_product'),
+        sa.UniqueConstraint('location_id', 'recipe_id', name='uix_location_override_recipe'),
+        sa.CheckConstraint('(product_id IS NULL) <> (recipe_id IS NULL)', name='ck_location_override_target')
+    )
+    op.create_index(op.f('ix_location_overrides_id'), 'location_overrides', ['id'], unique=False)
+    op.create_index(op.f('ix_location_overrides_location_id'), 'location_overrides', ['location_id'], unique=False)
+    op.create_index(op.f('ix_location_overrides_product_id'), 'location_overrides', ['product_id'], unique=False)
+    op.create_index(op.f('ix_location_overrides_recipe_id'), 'location_overrides', ['recipe_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_location_overrides_recipe_id'), table_name='location_overrides')
+    op.drop_index(op.f('ix_location_overrides_product_id'), table_name='location_overrides')
+    op.drop_index(op.f('ix_location_overrides_location_id'), table_name='location_overrides')
+    op.drop_index(op.f('ix_location_overrides_id'), table_name='location_overrides')
+    op.drop_table('location_overrides')
@@ -0,0 +1,436 @@
+"""
+Готовые данные каталога для кассы (позиции меню, деревья модификаторов,
+карточки товаров)
+
+Каждое дерево собирается фиксированным числом запросов (selectinload группа ->
+модификаторы -> ингредиент) и кэшируется в catalog_cache до изменения каталога.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import catalog_cache
+from .costing import markup_percentage
+from .models import (
+    Category,
+    Location,
+    LocationOverride,
+    ModifierGroup,
+    Modifier,
+    ProductModifierGroup,
+    Product,
+    ProductVariant,
+    Recipe,
+    RecipeIngredient,
+    RecipeSemifinished,
+    Semifinished,
+    SemifinishedIngredient
+)
+
+
+def modifier_to_dict(modifier: Modifier) -> dict:
+    """Модификация в формате ModifierResponse (ингредиент должен быть загружен заранее)"""
+    ingredient = modifier.ingredient if modifier.ingredient_id else None
+    return {
+        "id": modifier.id,
+        "group_id": modifier.group_id,
+        "name": modifier.name,
+        "price": modifier.price,
+        "ingredient_id": modifier.ingredient_id,
+        "ingredient_name": ingredient.name if ingredient else None,
+        "quantity_per_use": modifier.quantity_per_use,
+        "display_order": modifier.display_order,
+        "is_available": modifier.is_available,
+        "created_at": modifier.created_at,
+        "updated_at": modifier.updated_at
+    }
+
+
+def modifier_group_to_dict(group: ModifierGroup, available_only: bool = False) -> dict:
+    """Группа с модификациями в формате ModifierGroupResponse"""
+    modifiers = sorted(group.modifiers, key=lambda m: (m.display_order, m.name))
+    if available_only:
+        modifiers = [m for m in modifiers if m.is_available]
+    return {
+        "id": group.id,
+        "name": group.name,
+        "selection_type": group.selection_type,
+        "min_selections": group.min_selections,
+        "max_selections": group.max_selections,
+        "is_required": group.is_required,
+        "display_order": group.display_order,
+        "is_active": group.is_active,
+        "modifiers": [modifier_to_dict(m) for m in modifiers],
+        "created_at": group.created_at,
+        "updated_at": group.updated_at
+    }
+
+
+def _with_modifiers():
+    """Опция загрузки: модификации группы и их ингредиенты (2 запроса на все группы)"""
+    return selectinload(ModifierGroup.modifiers).joinedload(Modifier.ingredient)
+
+
+def load_modifier_groups(db: Session, active_only: bool = False) -> List[dict]:
+    """Все группы модификаций (без кэша)"""
+    query = db.query(ModifierGroup).options(_with_modifiers())
+    if active_only:
+        query = query.filter(ModifierGroup.is_active == True)
+    groups = query.order_by(ModifierGroup.display_order, ModifierGroup.name).all()
+    return [modifier_group_to_dict(group) for group in groups]
+
+
+def load_product_modifier_groups(db: Session, product_id: int) -> Optional[List[dict]]:
+    """Группы модификаций товара, только доступные модификации (None - товара нет)"""
+    if db.query(Product.id).filter(Product.id == product_id).first() is None:
+        return None
+    return _modifier_groups_by_product(db, [product_id]).get(product_id, [])
+
+
+def _modifier_groups_by_product(db: Session, product_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Группы модификаций сразу для многих товаров: {product_id: [группа, ...]}"""
+    links = db.query(ProductModifierGroup).options(
+        joinedload(ProductModifierGroup.modifier_group).options(_with_modifiers())
+    ).filter(
+        ProductModifierGroup.product_id.in_(list(product_ids))
+    ).order_by(ProductModifierGroup.display_order, ProductModifierGroup.id).all()
+
+    # Одна и та же группа у разных товаров сериализуется один раз
+    serialized: Dict[int, dict] = {}
+    result: Dict[int, List[dict]] = defaultdict(list)
+    for link in links:
+        group = link.modifier_group
+        if group is None:
+            continue
+        if group.id not in serialized:
+            serialized[group.id] = modifier_group_to_dict(group, available_only=True)
+        result[link.product_id].append(serialized[group.id])
+    return result
+
+
+def recipe_cost_options(recipe=None):
+    """
+    Опции загрузки со всем, что нужно для Recipe.cost
+
+    recipe - путь до техкарты (selectinload(ProductVariant.recipe)),
+    None - запрос идёт по самим техкартам.
+    """
+    ingredients = recipe.selectinload(Recipe.ingredients) if recipe else selectinload(Recipe.ingredients)
+    semifinished = (
+        recipe.selectinload(Recipe.semifinished_items) if recipe else selectinload(Recipe.semifinished_items)
+    )
+    return (
+        ingredients.joinedload(RecipeIngredient.ingredient),
+        semifinished.joinedload(RecipeSemifinished.semifinished)
+        .selectinload(Semifinished.ingredients)
+        .joinedload(SemifinishedIngredient.ingredient),
+    )
+
+
+def semifinished_cost_options():
+    """Опция загрузки со всем, что нужно для Semifinished.cost (1 запрос на все полуфабрикаты)"""
+    return selectinload(Semifinished.ingredients).joinedload(SemifinishedIngredient.ingredient)
+
+
+def variant_to_dict(variant: ProductVariant, base_price: float) -> dict:
+    """Вариант товара в формате ProductVariantResponse + итоговая цена и себестоимость"""
+    recipe = variant.recipe
+    return {
+        "id": variant.id,
+        "base_product_id": variant.base_product_id,
+        "recipe_id": variant.recipe_id,
+        "name": variant.name,
+        "size_code": variant.size_code,
+        "price_adjustment": variant.price_adjustment,
+        "price": base_price + (variant.price_adjustment or 0),
+        "display_order": variant.display_order,
+        "is_default": variant.is_default,
+        "is_active": variant.is_active,
+        "recipe_name": recipe.name if recipe else None,
+        "recipe_cost": recipe.cost if recipe else None,
+        "created_at": variant.created_at,
+        "updated_at": variant.updated_at
+    }
+
+
+def load_product_cards(
+    db: Session,
+    product_ids: Optional[Iterable[int]] = None,
+    location_id: Optional[int] = None
+) -> Dict[int, dict]:
+    """
+    Карточки товаров для диалога опций на кассе: {product_id: карточка}
+
+    Товар, активные варианты с названием и себестоимостью техкарты и группы
+    модификаций - фиксированное число запросов независимо от размера меню.
+    product_ids=None - все товары, которые показываются на кассе.
+    location_id - цены и доступность с исключениями точки (цены вариантов
+    считаются от цены товара на точке).
+    """
+    query = db.query(Product).options(joinedload(Product.category_rel))
+    if product_ids is None:
+        query = query.filter(Product.show_in_pos == True)
+    else:
+        query = query.filter(Product.id.in_(list(product_ids)))
+    products = query.all()
+    if not products:
+        return {}
+    ids = [product.id for product in products]
+
+    variants_by_product: Dict[int, list] = defaultdict(list)
+    variants = db.query(ProductVariant).options(
+        *recipe_cost_options(selectinload(ProductVariant.recipe))
+    ).filter(
+        ProductVariant.base_product_id.in_(ids),
+        ProductVariant.is_active == True
+    ).order_by(ProductVariant.display_order, ProductVariant.id).all()
+    for variant in variants:
+        variants_by_product[variant.base_product_id].append(variant)
+
+    groups_by_product = _modifier_groups_by_product(db, ids)
+    overrides = _overrides_or_empty(db, location_id)
+    revision = catalog_cache.revision()
+    cards = {}
+    for product in products:
+        price, is_available = resolve_override(overrides, "product", product.id, product.price, product.is_available)
+        cards[product.id] = {
+            "product": {
+                "id": product.id,
+                "name": product.name,
+                "price": price,
+                "category_id": product.category_id,
+                "category_name": product.category_rel.name if product.category_rel else None,
+                "is_available": is_available,
+                "image_url": product.image_url
+            },
+            "variants": [variant_to_dict(v, price) for v in variants_by_product[product.id]],
+            "modifier_groups": groups_by_product.get(product.id, []),
+            "revision": revision
+        }
+    return cards
+
+
+def load_product_card(db: Session, product_id: int, location_id: Optional[int] = None) -> Optional[dict]:
+    """Карточка одного товара (None - товара нет)"""
+    return load_product_cards(db, [product_id], location_id).get(product_id)
+
+
+# ==================== Цены и доступность по точкам ====================
+
+# (вид, id) -> (цена или None, доступность или None); вид - "product" / "recipe"
+Overrides = Dict[Tuple[str, int], Tuple[Optional[float], Optional[bool]]]
+
+
+def load_location_overrides(db: Session, location_id: int) -> Optional[Overrides]:
+    """Исключения цен и доступности точки (None - точки нет)"""
+    if db.query(Location.id).filter(Location.id == location_id).first() is None:
+        return None
+    return {
+        ("product", row.product_id) if row.product_id is not None else ("recipe", row.recipe_id): (
+            row.price, row.is_available
+        )
+        for row in db.query(
+            LocationOverride.product_id,
+            LocationOverride.recipe_id,
+            LocationOverride.price,
+            LocationOverride.is_available
+        ).filter(LocationOverride.location_id == location_id)
+    }
+
+
+def resolve_override(overrides: Overrides, kind: str, obj_id: int, price: float, is_available: bool):
+    """(цена, доступность) на точке: исключение, а где его нет - общие значения"""
+    override = overrides.get((kind, obj_id))
+    if override is None:
+        return price, is_available
+    override_price, override_available = override
+    return (
+        price if override_price is None else override_price,
+        is_available if override_available is None else override_available
+    )
+
+
+def _overrides_or_empty(db: Session, location_id: Optional[int]) -> Overrides:
+    if location_id is None:
+        return {}
+    return get_location_overrides(db, location_id) or {}
+
+
+def load_sale_prices(db: Session, location_id: int) -> Optional[dict]:
+    """
+    Цены продажи на точке для оформления заказа (None - точки нет)
+
+    {"products": {id: (название, цена, доступен)}, "recipes": {...}} - все
+    товары и техкарты, не только показанные на кассе;
+    "variants": {id: (товар, название, надбавка к цене товара, техкарта, активен)},
+    "modifiers": {id: (название, цена, доступен)}.
+    """
+    overrides = get_location_overrides(db, location_id)
+    if overrides is None:
+        return None
+    products = {}
+    for row in db.query(Product.id, Product.name, Product.price, Product.is_available):
+        price, is_available = resolve_override(overrides, "product", row.id, row.price, row.is_available)
+        products[row.id] = (row.name, price, bool(is_available))
+    recipes = {}
+    for row in db.query(Recipe.id, Recipe.name, Recipe.price):
+        price, is_available = resolve_override(overrides, "recipe", row.id, row.price, True)
+        recipes[row.id] = (row.name, price, bool(is_available))
+    variants = {
+        row.id: (row.base_product_id, row.name, row.price_adjustment or 0.0, row.recipe_id, bool(row.is_active))
+        for row in db.query(
+            ProductVariant.id,
+            ProductVariant.base_product_id,
+            ProductVariant.name,
+            ProductVariant.price_adjustment,
+            ProductVariant.recipe_id,
+            ProductVariant.is_active
+        )
+    }
+    modifiers = {
+        row.id: (row.name, row.price or 0.0, bool(row.is_available) and bool(row.is_active))
+        for row in db.query(
+            Modifier.id, Modifier.name, Modifier.price, Modifier.is_available, ModifierGroup.is_active
+        ).join(ModifierGroup, Modifier.group_id == ModifierGroup.id)
+    }
+    return {"products": products, "recipes": recipes, "variants": variants, "modifiers": modifiers}
+
+
+# ==================== Меню кассы ====================
+
+def load_pos_items(db: Session, location_id: Optional[int] = None) -> List[dict]:
+    """
+    Товары и техкарты для кассы (show_in_pos=true), как GET /pos/items
+
+    Наличие вариантов/модификаций - по одному запросу на все товары,
+    себестоимость техкарт - через selectinload состава.
+    location_id - цены и доступность с исключениями точки.
+    """
+    overrides = _overrides_or_empty(db, location_id)
+    products = db.query(Product).options(
+        joinedload(Product.category_rel)
+    ).filter(
+        Product.show_in_pos == True
+    ).order_by(
+        Product.category_id.asc().nulls_last(),
+        Product.display_order.asc(),
+        Product.name.asc()
+    ).all()
+
+    with_variants = {
+        row.base_product_id for row in db.query(ProductVariant.base_product_id).filter(
+            ProductVariant.is_active == True
+        ).distinct()
+    }
+    with_modifiers = {
+        row.product_id for row in db.query(ProductModifierGroup.product_id).distinct()
+    }
+
+    items = []
+    for product in products:
+        price, is_available = resolve_override(overrides, "product", product.id, product.price, product.is_available)
+        items.append({
+            "id": product.id,
+            "type": "product",  # Тип: товар (покупной)
+            "name": product.name,
+            "price": price,
+            "category": product.category,  # DEPRECATED: старое поле для обратной совместимости
+            "category_id": product.category_id,
+            "category_name": product.category_rel.name if product.category_rel else None,
+            "display_order": product.display_order,
+            "is_available": is_available,
+            "image_url": product.image_url,
+            "cost": None,  # У товаров нет автоматической себестоимости
+            "markup_percentage": None,
+            "has_variants": product.id in with_variants,  # Есть варианты (размеры)
+            "has_modifiers": product.id in with_modifiers  # Есть модификации (добавки)
+        })
+
+    recipes = db.query(Recipe).options(
+        joinedload(Recipe.category_rel),
+        *recipe_cost_options()
+    ).filter(
+        Recipe.show_in_pos == True
+    ).order_by(
+        Recipe.category_id.asc().nulls_last(),
+        Recipe.display_order.asc(),
+        Recipe.name.asc()
+    ).all()
+
+    for recipe in recipes:
+        price, is_available = resolve_override(overrides, "recipe", recipe.id, recipe.price, True)
+        cost = recipe.cost
+        items.append({
+            "id": recipe.id,
+            "type": "recipe",  # Тип: техкарта (готовится)
+            "name": recipe.name,
+            "price": price,
+            "category": recipe.category,  # DEPRECATED: старое поле для обратной совместимости
+            "category_id": recipe.category_id,
+            "category_name": recipe.category_rel.name if recipe.category_rel else None,
+            "display_order": recipe.display_order,
+            "is_available": is_available,  # Доступно, если не выключено на точке
+            "image_url": recipe.image_url,
+            "cost": cost,  # Себестоимость из ингредиентов
+            "markup_percentage": markup_percentage(price, cost),
+            "output_weight": recipe.output_weight,
+            "has_variants": False,  # Техкарты не имеют вариантов
+            "has_modifiers": False  # Техкарты не имеют модификаций
+        })
+
+    # Сортировка уже выполнена на уровне БД, возвращаем как есть
+    return items
+
+
+def load_pos_categories(db: Session) -> List[dict]:
+    """Активные категории кассы (POS, а также PRODUCT/RECIPE для обратной совместимости)"""
+    categories = db.query(Category).filter(
+        Category.type.in_(['pos', 'product', 'recipe']),
+        Category.is_active == True
+    ).order_by(Category.display_order.asc(), Category.name.asc()).all()
+
+    return [
+        {
+            "id": cat.id,
+            "name": cat.name,
+            "type": cat.type,  # type is String, not Enum, so no .value needed
+            "color": cat.color,
+            "display_order": cat.display_order
+        }
+        for cat in categories
+    ]
+
+
+# ==================== Кэшированные ====================
+
+def get_modifier_groups(db: Session, active_only: bool = False) -> List[dict]:
+    return catalog_cache.get_or_build(
+        ("modifier_groups", active_only), lambda: load_modifier_groups(db, active_only)
+    )
+
+
+def get_product_modifier_groups(db: Session, product_id: int) -> Optional[List[dict]]:
+    return catalog_cache.get_or_build(
+        ("product_modifiers", product_id), lambda: load_product_modifier_groups(db, product_id)
+    )
+
+
+def get_product_card(db: Session, product_id: int, location_id: Optional[int] = None) -> Optional[dict]:
+    return catalog_cache.get_or_build(
+        ("product_card", product_id, location_id), lambda: load_product_card(db, product_id, location_id)
+    )
+
+
+def get_location_overrides(db: Session, location_id: int) -> Optional[Overrides]:
+    return catalog_cache.get_or_build(
+        ("location_overrides", location_id), lambda: load_location_overrides(db, location_id)
+    )
+
+
+def get_pos_items(db: Session, location_id: Optional[int] = None) -> List[dict]:
+    return catalog_cache.get_or_build(("pos_items", location_id), lambda: load_pos_items(db, location_id))
+
+
+def get_sale_prices(db: Session, location_id: int) -> Optional[dict]:
+    return catalog_cache.get_or_build(("sale_prices", location_id), lambda: load_sale_prices(db, location_id))
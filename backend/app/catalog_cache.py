@@ -0,0 +1,121 @@
+"""
+Кэш каталога в памяти процесса (деревья модификаторов, карточки товаров)
+
+Каталог меняется редко (админка), а читается на каждый тап кассира, поэтому
+готовые ответы держатся в памяти и сбрасываются целиком при любой записи
+в таблицы каталога:
+
+- after_flush запоминает, что сессия трогала таблицы каталога
+  (добавление/изменение/удаление объектов)
+- do_orm_execute ловит массовые insert()/update()/delete() по этим таблицам
+- after_commit увеличивает ревизию каталога - все записи кэша устаревают;
+  при откате ничего не сбрасывается
+
+Сырые SQL (text()) не отслеживаются - после них нужно вызвать invalidate().
+Кэш локален для процесса: при нескольких воркерах uvicorn остальные увидят
+изменения не позже чем через CATALOG_CACHE_TTL секунд.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from sqlalchemy import event
+
+from .db import SessionLocal
+
+# Таблицы, изменение которых сбрасывает кэш каталога
+CATALOG_TABLES = frozenset({
+    "categories",
+    "products",
+    "product_variants",
+    "modifier_groups",
+    "modifiers",
+    "product_modifier_groups",
+    "ingredients",
+    "recipes",
+    "recipe_ingredients",
+    "recipe_semifinished",
+    "semifinished",
+    "semifinished_ingredients",
+    "location_overrides",
+    "locations",
+})
+
+# Сколько секунд запись кэша живёт даже без изменений (страховка для нескольких процессов)
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+_SESSION_FLAG = "catalog_changed"
+
+_lock = threading.Lock()
+_revision = 0
+# key -> (ревизия, время построения, значение)
+_entries: Dict[Hashable, Tuple[int, float, Any]] = {}
+
+
+def revision() -> int:
+    """Текущая ревизия каталога (растёт при каждом изменении)"""
+    return _revision
+
+
+def invalidate() -> None:
+    """Сбросить весь кэш каталога"""
+    global _revision
+    with _lock:
+        _revision += 1
+        _entries.clear()
+
+
+def get_or_build(key: Hashable, builder: Callable[[], Any]) -> Any:
+    """
+    Значение из кэша или builder(), если записи нет или она устарела
+
+    builder вызывается без блокировки: два параллельных промаха просто построят
+    значение дважды. Значение, построенное во время изменения каталога,
+    не сохраняется.
+    """
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == _revision and now - entry[1] < CATALOG_CACHE_TTL:
+        return entry[2]
+
+    started_revision = _revision
+    value = builder()
+    with _lock:
+        if _revision == started_revision:
+            _entries[key] = (started_revision, now, value)
+    return value
+
+
+def _is_catalog_table(table) -> bool:
+    return getattr(table, "name", None) in CATALOG_TABLES
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_flush(session, flush_context):
+    if session.info.get(_SESSION_FLAG):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if getattr(obj, "__tablename__", None) in CATALOG_TABLES:
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if _is_catalog_table(table):
+        orm_execute_state.session.info[_SESSION_FLAG] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_SESSION_FLAG, False):
+        invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_SESSION_FLAG, None)
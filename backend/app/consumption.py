@@ -0,0 +1,65 @@
+"""
+Расход ингредиентов на порцию (техкарта -> ингредиенты в единицах склада)
+
+Техкарта раскладывается на ингредиенты: собственные ингредиенты - по весу
+брутто (столько списывается со склада), полуфабрикаты - пропорционально
+доле выхода. Результат в единицах ингредиента (кг/л - тысячные доли),
+как и Stock.quantity, поэтому его можно прямо сравнивать с остатками.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from .catalog import recipe_cost_options
+from .costing import to_stock_units
+from .models import Ingredient, Modifier, Recipe
+
+# {ingredient_id: количество в единицах склада}
+Requirements = Dict[int, float]
+
+
+def semifinished_requirements(semifinished, quantity: float) -> Requirements:
+    """Ингредиенты на quantity граммов полуфабриката"""
+    result: Requirements = {}
+    if not semifinished or not semifinished.output_quantity:
+        return result
+    share = quantity / semifinished.output_quantity
+    for line in semifinished.ingredients:
+        if line.ingredient is None:
+            continue
+        amount = to_stock_units(line.ingredient.unit, line.weight) * share
+        result[line.ingredient_id] = result.get(line.ingredient_id, 0.0) + amount
+    return result
+
+
+def recipe_requirements(recipe) -> Requirements:
+    """Ингредиенты на одну порцию техкарты (граф загружен catalog.recipe_cost_options)"""
+    result: Requirements = {}
+    for line in recipe.ingredients:
+        if line.ingredient is None:
+            continue
+        amount = to_stock_units(line.ingredient.unit, line.gross_weight)
+        result[line.ingredient_id] = result.get(line.ingredient_id, 0.0) + amount
+    for line in recipe.semifinished_items:
+        for ingredient_id, amount in semifinished_requirements(line.semifinished, line.quantity).items():
+            result[ingredient_id] = result.get(ingredient_id, 0.0) + amount
+    return result
+
+
+def load_recipe_requirements(db: Session, recipe_ids: Optional[Iterable[int]] = None) -> Dict[int, Requirements]:
+    """{recipe_id: расход на порцию} для техкарт (None - для всех)"""
+    query = db.query(Recipe).options(*recipe_cost_options())
+    if recipe_ids is not None:
+        query = query.filter(Recipe.id.in_(list(recipe_ids)))
+    return {recipe.id: recipe_requirements(recipe) for recipe in query}
+
+
+def load_modifier_requirements(db: Session) -> Dict[int, Requirements]:
+    """{modifier_id: расход на одно использование} для модификаторов со списанием"""
+    rows = db.query(Modifier.id, Modifier.ingredient_id, Modifier.quantity_per_use, Ingredient.unit).join(
+        Ingredient, Modifier.ingredient_id == Ingredient.id
+    ).filter(Modifier.quantity_per_use > 0)
+    return {
+        row.id: {row.ingredient_id: to_stock_units(row.unit, row.quantity_per_use)}
+        for row in rows
+    }
@@ -0,0 +1,104 @@
+"""
+Расчёт себестоимости техкарт и полуфабрикатов
+
+Формулы живут здесь, свойства моделей (Recipe.cost, RecipeIngredient.cost, ...)
+и ответы API считают через одни и те же функции. Функции ничего не запрашивают
+из БД - работают с уже загруженными объектами, поэтому граф
+техкарта -> состав -> ингредиенты/полуфабрикаты нужно загрузить заранее
+(catalog.recipe_cost_options / catalog.semifinished_cost_options).
+"""
+from typing import Dict, Optional
+
+# Единицы, цена которых указана за 1000 граммов/мл
+_THOUSAND_UNITS = ("кг", "л")
+
+
+def to_stock_units(unit: str, weight: float) -> float:
+    """Граммы/мл из техкарты -> единицы ингредиента (для кг/л - тысячные доли)"""
+    if unit in _THOUSAND_UNITS:
+        return weight / 1000
+    return weight
+
+
+def ingredient_line_cost(ingredient, weight: float, price: Optional[float] = None) -> float:
+    """
+    Стоимость ингредиента в составе: вес(граммы) * цена_за_единицу
+
+    Вес всегда в граммах, для кг/л переводится в тысячные доли.
+    price - цена вместо ingredient.purchase_price (расчёт «что будет, если»).
+    """
+    if not ingredient:
+        return 0
+
+    quantity = to_stock_units(ingredient.unit, weight)  # граммы → кг/л
+    return round(quantity * (ingredient.purchase_price if price is None else price), 2)
+
+
+def semifinished_portion_cost(total_cost: float, output_quantity: float, quantity: float) -> float:
+    """Стоимость quantity граммов полуфабриката: количество * (себестоимость / выход)"""
+    if output_quantity == 0:
+        return 0
+    return round(quantity * (total_cost / output_quantity), 2)
+
+
+def markup_percentage(price: float, cost: float) -> float:
+    """Наценка в процентах: (цена - себестоимость) / себестоимость * 100"""
+    if cost == 0:
+        return 0
+    return round(((price - cost) / cost) * 100, 2)
+
+
+class CostCalculator:
+    """
+    Калькулятор себестоимости для одного ответа/запроса
+
+    Запоминает себестоимость полуфабрикатов по id: полуфабрикат, который входит
+    в несколько техкарт списка, считается один раз.
+
+    prices - {ingredient_id: цена} вместо текущих закупочных цен: себестоимость
+    после изменения цен считается до записи в БД.
+    """
+
+    def __init__(self, prices: Optional[Dict[int, float]] = None):
+        self._semifinished: Dict[int, float] = {}
+        self._prices = prices or {}
+
+    def ingredient_cost(self, ingredient, weight: float) -> float:
+        price = self._prices.get(ingredient.id) if ingredient else None
+        return ingredient_line_cost(ingredient, weight, price)
+
+    def semifinished_cost(self, semifinished) -> float:
+        """Себестоимость полуфабриката (сумма стоимостей ингредиентов)"""
+        cached = self._semifinished.get(semifinished.id)
+        if cached is None:
+            cached = sum(
+                self.ingredient_cost(line.ingredient, line.weight) for line in semifinished.ingredients
+            )
+            if semifinished.id is not None:
+                self._semifinished[semifinished.id] = cached
+        return cached
+
+    def recipe_ingredient_cost(self, line) -> float:
+        return self.ingredient_cost(line.ingredient, line.net_weight)
+
+    def recipe_semifinished_cost(self, line) -> float:
+        semifinished = line.semifinished
+        if not semifinished:
+            return 0
+        return semifinished_portion_cost(
+            self.semifinished_cost(semifinished), semifinished.output_quantity, line.quantity
+        )
+
+    def recipe_cost(self, recipe) -> float:
+        """Себестоимость техкарты = ингредиенты + полуфабрикаты"""
+        ingredients_cost = sum(self.recipe_ingredient_cost(line) for line in recipe.ingredients)
+        semifinished_cost = sum(self.recipe_semifinished_cost(line) for line in recipe.semifinished_items)
+        return ingredients_cost + semifinished_cost
+
+
+def recipe_cost(recipe, calculator: Optional[CostCalculator] = None) -> float:
+    return (calculator or CostCalculator()).recipe_cost(recipe)
+
+
+def semifinished_cost(semifinished, calculator: Optional[CostCalculator] = None) -> float:
+    return (calculator or CostCalculator()).semifinished_cost(semifinished)
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,20 +14,66 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
     "sqlite:///./mypos.db"
 )
 
-# Если PostgreSQL
-if SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-else:
+# Реплика только для чтения (отчёты, история заказов, каталог).
+# Если не задана - чтение идёт с основной БД
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL", "")
+
+# Сколько секунд после записи читать с основной БД (запас на отставание реплики)
+REPLICA_LAG_SECONDS = float(os.getenv("REPLICA_LAG_SECONDS", "2"))
+
+
+def _create_engine(url: str):
+    # Если PostgreSQL
+    if url.startswith("postgresql"):
+        return create_engine(url)
     # SQLite
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
+    return create_engine(
+        url,
         connect_args={"check_same_thread": False}
     )
 
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+
+if READ_REPLICA_URL and READ_REPLICA_URL != SQLALCHEMY_DATABASE_URL:
+    read_engine = _create_engine(READ_REPLICA_URL)
+else:
+    read_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
+# Время последнего коммита в основную БД (monotonic).
+# Только в памяти процесса: «читаю свою запись» гарантировано лишь в пределах
+# воркера, который писал. При нескольких воркерах uvicorn чтение в другом
+# воркере может уйти на отстающую реплику - маршруты, которым нужна только что
+# созданная запись, читают через get_db или ищут в основной БД при промахе
+# (как orders.get_order).
+_last_write_at = 0.0
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session):
+    """Запоминаем момент записи, чтобы не читать устаревшие данные с реплики"""
+    global _last_write_at
+    _last_write_at = time.monotonic()
+
+
+def replica_is_fresh() -> bool:
+    """Можно ли читать с реплики: она настроена и этот процесс недавно не писал"""
+    if read_engine is engine:
+        return False
+    return time.monotonic() - _last_write_at > REPLICA_LAG_SECONDS
+
+
+def init_db():
+    """Создать недостающие таблицы (для локальной разработки, в продакшене - Alembic)"""
+    from . import models  # noqa: F401 - регистрируем модели в metadata
+    Base.metadata.create_all(bind=engine)
+
+
 # Dependency для получения DB сессии
 def get_db():
     db = SessionLocal()
@@ -34,3 +81,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency для read-only сессии (реплика, если она настроена и этот процесс недавно не писал).
+# Для данных, которые могли только что записать в другом воркере, - get_db или фолбэк на основную БД
+def get_read_db():
+    db = ReadSessionLocal() if replica_is_fresh() else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
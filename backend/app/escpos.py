@@ -0,0 +1,291 @@
+"""
+Рендеринг чеков и бегунков в ESC/POS на сервере
+
+Повторяет разметку frontend/src/utils/receiptPrinter.js (чек 80мм, 48 колонок)
+и бегунков (32 колонки), чтобы планшет только пересылал готовые байты на
+принт-прокси.
+
+- шаблоны собираются один раз: статичные части (команды, разделители,
+  подписи) заранее закодированы в CP866, в шаблоне остаются только поля заказа
+- шапка чека кэшируется по настройкам заведения (название, телефон)
+- логотип (PBM, RECEIPT_LOGO_PATH) переводится в растр GS v 0 один раз
+  и пересчитывается только при изменении файла
+"""
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, List, Optional, Union
+
+# ==================== Команды ESC/POS ====================
+
+INIT = b"\x1b@"
+INTL_CHARSET_RUSSIA = b"\x1bR\x07"  # ESC R 7
+CHARSET_CP866 = b"\x1bt\x11"  # ESC t 17
+LINE_FEED = b"\n"
+CUT_PAPER = b"\x1dV\x00"  # GS V 0
+
+ALIGN = {"left": b"\x1ba\x00", "center": b"\x1ba\x01", "right": b"\x1ba\x02"}
+SIZE = {"normal": b"\x1b!\x00", "tall": b"\x1b!\x10", "wide": b"\x1b!\x20", "double": b"\x1b!\x30"}
+BOLD_ON = b"\x1bE\x01"
+BOLD_OFF = b"\x1bE\x00"
+
+RECEIPT_WIDTH = 48  # XP-T80Q, 80мм
+RUNNER_WIDTH = 32  # XP-365B, 58мм
+
+# Логотип в формате PBM (P4) - печатается над названием заведения
+RECEIPT_LOGO_PATH = os.getenv("RECEIPT_LOGO_PATH", "")
+
+# Символы, которых нет в CP866
+_TEXT_FIXUPS = str.maketrans({"₸": "тг", "—": "-", "–": "-", "«": '"', "»": '"', "…": "..."})
+
+
+def encode(text: str) -> bytes:
+    """Текст -> CP866 (неизвестные символы - '?')"""
+    return text.translate(_TEXT_FIXUPS).encode("cp866", errors="replace")
+
+
+def text_prefix(align: str = "left", size: str = "normal", bold: bool = False) -> bytes:
+    """Команды перед строкой текста (как printText во фронтенде)"""
+    return ALIGN[align] + SIZE[size] + (BOLD_ON if bold else b"")
+
+
+def text_suffix(bold: bool = False) -> bytes:
+    return LINE_FEED + (BOLD_OFF if bold else b"")
+
+
+def text_line(text: str, align: str = "left", size: str = "normal", bold: bool = False) -> bytes:
+    return text_prefix(align, size, bold) + encode(text) + text_suffix(bold)
+
+
+def separator(char: str, width: int) -> bytes:
+    return text_line(char * width, align="center")
+
+
+# ==================== Шаблоны ====================
+
+Field = Callable[[dict], Union[str, bytes]]
+
+
+class Template:
+    """
+    Предкомпилированный шаблон: статичные байты + поля
+
+    Соседние статичные части склеиваются при сборке, поэтому render()
+    только подставляет значения полей и делает один b"".join.
+    """
+
+    def __init__(self, parts: List[Union[bytes, Field]]):
+        compiled: List[Union[bytes, Field]] = []
+        for part in parts:
+            if isinstance(part, bytes) and compiled and isinstance(compiled[-1], bytes):
+                compiled[-1] += part
+            else:
+                compiled.append(part)
+        self.parts = compiled
+
+    def render(self, ctx: dict) -> bytes:
+        out = []
+        for part in self.parts:
+            if isinstance(part, bytes):
+                out.append(part)
+            else:
+                value = part(ctx)
+                out.append(value if isinstance(value, bytes) else encode(value))
+        return b"".join(out)
+
+
+def field(name: str) -> Field:
+    return lambda ctx: ctx[name]
+
+
+def line_field(name: str, align: str = "left", size: str = "normal", bold: bool = False) -> list:
+    """Строка текста, значение которой берётся из контекста"""
+    return [text_prefix(align, size, bold), field(name), text_suffix(bold)]
+
+
+def _two_columns(left: str, right: str, width: int) -> str:
+    """Левая часть слева, правая справа (как spacer во фронтенде)"""
+    return f"{left}{' ' * max(1, width - len(left) - len(right))}{right}"
+
+
+@lru_cache(maxsize=None)
+def _receipt_header(business_name: str) -> Template:
+    width = RECEIPT_WIDTH
+    return Template([
+        INIT, INTL_CHARSET_RUSSIA, CHARSET_CP866,
+        field("logo"),
+        text_line(business_name, align="center", size="double", bold=True),
+        LINE_FEED,
+        separator("=", width),
+        *line_field("order_line", align="center", bold=True),
+        *line_field("date_line", align="center"),
+        separator("-", width),
+        LINE_FEED,
+    ])
+
+
+# Позиция чека: название жирным, "кол-во x цена ... сумма", пустая строка
+_RECEIPT_ITEM = Template([
+    *line_field("name", bold=True),
+    *line_field("qty_line"),
+    LINE_FEED,
+])
+
+
+@lru_cache(maxsize=None)
+def _receipt_footer(phone: str) -> Template:
+    width = RECEIPT_WIDTH
+    return Template([
+        separator("-", width),
+        *line_field("total_line", size="tall", bold=True),
+        *line_field("payment_line", align="center"),
+        separator("=", width),
+        LINE_FEED,
+        text_line("Спасибо за покупку!", align="center", size="wide"),
+        text_line(phone, align="center") if phone else b"",
+        LINE_FEED * 4,
+        CUT_PAPER,
+    ])
+
+
+_RUNNER = Template([
+    INIT, INTL_CHARSET_RUSSIA, CHARSET_CP866,
+    *line_field("order_line", align="center", size="double", bold=True),
+    separator("-", RUNNER_WIDTH),
+    *line_field("name", align="center", size="double", bold=True),
+    field("modifiers"),
+    LINE_FEED,
+    field("counter"),
+    *line_field("time", align="center"),
+    LINE_FEED * 3,
+    CUT_PAPER,
+])
+
+
+# ==================== Логотип ====================
+
+def _read_pbm(path: str):
+    """PBM P4 -> (ширина в байтах, высота, растр). Только стандартная библиотека"""
+    with open(path, "rb") as f:
+        content = f.read()
+    if not content.startswith(b"P4"):
+        raise ValueError(f"{path}: ожидается бинарный PBM (P4)")
+    # Заголовок: P4 <ширина> <высота> (с возможными комментариями) и один пробельный символ
+    tokens, pos = [], 2
+    while len(tokens) < 2:
+        while content[pos:pos + 1].isspace():
+            pos += 1
+        if content[pos:pos + 1] == b"#":
+            pos = content.index(b"\n", pos) + 1
+            continue
+        start = pos
+        while not content[pos:pos + 1].isspace():
+            pos += 1
+        tokens.append(int(content[start:pos]))
+    width, height = tokens
+    row_bytes = (width + 7) // 8
+    data = content[pos + 1:pos + 1 + row_bytes * height]
+    return row_bytes, height, data
+
+
+@lru_cache(maxsize=4)
+def _logo_raster(path: str, mtime: float) -> bytes:
+    """Логотип в виде команды GS v 0 (кэш по пути и времени изменения файла)"""
+    row_bytes, height, data = _read_pbm(path)
+    header = b"\x1dv0\x00" + bytes([row_bytes % 256, row_bytes // 256, height % 256, height // 256])
+    return ALIGN["center"] + header + data + LINE_FEED
+
+
+def logo_bytes(path: Optional[str] = None) -> bytes:
+    path = path if path is not None else RECEIPT_LOGO_PATH
+    if not path:
+        return b""
+    try:
+        return _logo_raster(path, os.path.getmtime(path))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Логотип чека не загружен: {e}")
+        return b""
+
+
+# ==================== Рендеринг заказа ====================
+
+def _order_items(order) -> List[dict]:
+    """Позиции заказа: из OrderItem (там есть модификаторы), иначе из JSON заказа"""
+    rows = getattr(order, "order_items", None)
+    if rows:
+        return [
+            {
+                "name": row.item_name,
+                "quantity": row.quantity,
+                "price": row.price,
+                "subtotal": row.subtotal,
+                "modifiers": row.modifiers or [],
+            }
+            for row in rows
+        ]
+    return [
+        {
+            "name": item.get("item_name") or item.get("product_name", ""),
+            "quantity": item.get("quantity", 1),
+            "price": item.get("price", 0),
+            "subtotal": item.get("subtotal", 0),
+            "modifiers": item.get("modifiers") or [],
+        }
+        for item in (order.items or [])
+    ]
+
+
+def _money(value: float) -> str:
+    return f"{value:.0f}"
+
+
+def _price(value: float) -> str:
+    """Цена как во фронтенде: 450 -> "450", 450.5 -> "450.5" """
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _created_at(order) -> datetime:
+    return order.created_at or datetime.now()
+
+
+def render_receipt(order, business_name: str = "", phone: str = "") -> bytes:
+    """Чек для клиента (разметка receiptPrinter.buildReceiptCommands)"""
+    created_at = _created_at(order)
+    parts = [_receipt_header(business_name or "My POS System").render({
+        "logo": logo_bytes(),
+        "order_line": f"ЧЕК: {order.order_number}",
+        "date_line": f"Дата: {created_at.strftime('%d.%m.%Y, %H:%M:%S')}",
+    })]
+    for item in _order_items(order):
+        parts.append(_RECEIPT_ITEM.render({
+            "name": item["name"],
+            "qty_line": _two_columns(
+                f"{item['quantity']} x {_price(item['price'])} тг", f"{_money(item['subtotal'])} тг", RECEIPT_WIDTH
+            ),
+        }))
+    payment_method = getattr(order.payment_method, "value", order.payment_method)
+    parts.append(_receipt_footer(phone or "").render({
+        "total_line": _two_columns("ИТОГО:", f"{_money(order.total_amount)} тг", RECEIPT_WIDTH),
+        "payment_line": f"Оплата: {'Наличные' if payment_method == 'cash' else 'Карта'}",
+    }))
+    return b"".join(parts)
+
+
+def render_runners(order) -> bytes:
+    """Бегунки: отдельная этикетка на каждый стакан (разметка buildRunnerCommands)"""
+    order_line = f"#{order.order_number}"
+    time_line = _created_at(order).strftime("%H:%M")
+    parts = []
+    for item in _order_items(order):
+        modifiers = ", ".join(m.get("name", "") for m in item["modifiers"])
+        modifiers_line = text_line(modifiers, align="center") if modifiers else b""
+        total = item["quantity"]
+        for number in range(1, total + 1):
+            parts.append(_RUNNER.render({
+                "order_line": order_line,
+                "name": item["name"],
+                "modifiers": modifiers_line,
+                "counter": text_line(f"{number} / {total}", align="center", size="tall") if total > 1 else b"",
+                "time": time_line,
+            }))
+    return b"".join(parts)
@@ -0,0 +1,235 @@
+"""
+Прогноз расхода ингредиентов и рекомендации к заказу
+
+Продажи за последние FORECAST_HISTORY_DAYS полных дней раскладываются через
+техкарты (app/consumption.py) в дневной расход ингредиентов по точкам:
+продажи агрегируются в БД (точка, день, техкарта), на каждую пару
+точка/ингредиент получается ряд фиксированной длины (array('d'), день -> расход).
+
+По ряду считается:
+- daily_consumption - экспоненциальное сглаживание (FORECAST_ALPHA), прогноз на день
+- avg_7d - средний расход за последние 7 дней
+- days_of_cover - на сколько дней хватит текущего остатка
+- suggested_order - сколько заказать, чтобы хватило на срок поставки
+  (lead_time_days) плюс cover_days и остался min_stock
+
+Расчёт - run_forecast(): несколько запросов и проход по рядам в памяти, без
+запросов на каждую пару. Результат хранится в памяти процесса до следующего
+запуска (POST /api/forecast/run или фоновый запуск раз в FORECAST_INTERVAL_SECONDS).
+"""
+import asyncio
+import os
+import threading
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .consumption import load_modifier_requirements, load_recipe_requirements
+from .db import SessionLocal
+from .models import Ingredient, Location, Order, OrderItem, OrderStatus, ProductVariant, Stock
+
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "28"))
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+FORECAST_LEAD_TIME_DAYS = float(os.getenv("FORECAST_LEAD_TIME_DAYS", "2"))
+FORECAST_COVER_DAYS = float(os.getenv("FORECAST_COVER_DAYS", "7"))
+# Фоновый пересчёт (секунды), 0 - только по запросу
+FORECAST_INTERVAL_SECONDS = float(os.getenv("FORECAST_INTERVAL_SECONDS", "3600"))
+
+_lock = threading.Lock()
+_result: Optional[dict] = None
+
+
+def _day(value) -> date:
+    """func.date() отдаёт строку на SQLite и date на PostgreSQL"""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def smooth(series: array, alpha: float = FORECAST_ALPHA) -> float:
+    """Экспоненциальное сглаживание: уровень после последнего дня"""
+    if not series:
+        return 0.0
+    level = series[0]
+    for value in series[1:]:
+        level = alpha * value + (1 - alpha) * level
+    return level
+
+
+def _sales(db: Session, since: datetime, until: datetime):
+    """(точка, день, техкарта, количество) - продажи техкарт и вариантов товаров"""
+    recipe_id = func.coalesce(OrderItem.recipe_id, ProductVariant.recipe_id)
+    day = func.date(Order.created_at)
+    return db.query(
+        Order.location_id,
+        day.label("day"),
+        recipe_id.label("recipe_id"),
+        func.sum(OrderItem.quantity).label("quantity")
+    ).join(Order, OrderItem.order_id == Order.id).outerjoin(
+        ProductVariant, OrderItem.variant_id == ProductVariant.id
+    ).filter(
+        Order.created_at >= since,
+        Order.created_at < until,
+        Order.status != OrderStatus.CANCELLED,
+        recipe_id.isnot(None)
+    ).group_by(Order.location_id, day, recipe_id).all()
+
+
+def _modifier_sales(db: Session, since: datetime, until: datetime):
+    """(точка, день, модификаторы, количество) - позиции с модификаторами"""
+    return db.query(
+        Order.location_id,
+        func.date(Order.created_at).label("day"),
+        OrderItem.modifiers,
+        OrderItem.quantity
+    ).join(Order, OrderItem.order_id == Order.id).filter(
+        Order.created_at >= since,
+        Order.created_at < until,
+        Order.status != OrderStatus.CANCELLED,
+        OrderItem.modifiers.isnot(None)
+    ).all()
+
+
+def run_forecast(
+    db: Session,
+    lead_time_days: float = FORECAST_LEAD_TIME_DAYS,
+    cover_days: float = FORECAST_COVER_DAYS,
+    history_days: int = FORECAST_HISTORY_DAYS,
+    store: bool = True
+) -> dict:
+    """
+    Пересчитать прогноз по всем точкам и ингредиентам
+
+    store=True - сохранить как общий результат (его отдаёт GET /api/forecast);
+    расчёт с нестандартными параметрами сохранять не нужно - фоновый запуск
+    всё равно перезапишет его расчётом по умолчанию.
+    """
+    global _result
+    started = time.perf_counter()
+
+    today = datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=history_days)
+    since = datetime.combine(first_day, datetime.min.time())
+    until = datetime.combine(today, datetime.min.time())
+
+    series: Dict[Tuple[int, int], array] = {}
+
+    def add(location_id: int, day, requirements: Dict[int, float], quantity: float):
+        index = (_day(day) - first_day).days
+        if not 0 <= index < history_days:
+            return
+        for ingredient_id, amount in requirements.items():
+            key = (location_id, ingredient_id)
+            values = series.get(key)
+            if values is None:
+                values = series[key] = array("d", bytes(8 * history_days))
+            values[index] += amount * quantity
+
+    sales = _sales(db, since, until)
+    recipes = load_recipe_requirements(db, {row.recipe_id for row in sales}) if sales else {}
+    for row in sales:
+        add(row.location_id, row.day, recipes.get(row.recipe_id, {}), row.quantity)
+
+    modifier_rows = _modifier_sales(db, since, until)
+    if modifier_rows:
+        modifiers = load_modifier_requirements(db)
+        for row in modifier_rows:
+            for modifier in row.modifiers or []:
+                requirements = modifiers.get(modifier.get("modifier_id")) if isinstance(modifier, dict) else None
+                if requirements:
+                    add(row.location_id, row.day, requirements, row.quantity)
+
+    # Текущие остатки (пары без строки Stock - с нулевым остатком) и названия
+    stocks = {
+        (row.location_id, row.ingredient_id): (row.quantity, row.min_stock)
+        for row in db.query(Stock.location_id, Stock.ingredient_id, Stock.quantity, Stock.min_stock)
+    }
+    keys = set(stocks) | set(series)
+    ingredients = {
+        row.id: row
+        for row in db.query(Ingredient.id, Ingredient.name, Ingredient.unit, Ingredient.purchase_price)
+    }
+    locations = dict(db.query(Location.id, Location.name).all())
+
+    items = []
+    for location_id, ingredient_id in keys:
+        ingredient = ingredients.get(ingredient_id)
+        if ingredient is None:
+            continue
+        quantity, min_stock = stocks.get((location_id, ingredient_id), (0.0, 0.0))
+        values = series.get((location_id, ingredient_id))
+        daily = smooth(values) if values else 0.0
+        last_week = values[-7:] if values else ()
+        avg_7d = sum(last_week) / len(last_week) if last_week else 0.0
+        suggested = 0.0
+        if daily > 0:
+            target = daily * (lead_time_days + cover_days) + (min_stock or 0)
+            suggested = max(0.0, target - quantity)
+        items.append({
+            "location_id": location_id,
+            "location_name": locations.get(location_id),
+            "ingredient_id": ingredient_id,
+            "ingredient_name": ingredient.name,
+            "unit": ingredient.unit,
+            "quantity": quantity,
+            "min_stock": min_stock,
+            "daily_consumption": round(daily, 3),
+            "avg_7d": round(avg_7d, 3),
+            "days_of_cover": round(quantity / daily, 1) if daily > 0 else None,
+            "suggested_order": round(suggested, 3),
+            "suggested_order_cost": round(suggested * ingredient.purchase_price, 2)
+        })
+    # Сначала то, что закончится раньше
+    items.sort(key=lambda item: (
+        item["days_of_cover"] is None,
+        item["days_of_cover"] or 0,
+        item["location_id"],
+        item["ingredient_name"]
+    ))
+
+    result = {
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "history_days": history_days,
+        "history_from": first_day.isoformat(),
+        "lead_time_days": lead_time_days,
+        "cover_days": cover_days,
+        "alpha": FORECAST_ALPHA,
+        "items": items
+    }
+    if store:
+        with _lock:
+            _result = result
+    print(
+        f"📈 Прогноз остатков: {len(items)} позиций, к заказу {sum(1 for item in items if item['suggested_order'] > 0)}, "
+        f"{result['duration_ms']} мс"
+    )
+    return result
+
+
+def get_forecast() -> Optional[dict]:
+    """Результат последнего запуска (None - ещё не считали)"""
+    return _result
+
+
+def _run_in_new_session():
+    db = SessionLocal()
+    try:
+        run_forecast(db)
+    finally:
+        db.close()
+
+
+async def run_periodically(interval: float = FORECAST_INTERVAL_SECONDS):
+    """Фоновый пересчёт раз в interval секунд (задача из lifespan приложения)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, _run_in_new_session)
+        except Exception as e:
+            print(f"⚠️ Ошибка пересчёта прогноза: {e}")
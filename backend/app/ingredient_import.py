@@ -0,0 +1,240 @@
+"""
+Массовый импорт ингредиентов (прайс-листы поставщиков)
+
+Файл разбирается и проверяется в памяти, существующие ингредиенты ищутся
+одним запросом по названию (индекс ix_ingredients_name), новые вставляются
+одним INSERT пачкой, существующие при on_conflict=update обновляются одним
+UPDATE по первичному ключу. На каждую строку файла - запись в отчёте.
+
+Форматы:
+- JSON: массив объектов или {"items": [...]}
+- CSV: первая строка - заголовки, разделитель «,» или «;», UTF-8 или cp1251
+- XLSX: первый лист, первая строка - заголовки (нужен пакет openpyxl)
+
+Заголовки - поля IngredientCreate или русские названия колонок
+(название, категория, единица, цена, упаковка).
+"""
+import csv
+import io
+import json
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from .models import Ingredient
+from .schemas import IngredientCreate
+
+# Больше строк за один запрос не принимаем
+BULK_MAX_ROWS = 10_000
+
+# Что делать с ингредиентом, который уже есть (совпадает название)
+ON_CONFLICT_MODES = ("skip", "update")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Заголовок колонки (в нижнем регистре) -> поле IngredientCreate
+COLUMN_ALIASES = {
+    "name": "name",
+    "название": "name",
+    "наименование": "name",
+    "category": "category",
+    "категория": "category",
+    "unit": "unit",
+    "единица": "unit",
+    "ед.": "unit",
+    "ед. изм.": "unit",
+    "purchase_price": "purchase_price",
+    "цена": "purchase_price",
+    "цена за единицу": "purchase_price",
+    "packaging_info": "packaging_info",
+    "упаковка": "packaging_info",
+}
+
+# Поля, которые обновляются у существующего ингредиента при on_conflict=update
+UPDATE_FIELDS = ("category", "unit", "purchase_price", "packaging_info")
+
+
+class ImportFormatError(ValueError):
+    """Файл не удалось разобрать целиком (а не отдельная строка)"""
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    """json / csv / xlsx по параметру format или Content-Type"""
+    if explicit:
+        if explicit not in ("json", "csv", "xlsx"):
+            raise ImportFormatError(f"Неизвестный формат '{explicit}': json, csv или xlsx")
+        return explicit
+    content_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if content_type in ("text/csv", "application/csv", "text/plain"):
+        return "csv"
+    if content_type in (XLSX_CONTENT_TYPE, "application/vnd.ms-excel"):
+        return "xlsx"
+    return "json"
+
+
+def _normalize_row(raw: dict) -> dict:
+    """Заголовки -> поля схемы, пустые ячейки -> None, «1 234,5» -> 1234.5"""
+    row = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        field = COLUMN_ALIASES.get(str(key).strip().lower())
+        if field is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip() or None
+        if field == "purchase_price" and isinstance(value, str):
+            value = value.replace("\u00a0", "").replace(" ", "").replace(",", ".")
+        row[field] = value
+    return row
+
+
+def _decode(body: bytes) -> str:
+    try:
+        return body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Excel в русской локали сохраняет CSV в cp1251
+        return body.decode("cp1251")
+
+
+def parse_json(body: bytes) -> List[dict]:
+    try:
+        data = json.loads(body or b"null")
+    except ValueError as e:
+        raise ImportFormatError(f"Некорректный JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ImportFormatError("Ожидается массив ингредиентов или {\"items\": [...]}")
+    return [_normalize_row(item) if isinstance(item, dict) else {} for item in data]
+
+
+def parse_csv(body: bytes) -> List[dict]:
+    text = _decode(body)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not reader.fieldnames:
+        raise ImportFormatError("CSV без строки заголовков")
+    return [_normalize_row(row) for row in reader if any((value or "").strip() for value in row.values() if isinstance(value, str))]
+
+
+def parse_xlsx(body: bytes) -> List[dict]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("Для импорта XLSX нужен пакет openpyxl (pip install openpyxl)")
+    try:
+        workbook = load_workbook(io.BytesIO(body), read_only=True, data_only=True)
+    except Exception as e:  # openpyxl бросает разные исключения на битый файл
+        raise ImportFormatError(f"Не удалось прочитать XLSX: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise ImportFormatError("XLSX без строки заголовков")
+        return [
+            _normalize_row(dict(zip(header, values)))
+            for values in rows
+            if any(value not in (None, "") for value in values)
+        ]
+    finally:
+        workbook.close()
+
+
+PARSERS = {"json": parse_json, "csv": parse_csv, "xlsx": parse_xlsx}
+
+
+def _validate(rows: List[dict]) -> Tuple[List[Tuple[int, IngredientCreate]], List[dict]]:
+    """Проверка схемой в памяти: (годные строки, отчёт по ошибочным)"""
+    valid, report = [], []
+    seen: Dict[str, int] = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            item = IngredientCreate(**row)
+        except ValidationError as e:
+            errors = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            report.append({"row": number, "name": row.get("name"), "status": "error", "error": errors})
+            continue
+        item.name = item.name.strip()
+        if item.name in seen:
+            report.append({
+                "row": number, "name": item.name, "status": "error",
+                "error": f"Повтор названия из строки {seen[item.name]}"
+            })
+            continue
+        seen[item.name] = number
+        valid.append((number, item))
+    return valid, report
+
+
+def import_ingredients(db: Session, rows: List[dict], on_conflict: str = "skip") -> dict:
+    """
+    Импортировать разобранные строки
+
+    on_conflict: skip - существующие (по названию) пропускаются,
+    update - у них обновляются категория, единица, цена и упаковка.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ImportFormatError(f"on_conflict: {' или '.join(ON_CONFLICT_MODES)}")
+    if len(rows) > BULK_MAX_ROWS:
+        raise ImportFormatError(f"Слишком много строк: {len(rows)} (максимум {BULK_MAX_ROWS})")
+
+    valid, report = _validate(rows)
+
+    # Существующие ингредиенты - одним запросом по индексу названия
+    existing: Dict[str, int] = {}
+    names = [item.name for _, item in valid]
+    if names:
+        for row in db.query(Ingredient.id, Ingredient.name).filter(Ingredient.name.in_(names)).order_by(Ingredient.id):
+            existing.setdefault(row.name, row.id)
+
+    to_insert, to_update = [], []
+    for number, item in valid:
+        if item.name in existing:
+            entry = {"row": number, "name": item.name, "id": existing[item.name]}
+            if on_conflict == "update":
+                to_update.append({"id": existing[item.name], **item.model_dump(include=set(UPDATE_FIELDS))})
+                entry["status"] = "updated"
+            else:
+                entry["status"] = "skipped"
+            report.append(entry)
+        else:
+            to_insert.append((number, item))
+
+    if to_insert:
+        # Порядок RETURNING не гарантирован, но названия в пачке уникальны - сопоставляем по ним.
+        # sort_by_parameter_order не используем: на SQLite он превращает пачку в INSERT на строку
+        created = db.execute(
+            insert(Ingredient).returning(Ingredient.id, Ingredient.name),
+            [item.model_dump() for _, item in to_insert]
+        ).all()
+        created_ids = {row.name: row.id for row in created}
+        for number, item in to_insert:
+            report.append({"row": number, "name": item.name, "id": created_ids.get(item.name), "status": "created"})
+    if to_update:
+        db.execute(update(Ingredient), to_update)
+    db.commit()
+
+    report.sort(key=lambda entry: entry["row"])
+    counts = {status: 0 for status in ("created", "updated", "skipped", "error")}
+    for entry in report:
+        counts[entry["status"]] += 1
+    print(
+        f"📥 Импорт ингредиентов: {len(rows)} строк, создано {counts['created']}, "
+        f"обновлено {counts['updated']}, пропущено {counts['skipped']}, ошибок {counts['error']}"
+    )
+    return {
+        "total": len(rows),
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "skipped": counts["skipped"],
+        "errors": counts["error"],
+        "rows": report
+    }
@@ -0,0 +1,163 @@
+"""
+Пакет меню для офлайн-кассы: всё меню одним сжатым документом
+
+Планшет скачивает пакет одним запросом и продаёт из него, когда сеть пропала:
+категории, позиции кассы (как /pos/items), карточки товаров (варианты с ценами
+и себестоимостью, деревья модификаторов, как /pos/products/{id}/card).
+
+- версия пакета - хэш содержимого, она же ETag (If-None-Match -> 304)
+- пакет пересобирается только после изменения каталога (ревизия catalog_cache)
+- у точки свой пакет (location_id): цены и доступность с её исключениями
+- сжатые варианты (gzip, brotli - если установлен пакет brotli) лежат на диске
+  в MENU_BUNDLE_DIR под именем версии: после перезапуска сервера одинаковое
+  меню не сжимается заново
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from . import catalog_cache
+from .catalog import load_pos_categories, load_pos_items, load_product_cards
+
+try:
+    import brotli  # опционально: pip install brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+# Формат документа (меняется при несовместимых изменениях структуры)
+BUNDLE_FORMAT = 1
+
+# Каталог для сжатых пакетов
+MENU_BUNDLE_DIR = os.getenv("MENU_BUNDLE_DIR", os.path.join(tempfile.gettempdir(), "mypos-menu-bundle"))
+
+# Сколько последних версий держать на диске
+MENU_BUNDLE_KEEP = 5
+
+# Расширения файлов по Content-Encoding
+_EXTENSIONS = {"gzip": ".json.gz", "br": ".json.br"}
+
+_build_lock = threading.Lock()
+
+
+class MenuBundle:
+    """Собранный пакет: версия, JSON и сжатые варианты"""
+
+    def __init__(self, version: str, raw: bytes, encoded: Dict[str, bytes]):
+        self.version = version
+        self.raw = raw
+        self.encoded = encoded
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def encodings(self):
+        return list(self.encoded)
+
+    def body(self, encoding: Optional[str]) -> bytes:
+        return self.encoded[encoding] if encoding else self.raw
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(document: dict) -> bytes:
+    return json.dumps(
+        document, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+def build_document(db: Session, location_id: Optional[int] = None) -> dict:
+    """Содержимое пакета (без версии); location_id - цены и доступность точки"""
+    cards = load_product_cards(db, location_id=location_id)
+    for card in cards.values():
+        # Ревизия процесса меняется при перезапуске - в версию пакета не входит
+        card.pop("revision", None)
+    return {
+        "format": BUNDLE_FORMAT,
+        "categories": load_pos_categories(db),
+        "items": load_pos_items(db, location_id),
+        "cards": {str(product_id): card for product_id, card in cards.items()},
+    }
+
+
+def _compress(raw: bytes) -> Dict[str, bytes]:
+    encoded = {"gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(raw, quality=11)
+    return encoded
+
+
+def _load_or_compress(version: str, raw: bytes) -> Dict[str, bytes]:
+    """Сжатые варианты с диска, а если их нет - сжать и сохранить"""
+    paths = {enc: os.path.join(MENU_BUNDLE_DIR, f"menu-{version}{ext}") for enc, ext in _EXTENSIONS.items()}
+    wanted = ["gzip"] + (["br"] if brotli is not None else [])
+    try:
+        encoded = {}
+        for encoding in wanted:
+            with open(paths[encoding], "rb") as f:
+                encoded[encoding] = f.read()
+        return encoded
+    except OSError:
+        pass
+
+    encoded = _compress(raw)
+    try:
+        os.makedirs(MENU_BUNDLE_DIR, exist_ok=True)
+        for encoding, data in encoded.items():
+            # Запись во временный файл и rename - параллельный читатель не увидит половину файла
+            tmp_path = f"{paths[encoding]}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, paths[encoding])
+        _prune(keep_version=version)
+    except OSError as e:
+        print(f"⚠️ Пакет меню не сохранён на диск: {e}")
+    return encoded
+
+
+def _prune(keep_version: str):
+    """Удалить старые версии, оставить MENU_BUNDLE_KEEP последних"""
+    files = [
+        os.path.join(MENU_BUNDLE_DIR, name)
+        for name in os.listdir(MENU_BUNDLE_DIR)
+        if name.startswith("menu-") and not name.endswith(".tmp")
+    ]
+    versions = {}
+    for path in files:
+        version = os.path.basename(path)[len("menu-"):].split(".", 1)[0]
+        versions.setdefault(version, []).append(path)
+    ordered = sorted(versions, key=lambda v: max(os.path.getmtime(p) for p in versions[v]), reverse=True)
+    for version in ordered[MENU_BUNDLE_KEEP:]:
+        if version == keep_version:
+            continue
+        for path in versions[version]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _build(db: Session, location_id: Optional[int] = None) -> MenuBundle:
+    document = build_document(db, location_id)
+    version = hashlib.sha256(_dumps(document)).hexdigest()[:16]
+    raw = _dumps({"version": version, **document})
+    print(f"📦 Пакет меню {version}: {len(raw)} байт, {len(document['items'])} позиций")
+    return MenuBundle(version, raw, _load_or_compress(version, raw))
+
+
+def get_menu_bundle(db: Session, location_id: Optional[int] = None) -> MenuBundle:
+    """Актуальный пакет точки (пересобирается только после изменения каталога)"""
+    # Сборка тяжёлая - параллельные промахи ждут одну сборку, а не строят пакет каждый сам
+    with _build_lock:
+        return catalog_cache.get_or_build(("menu_bundle", location_id), lambda: _build(db, location_id))
@@ -0,0 +1,279 @@
+"""
+Реестр метрик приложения в стиле Prometheus (без внешних зависимостей)
+
+- Counter - монотонный счётчик (заказы, ошибки)
+- Gauge - текущее значение (WebSocket подключения)
+- Histogram - распределение с фиксированными бакетами (латентность)
+
+Метрики живут в памяти процесса, экспорт - render_prometheus() в текстовом
+формате Prometheus (отдаётся на /api/metrics/prometheus).
+
+Пример:
+    ORDERS = counter("pos_orders_created_total", "Создано заказов", ["payment_method"])
+    ORDERS.labels(payment_method="cash").inc()
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Бакеты по умолчанию (секунды) - от 1 мс до 10 с
+DEFAULT_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HistogramValue:
+    """Значение гистограммы: счётчики по бакетам (последний - +Inf), сумма, максимум"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def as_dict(self) -> dict:
+        """Компактное представление для JSON (бакеты не накопительные)"""
+        buckets = {str(le): count for le, count in zip(self.buckets, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "avg": round(self.sum / self.count, 2) if self.count else 0,
+            "max": round(self.max, 2),
+            "buckets": buckets
+        }
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Metric:
+    """Семейство метрик с одинаковым именем и набором меток"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """Значение для конкретного набора меток: metric.labels(route="/api/orders")"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.get(key)
+                if value is None:
+                    value = self._values[key] = self._new_value()
+        return value
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Метрика {self.name} требует метки: {', '.join(self.labelnames)}")
+        return self.labels()
+
+    def _label_string(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{self._label_string(key)} {_format_number(value.value)}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            cumulative = 0
+            for le, count in zip(value.buckets, value.counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{self._label_string(key, ('le', _format_number(le)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_bucket{self._label_string(key, ('le', '+Inf'))} {value.count}")
+            lines.append(f"{self.name}_sum{self._label_string(key)} {_format_number(value.sum)}")
+            lines.append(f"{self.name}_count{self._label_string(key)} {value.count}")
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Зарегистрировать метрику (повторная регистрация возвращает существующую)"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Метрика {metric.name} уже зарегистрирована с другим типом или метками")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus (exposition format 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Обнулить значения всех метрик (сами метрики остаются зарегистрированными)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# Реестр по умолчанию
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_SECONDS_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+# ==================== Метрики POS ====================
+
+HTTP_REQUEST_SECONDS = histogram(
+    "pos_http_request_duration_seconds", "Время обработки HTTP-запроса", ["method", "route"]
+)
+HTTP_DB_QUERIES = histogram(
+    "pos_http_db_queries", "Количество SQL-запросов на HTTP-запрос", ["method", "route"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+
+ORDERS_CREATED = counter("pos_orders_created_total", "Создано заказов", ["payment_method"])
+ORDERS_REVENUE = counter("pos_orders_revenue_total", "Сумма созданных заказов", ["payment_method"])
+ORDERS_FAILED = counter("pos_orders_failed_total", "Отклонённые заказы", ["reason"])
+CHECKOUT_SECONDS = histogram("pos_checkout_duration_seconds", "Время оформления заказа (create_order)")
+
+WEBSOCKET_CONNECTIONS = gauge("pos_websocket_connections", "Активные WebSocket подключения", ["channel"])
+WEBSOCKET_BROADCAST_SECONDS = histogram(
+    "pos_websocket_broadcast_duration_seconds", "Время рассылки сообщения всем клиентам", ["channel"]
+)
+WEBSOCKET_BROADCAST_RECIPIENTS = histogram(
+    "pos_websocket_broadcast_recipients", "Количество получателей рассылки", ["channel"],
+    buckets=(0, 1, 2, 5, 10, 20, 50)
+)
+WEBSOCKET_SEND_ERRORS = counter("pos_websocket_send_errors_total", "Ошибки отправки по WebSocket", ["channel"])
+
+STOCK_ADJUSTMENTS = counter("pos_stock_adjustments_total", "Корректировки остатков", ["kind"])
+STOCK_ADJUSTMENT_REJECTED = counter(
+    "pos_stock_adjustments_rejected_total", "Отклонённые корректировки остатков", ["reason"]
+)
+STOCK_ALERTS = counter("pos_stock_alerts_total", "Уведомления о низком остатке", ["type"])
@@ -7,8 +7,10 @@ from .semifinished import Semifinished, SemifinishedIngredient, RecipeSemifinish
 from .category import Category, CategoryType
 from .product_variant import ProductVariant
 from .modifier import ModifierGroup, Modifier, ProductModifierGroup, ModifierSelectionType
-from .location import Location
+from .location import Location, DEFAULT_LOCATION_ID
 from .stock import Stock
+from .stock_transfer import StockTransfer, StockTransferItem
+from .location_override import LocationOverride
 
 __all__ = [
     "Product",
@@ -32,5 +34,9 @@ __all__ = [
     "ProductModifierGroup",
     "ModifierSelectionType",
     "Location",
-    "Stock"
+    "DEFAULT_LOCATION_ID",
+    "Stock",
+    "StockTransfer",
+    "StockTransferItem",
+    "LocationOverride"
 ]
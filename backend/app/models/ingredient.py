@@ -1,7 +1,13 @@
 from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from ..db import Base
+from ..search import search_key
+
+
+def _default_search_name(context):
+    """search_name для вставки без ORM-объекта (массовый insert())"""
+    return search_key(context.get_current_parameters().get("name"))
 
 
 class Ingredient(Base):
@@ -20,6 +26,10 @@ class Ingredient(Base):
     # Основная информация
     name = Column(String, nullable=False, index=True)
 
+    # Название для поиска: нижний регистр + транслитерация (см. app/search.py).
+    # На PostgreSQL по нему есть триграммный GIN-индекс (миграция c4d8e2f61b07)
+    search_name = Column(String, nullable=True, index=True, default=_default_search_name)
+
     # DEPRECATED: будет удалено после миграции
     category = Column(String, nullable=True)  # Старое текстовое поле
 
@@ -53,6 +63,12 @@ class Ingredient(Base):
     def __repr__(self):
         return f"<Ingredient {self.name} ({self.unit})>"
 
+    @validates("name")
+    def _sync_search_name(self, key, value):
+        """search_name обновляется вместе с названием"""
+        self.search_name = search_key(value)
+        return value
+
     @property
     def is_piece_unit(self):
         """Проверка: штучный ли товар?"""
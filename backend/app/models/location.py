@@ -3,6 +3,9 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db import Base
 
+# Точка по умолчанию: касса без location_id продаёт и показывает меню этой точки
+DEFAULT_LOCATION_ID = 1
+
 
 class Location(Base):
     """
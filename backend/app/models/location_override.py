@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime, UniqueConstraint, CheckConstraint
+from sqlalchemy.orm import relationship, backref
+from sqlalchemy.sql import func
+from ..db import Base
+
+
+class LocationOverride(Base):
+    """
+    Цена и доступность товара или техкарты на конкретной точке
+
+    Product.price, Recipe.price и Product.is_available - значения по умолчанию
+    для всех точек, здесь - исключения:
+    - Bubble tea в ТРЦ Mega: 1200₸ вместо 1000₸
+    - Тапиока-латте на Абая: временно нет в продаже
+
+    None в price / is_available - берётся общее значение.
+    """
+    __tablename__ = "location_overrides"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Ровно одно из двух: товар или техкарта
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=True, index=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    price = Column(Float, nullable=True)  # Цена на точке (None - общая цена)
+    is_available = Column(Boolean, nullable=True)  # Доступность на точке (None - общая)
+
+    # Метаданные
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships (удаление точки/товара/техкарты удаляет и исключения)
+    location = relationship("Location", backref=backref("overrides", cascade="all, delete-orphan"))
+    product = relationship("Product", backref=backref("location_overrides", cascade="all, delete-orphan"))
+    recipe = relationship("Recipe", backref=backref("location_overrides", cascade="all, delete-orphan"))
+
+    __table_args__ = (
+        UniqueConstraint('location_id', 'product_id', name='uix_location_override_product'),
+        UniqueConstraint('location_id', 'recipe_id', name='uix_location_override_recipe'),
+        CheckConstraint('(product_id IS NULL) <> (recipe_id IS NULL)', name='ck_location_override_target'),
+    )
+
+    def __repr__(self):
+        target = f"product={self.product_id}" if self.product_id else f"recipe={self.recipe_id}"
+        return f"<LocationOverride location={self.location_id} {target} price={self.price}>"
@@ -57,7 +57,7 @@ class Modifier(Base):
 
     name = Column(String, nullable=False)  # "Тапиока черная"
     price = Column(Float, default=0.0)  # +200₸
-    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="SET NULL"), nullable=True)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="SET NULL"), nullable=True, index=True)
     quantity_per_use = Column(Float, default=0.0)  # Граммы для списания со склада
     display_order = Column(Integer, default=0)
     is_available = Column(Boolean, default=True)
@@ -81,7 +81,7 @@ class ProductModifierGroup(Base):
     __tablename__ = "product_modifier_groups"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
     modifier_group_id = Column(Integer, ForeignKey("modifier_groups.id", ondelete="CASCADE"), nullable=False)
     display_order = Column(Integer, default=0)
 
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enu
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db import Base
+from .location import DEFAULT_LOCATION_ID
 import enum
 
 
@@ -26,7 +27,7 @@ class Order(Base):
     order_number = Column(String, unique=True, index=True)  # Номер чека
 
     # MULTI-LOCATION: ID точки, на которой создан заказ
-    location_id = Column(Integer, ForeignKey("locations.id", ondelete="RESTRICT"), nullable=False, default=1, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="RESTRICT"), nullable=False, default=DEFAULT_LOCATION_ID, index=True)
 
     total_amount = Column(Float, nullable=False)  # Общая сумма
     payment_method = Column(Enum(PaymentMethod), nullable=False)
@@ -57,8 +58,8 @@ class OrderItem(Base):
     item_type = Column(Enum(ItemType), nullable=False, default=ItemType.PRODUCT)
 
     # Один из этих двух полей должен быть заполнен (в зависимости от item_type)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
-    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=True, index=True)
 
     # Варианты и модификаторы
     variant_id = Column(Integer, ForeignKey("product_variants.id", ondelete="SET NULL"), nullable=True)
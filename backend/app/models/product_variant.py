@@ -16,8 +16,8 @@ class ProductVariant(Base):
     __tablename__ = "product_variants"
 
     id = Column(Integer, primary_key=True, index=True)
-    base_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
-    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="RESTRICT"), nullable=False)
+    base_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="RESTRICT"), nullable=False, index=True)
 
     name = Column(String, nullable=False)  # "500мл (S)", "700мл (M)"
     size_code = Column(String, nullable=True)  # "S", "M", "L"
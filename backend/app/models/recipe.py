@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Foreig
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db import Base
+from .. import costing
 
 
 class Recipe(Base):
@@ -57,16 +58,12 @@ class Recipe(Base):
         Себестоимость техкарты
         = сумма стоимостей всех ингредиентов + сумма стоимостей всех полуфабрикатов
         """
-        ingredients_cost = sum(ing.cost for ing in self.ingredients)
-        semifinished_cost = sum(sf.cost for sf in self.semifinished_items)
-        return ingredients_cost + semifinished_cost
+        return costing.recipe_cost(self)
 
     @property
     def markup_percentage(self):
         """Наценка в процентах: (цена - себестоимость) / себестоимость * 100"""
-        if self.cost == 0:
-            return 0
-        return round(((self.price - self.cost) / self.cost) * 100, 2)
+        return costing.markup_percentage(self.price, self.cost)
 
     @property
     def profit(self):
@@ -86,7 +83,7 @@ class RecipeIngredient(Base):
 
     # Связи
     recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
-    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT"), nullable=False)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT"), nullable=False, index=True)
 
     # Количество (вес/объем/штуки)
     gross_weight = Column(Float, nullable=False)  # Брутто (до обработки)
@@ -118,16 +115,5 @@ class RecipeIngredient(Base):
         - Конвертируем: 25 / 1000 = 0.025 кг
         - Стоимость: 0.025 * 100 = 2.5₸
         """
-        if not self.ingredient:
-            return 0
-
-        # Вес всегда в граммах
-        weight_in_grams = self.net_weight
-
-        # Конвертируем граммы в кг/л для расчёта стоимости
-        quantity = weight_in_grams
-        if self.ingredient.unit == 'кг' or self.ingredient.unit == 'л':
-            quantity = weight_in_grams / 1000  # граммы → кг/л
-        # Для 'шт' - используем как есть (граммы = штуки в этом контексте)
-
-        return round(quantity * self.ingredient.purchase_price, 2)
+        # Для 'шт' - вес используется как есть (граммы = штуки в этом контексте)
+        return costing.ingredient_line_cost(self.ingredient, self.net_weight)
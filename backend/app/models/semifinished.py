@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Foreig
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db import Base
+from .. import costing
 
 
 class Semifinished(Base):
@@ -50,7 +51,7 @@ class Semifinished(Base):
         Себестоимость полуфабриката (сумма стоимостей всех ингредиентов)
         Рассчитывается автоматически из состава
         """
-        return sum(ing.cost for ing in self.ingredients)
+        return costing.semifinished_cost(self)
 
 
 class SemifinishedIngredient(Base):
@@ -65,7 +66,7 @@ class SemifinishedIngredient(Base):
 
     # Связи
     semifinished_id = Column(Integer, ForeignKey("semifinished.id", ondelete="CASCADE"), nullable=False)
-    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT"), nullable=False)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT"), nullable=False, index=True)
 
     # Количество (вес в граммах)
     weight = Column(Float, nullable=False)  # Вес в граммах
@@ -85,17 +86,7 @@ class SemifinishedIngredient(Base):
 
         Логика такая же как в RecipeIngredient
         """
-        if not self.ingredient:
-            return 0
-
-        weight_in_grams = self.weight
-
-        # Конвертируем граммы в кг/л для расчёта стоимости
-        quantity = weight_in_grams
-        if self.ingredient.unit == 'кг' or self.ingredient.unit == 'л':
-            quantity = weight_in_grams / 1000  # граммы → кг/л
-
-        return round(quantity * self.ingredient.purchase_price, 2)
+        return costing.ingredient_line_cost(self.ingredient, self.weight)
 
 
 class RecipeSemifinished(Base):
@@ -110,7 +101,7 @@ class RecipeSemifinished(Base):
 
     # Связи
     recipe_id = Column(Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False)
-    semifinished_id = Column(Integer, ForeignKey("semifinished.id", ondelete="RESTRICT"), nullable=False)
+    semifinished_id = Column(Integer, ForeignKey("semifinished.id", ondelete="RESTRICT"), nullable=False, index=True)
 
     # Количество (в единицах полуфабриката)
     quantity = Column(Float, nullable=False)  # Количество в граммах/мл
@@ -139,21 +130,6 @@ class RecipeSemifinished(Base):
         """
         if not self.semifinished:
             return 0
-
-        # Количество используемого полуфабриката в граммах
-        quantity_in_grams = self.quantity
-
-        # Себестоимость полуфабриката (за весь выход)
-        total_cost = self.semifinished.cost
-
-        # Выход полуфабриката
-        output_quantity = self.semifinished.output_quantity
-
-        if output_quantity == 0:
-            return 0
-
-        # Цена за грамм
-        cost_per_gram = total_cost / output_quantity
-
-        # Итоговая стоимость
-        return round(quantity_in_grams * cost_per_gram, 2)
+        return costing.semifinished_portion_cost(
+            self.semifinished.cost, self.semifinished.output_quantity, self.quantity
+        )
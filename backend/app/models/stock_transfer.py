@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..db import Base
+
+
+class StockTransfer(Base):
+    """
+    Документ перемещения остатков между точками
+
+    Пример: центральный цех -> Кофейня в ТРЦ Mega, 10 кг тапиоки и 20 л молока.
+    Списание на одной точке и приход на другой проводятся одной транзакцией.
+    Еженедельная развозка на все точки - несколько документов с общим batch_id.
+    """
+    __tablename__ = "stock_transfers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    number = Column(String, nullable=False, unique=True, index=True)  # "TR-20260119143000-1A2B"
+
+    from_location_id = Column(Integer, ForeignKey("locations.id", ondelete="RESTRICT"), nullable=False, index=True)
+    to_location_id = Column(Integer, ForeignKey("locations.id", ondelete="RESTRICT"), nullable=False, index=True)
+
+    batch_id = Column(String, nullable=True, index=True)  # Общий для документов одной развозки
+    comment = Column(Text, nullable=True)
+
+    # Метаданные
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    from_location = relationship("Location", foreign_keys=[from_location_id])
+    to_location = relationship("Location", foreign_keys=[to_location_id])
+    items = relationship("StockTransferItem", back_populates="transfer", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<StockTransfer {self.number} {self.from_location_id} -> {self.to_location_id}>"
+
+
+class StockTransferItem(Base):
+    """Строка перемещения: ингредиент и количество (в единицах ингредиента)"""
+    __tablename__ = "stock_transfer_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transfer_id = Column(Integer, ForeignKey("stock_transfers.id", ondelete="CASCADE"), nullable=False, index=True)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="RESTRICT"), nullable=False, index=True)
+    quantity = Column(Float, nullable=False)
+
+    # Relationships
+    transfer = relationship("StockTransfer", back_populates="items")
+    ingredient = relationship("Ingredient")
+
+    def __repr__(self):
+        return f"<StockTransferItem transfer={self.transfer_id} ingredient={self.ingredient_id} qty={self.quantity}>"
@@ -0,0 +1,159 @@
+"""
+Массовое изменение закупочных цен и пересчёт себестоимости
+
+Поставщик поднял цены - новые цены применяются одной транзакцией, а отчёт
+показывает, как изменились себестоимость и наценка каждой затронутой техкарты.
+
+Пересчитывается только затронутая часть графа ингредиент -> полуфабрикат ->
+техкарта: затронутые полуфабрикаты и техкарты находятся одним запросом по
+индексам внешних ключей, загружаются только они (с составом), себестоимость
+«до» и «после» считается в памяти CostCalculator'ом с подменой цен - до записи
+в БД, поэтому dry_run показывает то же самое, что получится после применения.
+"""
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, union, update
+from sqlalchemy.orm import Session, joinedload
+
+from .catalog import recipe_cost_options, semifinished_cost_options
+from .costing import CostCalculator, markup_percentage
+from .models import Ingredient, Recipe, RecipeIngredient, RecipeSemifinished, Semifinished, SemifinishedIngredient
+
+
+def _affected_ids(db: Session, ingredient_ids: List[int]):
+    """(id полуфабрикатов, id техкарт), в которые входят ингредиенты - напрямую или через полуфабрикат"""
+    semifinished = select(SemifinishedIngredient.semifinished_id).where(
+        SemifinishedIngredient.ingredient_id.in_(ingredient_ids)
+    )
+    semifinished_ids = set(db.scalars(semifinished.distinct()))
+    recipes = union(
+        select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(ingredient_ids)),
+        select(RecipeSemifinished.recipe_id).where(RecipeSemifinished.semifinished_id.in_(semifinished))
+    )
+    recipe_ids = set(db.scalars(select(recipes.subquery().c[0])))
+    return semifinished_ids, recipe_ids
+
+
+def _percent_change(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return round((new - old) / old * 100, 2)
+
+
+def apply_price_changes(db: Session, changes, dry_run: bool = False, min_markup: Optional[float] = None) -> dict:
+    """
+    Применить новые цены и вернуть отчёт «было / стало»
+
+    changes - список IngredientPriceChange (повторный ingredient_id - побеждает последний).
+    dry_run - ничего не записывать, только отчёт.
+    min_markup - техкарты с наценкой ниже (в %) отмечаются below_min_markup.
+    """
+    new_prices: Dict[int, float] = {}
+    for change in changes:
+        new_prices[change.ingredient_id] = change.purchase_price
+
+    ingredients = {
+        ingredient.id: ingredient
+        for ingredient in db.query(Ingredient).filter(Ingredient.id.in_(list(new_prices)))
+    }
+    for ingredient_id in new_prices:
+        if ingredient_id not in ingredients:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Ингредиент с ID {ingredient_id} не найден"
+            )
+
+    # Цены, которые действительно меняются
+    changed = {
+        ingredient_id: price for ingredient_id, price in new_prices.items()
+        if ingredients[ingredient_id].purchase_price != price
+    }
+
+    semifinished, recipes = [], []
+    if changed:
+        semifinished_ids, recipe_ids = _affected_ids(db, list(changed))
+        if recipe_ids:
+            recipes = db.query(Recipe).options(
+                joinedload(Recipe.category_rel),
+                *recipe_cost_options()
+            ).filter(Recipe.id.in_(recipe_ids)).all()
+        if semifinished_ids:
+            # Полуфабрикаты из загруженных техкарт уже в сессии - догружаются только неиспользуемые
+            semifinished = db.query(Semifinished).options(
+                semifinished_cost_options()
+            ).filter(Semifinished.id.in_(semifinished_ids)).order_by(Semifinished.name).all()
+
+    before = CostCalculator()
+    after = CostCalculator(prices=changed)
+
+    ingredients_report = [
+        {
+            "id": ingredient.id,
+            "name": ingredient.name,
+            "unit": ingredient.unit,
+            "old_price": ingredient.purchase_price,
+            "new_price": new_prices[ingredient.id],
+            "change_percent": _percent_change(ingredient.purchase_price, new_prices[ingredient.id])
+        }
+        for ingredient in sorted(ingredients.values(), key=lambda i: i.name)
+        if ingredient.id in changed
+    ]
+
+    semifinished_report = []
+    for sf in semifinished:
+        old_cost, new_cost = before.semifinished_cost(sf), after.semifinished_cost(sf)
+        semifinished_report.append({
+            "id": sf.id,
+            "name": sf.name,
+            "old_cost": round(old_cost, 2),
+            "new_cost": round(new_cost, 2),
+            "cost_delta": round(new_cost - old_cost, 2)
+        })
+
+    recipes_report = []
+    for recipe in recipes:
+        old_cost, new_cost = before.recipe_cost(recipe), after.recipe_cost(recipe)
+        old_markup = markup_percentage(recipe.price, old_cost)
+        new_markup = markup_percentage(recipe.price, new_cost)
+        recipes_report.append({
+            "id": recipe.id,
+            "name": recipe.name,
+            "category_name": recipe.category_rel.name if recipe.category_rel else None,
+            "price": recipe.price,
+            "old_cost": round(old_cost, 2),
+            "new_cost": round(new_cost, 2),
+            "cost_delta": round(new_cost - old_cost, 2),
+            "old_markup": old_markup,
+            "new_markup": new_markup,
+            "markup_delta": round(new_markup - old_markup, 2),
+            "old_profit": round(recipe.price - old_cost, 2),
+            "new_profit": round(recipe.price - new_cost, 2),
+            "below_min_markup": min_markup is not None and new_markup < min_markup
+        })
+    # Сначала техкарты, у которых наценка упала сильнее всего
+    recipes_report.sort(key=lambda entry: (entry["markup_delta"], entry["name"]))
+
+    if changed and not dry_run:
+        db.execute(update(Ingredient), [
+            {"id": ingredient_id, "purchase_price": price} for ingredient_id, price in changed.items()
+        ])
+        db.commit()
+        print(
+            f"💰 Цены обновлены: {len(changed)} ингредиентов, "
+            f"затронуто {len(semifinished_report)} полуфабрикатов и {len(recipes_report)} техкарт"
+        )
+
+    return {
+        "dry_run": dry_run,
+        "changed": len(changed),
+        "unchanged": len(new_prices) - len(changed),
+        "ingredients": ingredients_report,
+        "semifinished": semifinished_report,
+        "recipes": recipes_report,
+        "summary": {
+            "recipes_affected": len(recipes_report),
+            "recipes_below_min_markup": sum(1 for entry in recipes_report if entry["below_min_markup"]),
+            "recipes_unprofitable": sum(1 for entry in recipes_report if entry["new_profit"] < 0)
+        }
+    }
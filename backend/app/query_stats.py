@@ -0,0 +1,209 @@
+"""
+Учёт SQL-запросов на каждый HTTP-запрос
+
+- SQLAlchemy event hooks считают количество запросов, суммарное время в БД
+  и самый медленный запрос в рамках текущего HTTP-запроса (через contextvar)
+- middleware отдаёт эти цифры в заголовке Server-Timing и копит агрегаты по роутам
+- assert_max_queries() - помощник для проверки бюджета запросов (N+1 регрессии)
+- те же цифры попадают в реестр метрик (app.metrics) для экспорта в Prometheus
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import HTTP_DB_QUERIES, HTTP_REQUEST_SECONDS, HistogramValue
+
+# Границы бакетов гистограмм
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+DURATION_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Сколько символов SQL хранить для самого медленного запроса
+STATEMENT_PREVIEW_LENGTH = 300
+
+
+class QueryStats:
+    """Статистика SQL-запросов в рамках одного HTTP-запроса (или блока кода)"""
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Счётчики, которые видят запросы из всех потоков (для assert_max_queries в тестах,
+# где TestClient выполняет приложение в отдельном потоке)
+_global_stats: List[QueryStats] = []
+_global_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _global_stats:
+        with _global_lock:
+            for global_stats in _global_stats:
+                global_stats.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    """Запрос упал - after_cursor_execute не будет, снимаем его время со стека соединения"""
+    connection = context.connection
+    if connection is None or context.statement is None:
+        return
+    started = connection.info.get("query_start_time")
+    if started:
+        started.pop()
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False):
+    """Считать SQL-запросы внутри блока: with track_queries() as stats: ..."""
+    stats = QueryStats(keep_statements=keep_statements)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Проверка бюджета запросов (например, против N+1):
+
+        with assert_max_queries(5):
+            client.get("/api/pos/items")
+
+    Считает все запросы процесса за время блока, в том числе из других потоков.
+    """
+    stats = QueryStats(keep_statements=True)
+    with _global_lock:
+        _global_stats.append(stats)
+    try:
+        yield stats
+    finally:
+        with _global_lock:
+            _global_stats.remove(stats)
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {sql[:STATEMENT_PREVIEW_LENGTH]}" for i, sql in enumerate(stats.statements))
+        raise AssertionError(f"Выполнено {stats.count} SQL-запросов, бюджет {limit}:\n{listing}")
+
+
+class _RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = HistogramValue(QUERY_COUNT_BUCKETS)
+        self.db_ms = HistogramValue(DURATION_MS_BUCKETS)
+        self.duration_ms = HistogramValue(DURATION_MS_BUCKETS)
+        self.slowest_query_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+
+
+_routes: Dict[str, _RouteStats] = {}
+_routes_lock = threading.Lock()
+
+
+def _record_request(route: str, stats: QueryStats, duration_ms: float):
+    with _routes_lock:
+        route_stats = _routes.get(route)
+        if route_stats is None:
+            route_stats = _routes[route] = _RouteStats()
+        route_stats.requests += 1
+        route_stats.queries.observe(stats.count)
+        route_stats.db_ms.observe(stats.total_time * 1000)
+        route_stats.duration_ms.observe(duration_ms)
+        if stats.slowest_time * 1000 >= route_stats.slowest_query_ms and stats.slowest_statement:
+            route_stats.slowest_query_ms = stats.slowest_time * 1000
+            route_stats.slowest_statement = stats.slowest_statement[:STATEMENT_PREVIEW_LENGTH]
+
+
+def get_route_metrics() -> Dict[str, dict]:
+    """Агрегированные метрики по роутам: {"GET /api/pos/items": {...}}"""
+    with _routes_lock:
+        return {
+            route: {
+                "requests": s.requests,
+                "queries": s.queries.as_dict(),
+                "db_ms": s.db_ms.as_dict(),
+                "duration_ms": s.duration_ms.as_dict(),
+                "slowest_query_ms": round(s.slowest_query_ms, 2),
+                "slowest_statement": s.slowest_statement
+            }
+            for route, s in sorted(_routes.items())
+        }
+
+
+def reset_route_metrics():
+    """Сбросить накопленные агрегаты"""
+    with _routes_lock:
+        _routes.clear()
+
+
+def _route_template(request: Request) -> str:
+    """
+    Шаблон роута (/api/orders/{order_id}), чтобы не плодить ключи на каждый ID
+
+    Берётся из сработавшего роута (scope["route"].path). Новые версии FastAPI
+    кладут туда роут роутера без префикса include_router (/orders/{order_id}) -
+    префикс добирается из начальных сегментов URL.
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if route is None:
+        return "<unmatched>"
+    if not template:
+        return request.url.path
+    segments = request.url.path.split("/")
+    prefix_length = len(segments) - len(template.split("/"))
+    if prefix_length <= 0 or ":path}" in template:
+        return template
+    return "/".join(segments[:prefix_length + 1]) + template
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """HTTP middleware: считает запросы в БД и добавляет заголовок Server-Timing"""
+    started = time.perf_counter()
+    with track_queries() as stats:
+        response = await call_next(request)
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    route = _route_template(request)
+    _record_request(f"{request.method} {route}", stats, duration_ms)
+    HTTP_REQUEST_SECONDS.labels(method=request.method, route=route).observe(duration_ms / 1000)
+    HTTP_DB_QUERIES.labels(method=request.method, route=route).observe(stats.count)
+
+    response.headers["Server-Timing"] = (
+        f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries", '
+        f"db-slowest;dur={stats.slowest_time * 1000:.2f}, "
+        f"app;dur={duration_ms:.2f}"
+    )
+    return response
@@ -0,0 +1,59 @@
+"""
+Массовое изменение порядка отображения (drag-and-drop в админке)
+
+Новый display_order всех строк применяется одним UPDATE ... WHERE id = :id
+(executemany), существование id проверяется одним запросом. Изменение идёт
+через ORM, поэтому catalog_cache сбрасывается один раз - при коммите.
+"""
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+def _parse_order(order: List[dict]) -> Dict[int, int]:
+    """[{"id": 1, "display_order": 0}, ...] -> {id: display_order} (повторный id - побеждает последний)"""
+    result: Dict[int, int] = {}
+    for item in order:
+        item_id = item.get("id")
+        display_order = item.get("display_order")
+        if item_id is None or display_order is None:
+            continue
+        try:
+            result[int(item_id)] = int(display_order)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Некорректный элемент порядка: {item}"
+            )
+    return result
+
+
+def apply_display_order(db: Session, model, order: List[dict]) -> dict:
+    """
+    Обновить display_order у строк model
+
+    Неизвестные id пропускаются (строку могли удалить, пока админ
+    перетаскивал список) и возвращаются в not_found.
+    """
+    wanted = _parse_order(order)
+    if not wanted:
+        return {"status": "ok", "updated": 0, "not_found": []}
+
+    existing = {row.id for row in db.query(model.id).filter(model.id.in_(list(wanted)))}
+    rows = [
+        {"id": item_id, "display_order": display_order}
+        for item_id, display_order in wanted.items()
+        if item_id in existing
+    ]
+    if rows:
+        # UPDATE по первичному ключу пачкой: один executemany на все строки
+        db.execute(update(model), rows)
+    db.commit()
+
+    return {
+        "status": "ok",
+        "updated": len(rows),
+        "not_found": sorted(item_id for item_id in wanted if item_id not in existing)
+    }
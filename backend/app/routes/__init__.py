@@ -11,6 +11,11 @@ from .modifiers import router as modifiers_router
 from .locations import router as locations_router
 from .stock import router as stock_router
 from .websocket import router as websocket_router
+from .metrics import router as metrics_router
+from .printing import router as printing_router
+from .usage import router as usage_router
+from .forecast import router as forecast_router
+from .stock_transfers import router as stock_transfers_router
 
 __all__ = [
     "products_router",
@@ -25,5 +30,10 @@ __all__ = [
     "modifiers_router",
     "locations_router",
     "stock_router",
-    "websocket_router"
+    "websocket_router",
+    "metrics_router",
+    "printing_router",
+    "usage_router",
+    "forecast_router",
+    "stock_transfers_router"
 ]
@@ -4,6 +4,8 @@ from typing import List, Optional
 from ..db import get_db
 from ..models import Category
 from ..schemas import CategoryCreate, CategoryUpdate, CategoryResponse
+from ..reorder import apply_display_order
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -114,19 +116,7 @@ def reorder_categories(order: List[dict], db: Session = Depends(get_db)):
 
     Body: [{"id": 1, "display_order": 0}, {"id": 3, "display_order": 1}, ...]
     """
-    for item in order:
-        category_id = item.get("id")
-        display_order = item.get("display_order")
-
-        if category_id is None or display_order is None:
-            continue
-
-        category = db.query(Category).filter(Category.id == category_id).first()
-        if category:
-            category.display_order = display_order
-
-    db.commit()
-    return {"status": "ok", "updated": len(order)}
+    return apply_display_order(db, Category, order)
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_200_OK)
@@ -144,17 +134,7 @@ def delete_category(category_id: int, db: Session = Depends(get_db)):
         )
 
     # Проверить что нет связанных товаров/техкарт
-    if category.products:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot delete category. {len(category.products)} products are using it"
-        )
-
-    if category.recipes:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot delete category. {len(category.recipes)} recipes are using it"
-        )
+    ensure_can_delete(db, "category", category_id)
 
     db.delete(category)
     db.commit()
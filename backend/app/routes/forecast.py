@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..db import get_read_db
+from ..forecast import FORECAST_COVER_DAYS, FORECAST_LEAD_TIME_DAYS, get_forecast, run_forecast
+
+router = APIRouter(prefix="/forecast", tags=["forecast"])
+
+
+@router.get("")
+def get_stock_forecast(
+    location_id: Optional[int] = None,
+    only_reorder: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Прогноз расхода и рекомендации к заказу (результат последнего пересчёта)
+
+    Параметры:
+    - location_id: только одна точка
+    - only_reorder: только то, что нужно заказать (suggested_order > 0)
+
+    Если прогноз ещё не считали - считается сейчас.
+    """
+    result = get_forecast()
+    if result is None:
+        result = run_forecast(db)
+    return _filter_items(result, location_id, only_reorder)
+
+
+def _filter_items(result: dict, location_id: Optional[int], only_reorder: bool) -> dict:
+    items = result["items"]
+    if location_id is not None:
+        items = [item for item in items if item["location_id"] == location_id]
+    if only_reorder:
+        items = [item for item in items if item["suggested_order"] > 0]
+    return {**result, "items": items}
+
+
+@router.post("/run")
+def rerun_stock_forecast(
+    lead_time_days: float = Query(FORECAST_LEAD_TIME_DAYS, ge=0),
+    cover_days: float = Query(FORECAST_COVER_DAYS, ge=0),
+    location_id: Optional[int] = None,
+    only_reorder: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Пересчитать прогноз сейчас (например, после приёмки или с другим сроком поставки)
+
+    С параметрами по умолчанию результат сохраняется для GET /forecast и
+    возвращается сводка. С другим lead_time_days/cover_days расчёт
+    возвращается целиком (location_id, only_reorder - как в GET) и не
+    подменяет общий прогноз, который видят остальные.
+    """
+    if lead_time_days != FORECAST_LEAD_TIME_DAYS or cover_days != FORECAST_COVER_DAYS:
+        result = run_forecast(db, lead_time_days=lead_time_days, cover_days=cover_days, store=False)
+        return _filter_items(result, location_id, only_reorder)
+
+    result = run_forecast(db)
+    return {
+        "computed_at": result["computed_at"],
+        "duration_ms": result["duration_ms"],
+        "items": len(result["items"]),
+        "to_reorder": sum(1 for item in result["items"] if item["suggested_order"] > 0)
+    }
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, exists, func, literal, or_, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..db import get_db
-from ..models import Ingredient
+from .. import catalog_cache
+from ..ingredient_import import PARSERS, ImportFormatError, detect_format, import_ingredients
+from ..models import Ingredient, Stock
 from ..schemas import (
     IngredientCreate,
     IngredientUpdate,
     IngredientResponse,
-    IngredientStockUpdate
+    IngredientStockUpdate,
+    IngredientPriceBulkUpdate
 )
+from ..price_update import apply_price_changes
+from ..search import escape_like, normalize, transliterate
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
@@ -17,8 +27,10 @@ router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 def get_ingredients(
     skip: int = 0,
     limit: int = 100,
+    category_id: Optional[int] = None,
     category: str = None,
     low_stock: bool = None,
+    location_id: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """
@@ -27,23 +39,116 @@ def get_ingredients(
     Параметры:
     - skip: сколько пропустить (для пагинации)
     - limit: максимальное количество
-    - category: фильтр по категории
-    - low_stock: показать только с низким остатком
+    - category_id: фильтр по категории
+    - category: DEPRECATED - фильтр по старому текстовому полю категории
+    - low_stock: показать только с низким остатком (по таблице остатков Stock)
+    - location_id: точка для low_stock (по умолчанию - любая точка)
     """
     query = db.query(Ingredient)
 
     # Фильтр по категории
+    if category_id is not None:
+        query = query.filter(Ingredient.category_id == category_id)
     if category:
         query = query.filter(Ingredient.category == category)
 
-    # Фильтр по низкому остатку
+    # Фильтр по низкому остатку: остатки ведутся в Stock (Ingredient.stock_quantity устарел)
     if low_stock is True:
-        query = query.filter(Ingredient.stock_quantity <= Ingredient.min_stock)
+        low = exists().where(Stock.ingredient_id == Ingredient.id, Stock.quantity <= Stock.min_stock)
+        if location_id is not None:
+            low = low.where(Stock.location_id == location_id)
+        query = query.filter(low)
 
-    ingredients = query.offset(skip).limit(limit).all()
+    ingredients = query.order_by(Ingredient.id).offset(skip).limit(limit).all()
     return ingredients
 
 
+def _encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        rank, search_name, ingredient_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(rank), str(search_name), int(ingredient_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный cursor")
+
+
+@router.get("/search")
+def search_ingredients(
+    q: str = "",
+    category_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Поиск ингредиентов по названию (для пикеров в админке)
+
+    - q: часть названия; «мол», «molo» и «MOLOKO» находят «Молоко»,
+      «латте» находит «Latte»; совпадения с начала слова - первыми
+    - category_id: только из категории
+    - limit: сколько вернуть (до 100)
+    - cursor: next_cursor из предыдущего ответа (keyset-пагинация)
+
+    Ответ: {"items": [...], "next_cursor": "..." или null}
+    """
+    query = db.query(
+        Ingredient.id,
+        Ingredient.name,
+        Ingredient.unit,
+        Ingredient.purchase_price,
+        Ingredient.category_id,
+        Ingredient.category,
+        Ingredient.search_name
+    )
+    if category_id is not None:
+        query = query.filter(Ingredient.category_id == category_id)
+
+    needle = normalize(q)
+    if needle:
+        variants = {needle, transliterate(needle)}
+        # Подстрока в любом месте (по триграммному индексу на PostgreSQL)
+        query = query.filter(or_(*(
+            Ingredient.search_name.like(f"%{escape_like(v)}%", escape="\\") for v in variants
+        )))
+        # 0 - с начала названия, 1 - с начала слова, 2 - в середине
+        rank = case(
+            (or_(*(Ingredient.search_name.like(f"{escape_like(v)}%", escape="\\") for v in variants)), 0),
+            (or_(*(Ingredient.search_name.like(f"% {escape_like(v)}%", escape="\\") for v in variants)), 1),
+            else_=2
+        )
+    else:
+        rank = literal(0)
+
+    sort_name = func.coalesce(Ingredient.search_name, "")
+    if cursor:
+        after = _decode_cursor(cursor)
+        query = query.filter(tuple_(rank, sort_name, Ingredient.id) > tuple_(*after))
+
+    rows = query.add_columns(rank.label("rank")).order_by(
+        rank, sort_name, Ingredient.id
+    ).limit(limit + 1).all()
+
+    items = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "unit": row.unit,
+            "purchase_price": row.purchase_price,
+            "category_id": row.category_id,
+            "category": row.category
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor([last.rank, last.search_name or "", last.id])
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.get("/{ingredient_id}", response_model=IngredientResponse)
 def get_ingredient(ingredient_id: int, db: Session = Depends(get_db)):
     """Получить ингредиент по ID"""
@@ -75,6 +180,53 @@ def create_ingredient(ingredient_data: IngredientCreate, db: Session = Depends(g
     return ingredient
 
 
+@router.post("/bulk")
+async def bulk_import_ingredients(
+    request: Request,
+    on_conflict: str = "skip",
+    format: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Массовый импорт ингредиентов одним запросом
+
+    Тело - JSON-массив, CSV (Content-Type: text/csv) или XLSX-файл
+    (Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet),
+    например: curl --data-binary @price.xlsx -H "Content-Type: ..." .../api/ingredients/bulk
+
+    Параметры:
+    - on_conflict: skip - существующие по названию пропускаются,
+      update - обновляются категория, единица, цена и упаковка
+    - format: json/csv/xlsx, если Content-Type не подходит
+
+    Ответ: счётчики и статус каждой строки (created/updated/skipped/error)
+    """
+    body = await request.body()
+    try:
+        parser = PARSERS[detect_format(request.headers.get("content-type"), format)]
+        # Разбор файла и запись в БД - синхронные, выносим из event loop
+        rows = await run_in_threadpool(parser, body)
+        return await run_in_threadpool(import_ingredients, db, rows, on_conflict)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/prices")
+def bulk_update_prices(data: IngredientPriceBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Массовое изменение закупочных цен (новый прайс поставщика)
+
+    Все цены применяются одной транзакцией. Ответ - отчёт по затронутым
+    полуфабрикатам и техкартам: себестоимость и наценка до и после, техкарты
+    с наибольшим падением наценки - первыми.
+
+    Body: {"items": [{"ingredient_id": 1, "purchase_price": 350}], "dry_run": false, "min_markup": 100}
+    - dry_run: только посчитать, цены не менять
+    - min_markup: отметить техкарты с наценкой ниже (%)
+    """
+    return apply_price_changes(db, data.items, dry_run=data.dry_run, min_markup=data.min_markup)
+
+
 @router.put("/{ingredient_id}", response_model=IngredientResponse)
 def update_ingredient(
     ingredient_id: int,
@@ -145,8 +297,8 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)):
             detail=f"Ингредиент с ID {ingredient_id} не найден"
         )
 
-    # TODO: Проверить что ингредиент не используется в техкартах
-    # Пока просто удаляем
+    # Ингредиент из техкарт, полуфабрикатов и модификаций удалять нельзя
+    ensure_can_delete(db, "ingredient", ingredient_id)
 
     db.delete(ingredient)
     db.commit()
@@ -155,6 +307,9 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)):
 
 @router.get("/categories/list", response_model=List[str])
 def get_categories(db: Session = Depends(get_db)):
-    """Получить список всех категорий ингредиентов"""
-    categories = db.query(Ingredient.category).distinct().filter(Ingredient.category.isnot(None)).all()
-    return [cat[0] for cat in categories if cat[0]]
+    """Получить список всех категорий ингредиентов (DISTINCT кэшируется до изменения каталога)"""
+    def build():
+        categories = db.query(Ingredient.category).distinct().filter(Ingredient.category.isnot(None)).all()
+        return [cat[0] for cat in categories if cat[0]]
+
+    return catalog_cache.get_or_build("ingredient_categories", build)
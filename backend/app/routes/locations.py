@@ -2,8 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from ..db import get_db
-from ..models import Location
-from ..schemas import LocationCreate, LocationUpdate, LocationResponse
+from ..models import Location, LocationOverride, Product, Recipe
+from ..schemas import (
+    LocationCreate,
+    LocationUpdate,
+    LocationResponse,
+    LocationOverridesUpdate,
+    LocationOverrideResponse
+)
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
@@ -109,14 +116,111 @@ def delete_location(location_id: int, db: Session = Depends(get_db)):
             detail=f"Location with id {location_id} not found"
         )
 
-    # Проверить что есть ли заказы для этой точки
-    if location.orders:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot delete location. {len(location.orders)} orders are linked to it. "
-                   f"Deactivate it instead."
-        )
+    # Проверить что нет заказов для этой точки (EXISTS, заказы не загружаются)
+    ensure_can_delete(db, "location", location_id, hint="Деактивируйте точку вместо удаления")
 
     db.delete(location)
     db.commit()
     return {"status": "deleted", "id": location_id}
+
+
+def _get_location_or_404(db: Session, location_id: int):
+    if db.query(Location.id).filter(Location.id == location_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Location with id {location_id} not found"
+        )
+
+
+def _list_overrides(db: Session, location_id: int) -> List[dict]:
+    """Исключения точки с названиями и общими ценами - один запрос"""
+    rows = db.query(
+        LocationOverride,
+        Product.name.label("product_name"),
+        Product.price.label("product_price"),
+        Recipe.name.label("recipe_name"),
+        Recipe.price.label("recipe_price")
+    ).outerjoin(Product, LocationOverride.product_id == Product.id).outerjoin(
+        Recipe, LocationOverride.recipe_id == Recipe.id
+    ).filter(LocationOverride.location_id == location_id).order_by(LocationOverride.id).all()
+    return [
+        {
+            "id": row.LocationOverride.id,
+            "location_id": row.LocationOverride.location_id,
+            "product_id": row.LocationOverride.product_id,
+            "recipe_id": row.LocationOverride.recipe_id,
+            "name": row.product_name if row.LocationOverride.product_id else row.recipe_name,
+            "base_price": row.product_price if row.LocationOverride.product_id else row.recipe_price,
+            "price": row.LocationOverride.price,
+            "is_available": row.LocationOverride.is_available
+        }
+        for row in rows
+    ]
+
+
+@router.get("/{location_id}/overrides", response_model=List[LocationOverrideResponse])
+def get_location_overrides(location_id: int, db: Session = Depends(get_db)):
+    """Цены и доступность товаров/техкарт, которые на точке отличаются от общих"""
+    _get_location_or_404(db, location_id)
+    return _list_overrides(db, location_id)
+
+
+@router.put("/{location_id}/overrides", response_model=List[LocationOverrideResponse])
+def update_location_overrides(
+    location_id: int,
+    overrides: LocationOverridesUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Задать цены и доступность на точке (одним запросом для многих позиций)
+
+    Пример: {"items": [{"product_id": 1, "price": 1200},
+                       {"recipe_id": 5, "is_available": false},
+                       {"product_id": 2, "price": null, "is_available": null}]}
+    Последняя строка удаляет исключение. Меню точки в кэше сбрасывается при коммите.
+    """
+    _get_location_or_404(db, location_id)
+
+    product_ids = {item.product_id for item in overrides.items if item.product_id is not None}
+    recipe_ids = {item.recipe_id for item in overrides.items if item.recipe_id is not None}
+    for model, ids, label in ((Product, product_ids, "Product"), (Recipe, recipe_ids, "Recipe")):
+        if not ids:
+            continue
+        found = {row.id for row in db.query(model.id).filter(model.id.in_(ids))}
+        missing = sorted(ids - found)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{label} with id {', '.join(map(str, missing))} not found"
+            )
+
+    existing = {}
+    for override in db.query(LocationOverride).filter(
+        LocationOverride.location_id == location_id,
+        (LocationOverride.product_id.in_(product_ids)) | (LocationOverride.recipe_id.in_(recipe_ids))
+    ):
+        key = ("product", override.product_id) if override.product_id is not None else ("recipe", override.recipe_id)
+        existing[key] = override
+
+    for item in overrides.items:
+        key = ("product", item.product_id) if item.product_id is not None else ("recipe", item.recipe_id)
+        override = existing.get(key)
+        if item.price is None and item.is_available is None:
+            if override is not None:
+                db.delete(override)
+                existing.pop(key)
+            continue
+        if override is None:
+            override = LocationOverride(
+                location_id=location_id,
+                product_id=item.product_id,
+                recipe_id=item.recipe_id
+            )
+            db.add(override)
+            existing[key] = override
+        override.price = item.price
+        override.is_available = item.is_available
+
+    db.commit()
+    return _list_overrides(db, location_id)
+
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..metrics import REGISTRY
+from ..query_stats import get_route_metrics, reset_route_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+def get_metrics():
+    """
+    Метрики по роутам: количество SQL-запросов, время в БД и общее время ответа
+
+    Гистограммы с фиксированными бакетами (ключ - верхняя граница бакета)
+    """
+    return {"routes": get_route_metrics()}
+
+
+@router.get("/prometheus", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """
+    Все метрики процесса в текстовом формате Prometheus
+
+    Заказы, время оформления, WebSocket подключения и рассылки,
+    корректировки остатков, время ответа и SQL-запросы по роутам
+    """
+    return PlainTextResponse(
+        REGISTRY.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.delete("")
+def reset_metrics():
+    """Сбросить накопленные метрики (например, перед нагрузочным тестом)"""
+    reset_route_metrics()
+    REGISTRY.reset()
+    return {"status": "reset"}
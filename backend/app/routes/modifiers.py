@@ -1,7 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List
 from ..db import get_db
+from ..catalog import (
+    modifier_to_dict,
+    modifier_group_to_dict,
+    get_modifier_groups as get_cached_modifier_groups,
+    get_product_modifier_groups as get_cached_product_modifier_groups
+)
 from ..models import (
     ModifierGroup,
     Modifier,
@@ -30,53 +36,8 @@ def get_modifier_groups(
     active_only: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Получить все группы модификаций"""
-    query = db.query(ModifierGroup).options(joinedload(ModifierGroup.modifiers))
-
-    if active_only:
-        query = query.filter(ModifierGroup.is_active == True)
-
-    groups = query.order_by(ModifierGroup.display_order, ModifierGroup.name).all()
-
-    # Обогащаем данными об ингредиентах в модификаторах
-    result = []
-    for group in groups:
-        modifiers_data = []
-        for modifier in sorted(group.modifiers, key=lambda m: (m.display_order, m.name)):
-            ingredient = db.query(Ingredient).filter(
-                Ingredient.id == modifier.ingredient_id
-            ).first() if modifier.ingredient_id else None
-
-            modifiers_data.append({
-                "id": modifier.id,
-                "group_id": modifier.group_id,
-                "name": modifier.name,
-                "price": modifier.price,
-                "ingredient_id": modifier.ingredient_id,
-                "ingredient_name": ingredient.name if ingredient else None,
-                "quantity_per_use": modifier.quantity_per_use,
-                "display_order": modifier.display_order,
-                "is_available": modifier.is_available,
-                "created_at": modifier.created_at,
-                "updated_at": modifier.updated_at
-            })
-
-        group_dict = {
-            "id": group.id,
-            "name": group.name,
-            "selection_type": group.selection_type,
-            "min_selections": group.min_selections,
-            "max_selections": group.max_selections,
-            "is_required": group.is_required,
-            "display_order": group.display_order,
-            "is_active": group.is_active,
-            "modifiers": modifiers_data,
-            "created_at": group.created_at,
-            "updated_at": group.updated_at
-        }
-        result.append(group_dict)
-
-    return result
+    """Получить все группы модификаций (из кэша каталога)"""
+    return get_cached_modifier_groups(db, active_only)
 
 
 @router.post("/modifier-groups", response_model=ModifierGroupResponse, status_code=status.HTTP_201_CREATED)
@@ -98,61 +59,33 @@ def create_modifier_group(
     db.add(group)
     db.flush()
 
+    # Проверяем ингредиенты модификаций одним запросом
+    ingredient_ids = {m.ingredient_id for m in group_data.modifiers if m.ingredient_id}
+    if ingredient_ids:
+        found_ids = {
+            row.id for row in db.query(Ingredient.id).filter(Ingredient.id.in_(ingredient_ids)).all()
+        }
+        missing = sorted(ingredient_ids - found_ids)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Ингредиент с ID {missing[0]} не найден"
+            )
+
     # Создаём модификации в группе
-    modifiers_data = []
     for modifier_data in group_data.modifiers:
-        # Проверяем ингредиент если указан
-        if modifier_data.ingredient_id:
-            ingredient = db.query(Ingredient).filter(
-                Ingredient.id == modifier_data.ingredient_id
-            ).first()
-            if not ingredient:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Ингредиент с ID {modifier_data.ingredient_id} не найден"
-                )
-
         modifier = Modifier(
             group_id=group.id,
             **modifier_data.model_dump()
         )
         db.add(modifier)
-        db.flush()
-
-        ingredient = db.query(Ingredient).filter(
-            Ingredient.id == modifier.ingredient_id
-        ).first() if modifier.ingredient_id else None
-
-        modifiers_data.append({
-            "id": modifier.id,
-            "group_id": modifier.group_id,
-            "name": modifier.name,
-            "price": modifier.price,
-            "ingredient_id": modifier.ingredient_id,
-            "ingredient_name": ingredient.name if ingredient else None,
-            "quantity_per_use": modifier.quantity_per_use,
-            "display_order": modifier.display_order,
-            "is_available": modifier.is_available,
-            "created_at": modifier.created_at,
-            "updated_at": modifier.updated_at
-        })
 
     db.commit()
-    db.refresh(group)
-
-    return {
-        "id": group.id,
-        "name": group.name,
-        "selection_type": group.selection_type,
-        "min_selections": group.min_selections,
-        "max_selections": group.max_selections,
-        "is_required": group.is_required,
-        "display_order": group.display_order,
-        "is_active": group.is_active,
-        "modifiers": modifiers_data,
-        "created_at": group.created_at,
-        "updated_at": group.updated_at
-    }
+
+    group = db.query(ModifierGroup).options(
+        selectinload(ModifierGroup.modifiers).joinedload(Modifier.ingredient)
+    ).filter(ModifierGroup.id == group.id).first()
+    return modifier_group_to_dict(group)
 
 
 @router.put("/modifier-groups/{group_id}", response_model=ModifierGroupResponse)
@@ -175,46 +108,11 @@ def update_modifier_group(
         setattr(group, field, value)
 
     db.commit()
-    db.refresh(group)
-
-    # Загружаем модификации
-    modifiers = db.query(Modifier).filter(Modifier.group_id == group_id).order_by(
-        Modifier.display_order, Modifier.name
-    ).all()
 
-    modifiers_data = []
-    for modifier in modifiers:
-        ingredient = db.query(Ingredient).filter(
-            Ingredient.id == modifier.ingredient_id
-        ).first() if modifier.ingredient_id else None
-
-        modifiers_data.append({
-            "id": modifier.id,
-            "group_id": modifier.group_id,
-            "name": modifier.name,
-            "price": modifier.price,
-            "ingredient_id": modifier.ingredient_id,
-            "ingredient_name": ingredient.name if ingredient else None,
-            "quantity_per_use": modifier.quantity_per_use,
-            "display_order": modifier.display_order,
-            "is_available": modifier.is_available,
-            "created_at": modifier.created_at,
-            "updated_at": modifier.updated_at
-        })
-
-    return {
-        "id": group.id,
-        "name": group.name,
-        "selection_type": group.selection_type,
-        "min_selections": group.min_selections,
-        "max_selections": group.max_selections,
-        "is_required": group.is_required,
-        "display_order": group.display_order,
-        "is_active": group.is_active,
-        "modifiers": modifiers_data,
-        "created_at": group.created_at,
-        "updated_at": group.updated_at
-    }
+    group = db.query(ModifierGroup).options(
+        selectinload(ModifierGroup.modifiers).joinedload(Modifier.ingredient)
+    ).filter(ModifierGroup.id == group_id).first()
+    return modifier_group_to_dict(group)
 
 
 @router.delete("/modifier-groups/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -269,19 +167,7 @@ def create_modifier(
     db.commit()
     db.refresh(modifier)
 
-    return {
-        "id": modifier.id,
-        "group_id": modifier.group_id,
-        "name": modifier.name,
-        "price": modifier.price,
-        "ingredient_id": modifier.ingredient_id,
-        "ingredient_name": ingredient.name if ingredient else None,
-        "quantity_per_use": modifier.quantity_per_use,
-        "display_order": modifier.display_order,
-        "is_available": modifier.is_available,
-        "created_at": modifier.created_at,
-        "updated_at": modifier.updated_at
-    }
+    return modifier_to_dict(modifier)
 
 
 @router.put("/modifier-groups/{group_id}/modifiers/{modifier_id}", response_model=ModifierResponse)
@@ -322,23 +208,7 @@ def update_modifier(
     db.commit()
     db.refresh(modifier)
 
-    ingredient = db.query(Ingredient).filter(
-        Ingredient.id == modifier.ingredient_id
-    ).first() if modifier.ingredient_id else None
-
-    return {
-        "id": modifier.id,
-        "group_id": modifier.group_id,
-        "name": modifier.name,
-        "price": modifier.price,
-        "ingredient_id": modifier.ingredient_id,
-        "ingredient_name": ingredient.name if ingredient else None,
-        "quantity_per_use": modifier.quantity_per_use,
-        "display_order": modifier.display_order,
-        "is_available": modifier.is_available,
-        "created_at": modifier.created_at,
-        "updated_at": modifier.updated_at
-    }
+    return modifier_to_dict(modifier)
 
 
 @router.delete("/modifier-groups/{group_id}/modifiers/{modifier_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -368,66 +238,14 @@ def delete_modifier(
 
 @router.get("/products/{product_id}/modifiers", response_model=List[ModifierGroupResponse])
 def get_product_modifiers(product_id: int, db: Session = Depends(get_db)):
-    """Получить доступные модификаторы для товара"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    """Получить доступные модификаторы для товара (из кэша каталога)"""
+    groups = get_cached_product_modifier_groups(db, product_id)
+    if groups is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Товар с ID {product_id} не найден"
         )
-
-    # Получаем связанные группы модификаторов
-    links = db.query(ProductModifierGroup).filter(
-        ProductModifierGroup.product_id == product_id
-    ).order_by(ProductModifierGroup.display_order).all()
-
-    result = []
-    for link in links:
-        group = db.query(ModifierGroup).options(
-            joinedload(ModifierGroup.modifiers)
-        ).filter(ModifierGroup.id == link.modifier_group_id).first()
-
-        if not group:
-            continue
-
-        modifiers_data = []
-        for modifier in sorted(group.modifiers, key=lambda m: (m.display_order, m.name)):
-            if not modifier.is_available:
-                continue
-
-            ingredient = db.query(Ingredient).filter(
-                Ingredient.id == modifier.ingredient_id
-            ).first() if modifier.ingredient_id else None
-
-            modifiers_data.append({
-                "id": modifier.id,
-                "group_id": modifier.group_id,
-                "name": modifier.name,
-                "price": modifier.price,
-                "ingredient_id": modifier.ingredient_id,
-                "ingredient_name": ingredient.name if ingredient else None,
-                "quantity_per_use": modifier.quantity_per_use,
-                "display_order": modifier.display_order,
-                "is_available": modifier.is_available,
-                "created_at": modifier.created_at,
-                "updated_at": modifier.updated_at
-            })
-
-        result.append({
-            "id": group.id,
-            "name": group.name,
-            "selection_type": group.selection_type,
-            "min_selections": group.min_selections,
-            "max_selections": group.max_selections,
-            "is_required": group.is_required,
-            "display_order": group.display_order,
-            "is_active": group.is_active,
-            "modifiers": modifiers_data,
-            "created_at": group.created_at,
-            "updated_at": group.updated_at
-        })
-
-    return result
+    return groups
 
 
 @router.post("/products/{product_id}/modifiers", status_code=status.HTTP_201_CREATED)
@@ -3,11 +3,15 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import List
 from datetime import datetime, date
-from ..db import get_db
-from ..models import Order, OrderItem, Product, Recipe, OrderStatus, ItemType
+from ..db import get_db, get_read_db, engine, SessionLocal
+from ..catalog import get_sale_prices
+from ..sellable import get_sellable
+from ..models import Order, OrderItem, OrderStatus, ItemType
 from ..schemas import OrderCreate, OrderResponse, OrderStats
+from ..metrics import ORDERS_CREATED, ORDERS_REVENUE, ORDERS_FAILED, CHECKOUT_SECONDS
 import uuid
 import asyncio
+import time
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -22,47 +26,105 @@ def generate_order_number() -> str:
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
     """Создать новый заказ"""
+    started = time.perf_counter()
+
+    # Цены и доступность на точке - из кэша каталога, без запросов на каждую позицию
+    sale_prices = get_sale_prices(db, order_data.location_id)
+    if sale_prices is None:
+        ORDERS_FAILED.labels(reason="location_not_found").inc()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Location with id {order_data.location_id} not found"
+        )
+
     # Проверяем наличие товаров/техкарт и считаем сумму
     order_items_data = []
     total_amount = 0.0
 
     for item in order_data.items:
-        item_name = ""
-        item_price = 0.0
         product_id = None
         recipe_id = None
+        variant_id = None
 
         if item.item_type == ItemType.PRODUCT:
             # Обработка товара
-            product = db.query(Product).filter(Product.id == item.product_id).first()
+            product = sale_prices["products"].get(item.product_id)
             if not product:
+                ORDERS_FAILED.labels(reason="product_not_found").inc()
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Product with id {item.product_id} not found"
                 )
 
-            if not product.is_available:
+            item_name, item_price, is_available = product
+            if not is_available:
+                ORDERS_FAILED.labels(reason="product_unavailable").inc()
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Product '{product.name}' is not available"
+                    detail=f"Product '{item_name}' is not available"
                 )
-
-            item_name = product.name
-            item_price = product.price
-            product_id = product.id
+            product_id = item.product_id
+
+            if item.variant_id:
+                # Вариант (размер): своё название и надбавка к цене товара на точке
+                variant = sale_prices["variants"].get(item.variant_id)
+                if not variant or variant[0] != item.product_id:
+                    ORDERS_FAILED.labels(reason="variant_not_found").inc()
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Variant with id {item.variant_id} not found for product {item.product_id}"
+                    )
+                _, variant_name, price_adjustment, _, is_active = variant
+                if not is_active:
+                    ORDERS_FAILED.labels(reason="variant_unavailable").inc()
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Variant '{variant_name}' is not available"
+                    )
+                item_name = f"{item_name} ({variant_name})"
+                item_price += price_adjustment
+                variant_id = item.variant_id
 
         elif item.item_type == ItemType.RECIPE:
             # Обработка техкарты
-            recipe = db.query(Recipe).filter(Recipe.id == item.recipe_id).first()
+            recipe = sale_prices["recipes"].get(item.recipe_id)
             if not recipe:
+                ORDERS_FAILED.labels(reason="recipe_not_found").inc()
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Recipe with id {item.recipe_id} not found"
                 )
 
-            item_name = recipe.name
-            item_price = recipe.price
-            recipe_id = recipe.id
+            item_name, item_price, is_available = recipe
+            if not is_available:
+                ORDERS_FAILED.labels(reason="recipe_unavailable").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Recipe '{item_name}' is not available"
+                )
+            recipe_id = item.recipe_id
+
+        # Модификаторы: цена и название из каталога, не от кассы
+        modifiers = None
+        if item.modifiers:
+            modifiers = []
+            for selected in item.modifiers:
+                modifier = sale_prices["modifiers"].get(selected.modifier_id)
+                if not modifier:
+                    ORDERS_FAILED.labels(reason="modifier_not_found").inc()
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Modifier with id {selected.modifier_id} not found"
+                    )
+                modifier_name, modifier_price, is_available = modifier
+                if not is_available:
+                    ORDERS_FAILED.labels(reason="modifier_unavailable").inc()
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Modifier '{modifier_name}' is not available"
+                    )
+                modifiers.append({"modifier_id": selected.modifier_id, "name": modifier_name, "price": modifier_price})
+                item_price += modifier_price
 
         subtotal = item_price * item.quantity
         total_amount += subtotal
@@ -71,15 +133,39 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
             "item_type": item.item_type,
             "product_id": product_id,
             "recipe_id": recipe_id,
+            "variant_id": variant_id,
+            "modifiers": modifiers,
             "item_name": item_name,
             "quantity": item.quantity,
             "price": item_price,
             "subtotal": subtotal
         })
 
+    # Хватает ли остатков точки: порции техкарт (и техкарт вариантов) из app/sellable.py,
+    # несколько позиций одной техкарты складываются
+    demand = {}
+    for item_data in order_items_data:
+        recipe_id = item_data["recipe_id"]
+        if item_data["variant_id"]:
+            recipe_id = sale_prices["variants"][item_data["variant_id"]][3]
+        if recipe_id is not None:
+            demand[recipe_id] = demand.get(recipe_id, 0) + item_data["quantity"]
+    if demand and order_data.check_stock:
+        portions = get_sellable(db, order_data.location_id)["recipes"]
+        for recipe_id, quantity in demand.items():
+            available = portions.get(recipe_id)
+            if available is not None and available < quantity:
+                ORDERS_FAILED.labels(reason="out_of_stock").inc()
+                name = sale_prices["recipes"].get(recipe_id, ("",))[0]
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Not enough stock for '{name}': {available} left, {quantity} requested"
+                )
+
     # Создаем заказ
     db_order = Order(
         order_number=generate_order_number(),
+        location_id=order_data.location_id,
         total_amount=total_amount,
         payment_method=order_data.payment_method,
         status=OrderStatus.PAID,
@@ -113,7 +199,8 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
                 {
                     "item_name": item["item_name"],
                     "quantity": item["quantity"],
-                    "price": item["price"]
+                    "price": item["price"],
+                    "modifiers": item["modifiers"] or []
                 }
                 for item in order_items_data
             ],
@@ -121,6 +208,11 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
         }
     })
 
+    payment_method = db_order.payment_method.value
+    ORDERS_CREATED.labels(payment_method=payment_method).inc()
+    ORDERS_REVENUE.labels(payment_method=payment_method).inc(db_order.total_amount)
+    CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
     return db_order
 
 
@@ -129,7 +221,7 @@ def get_orders(
     skip: int = 0,
     limit: int = 100,
     status_filter: OrderStatus = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получить список заказов"""
     query = db.query(Order).order_by(desc(Order.created_at))
@@ -142,7 +234,7 @@ def get_orders(
 
 
 @router.get("/today", response_model=List[OrderResponse])
-def get_today_orders(db: Session = Depends(get_db)):
+def get_today_orders(db: Session = Depends(get_read_db)):
     """Получить заказы за сегодня"""
     today = date.today()
     orders = db.query(Order).filter(
@@ -152,7 +244,7 @@ def get_today_orders(db: Session = Depends(get_db)):
 
 
 @router.get("/stats/today", response_model=OrderStats)
-def get_today_stats(db: Session = Depends(get_db)):
+def get_today_stats(db: Session = Depends(get_read_db)):
     """Статистика за сегодня"""
     today = date.today()
 
@@ -204,9 +296,18 @@ def get_today_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(order_id: int, db: Session = Depends(get_db)):
+def get_order(order_id: int, db: Session = Depends(get_read_db)):
     """Получить заказ по ID"""
     order = db.query(Order).filter(Order.id == order_id).first()
+
+    # Реплика может отставать: только что созданный заказ ищем в основной БД
+    if not order and db.get_bind() is not engine:
+        primary_db = SessionLocal()
+        try:
+            order = primary_db.query(Order).filter(Order.id == order_id).first()
+        finally:
+            primary_db.close()
+
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
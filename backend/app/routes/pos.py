@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from ..db import get_db
-from ..models import Product, Recipe, Category, ProductVariant, ProductModifierGroup
+from typing import List, Optional
+from ..db import get_db, get_read_db
+from ..catalog import get_location_overrides, get_pos_items, get_product_card, load_pos_categories
+from ..menu_bundle import get_menu_bundle
+from ..models import DEFAULT_LOCATION_ID
+from ..sellable import apply_to_card, apply_to_items, get_sellable
 
 router = APIRouter(prefix="/pos", tags=["pos"])
 
 
+def _ensure_location(db: Session, location_id: int):
+    """404, если точки нет (проверка по кэшу каталога)"""
+    if get_location_overrides(db, location_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Точка с ID {location_id} не найдена"
+        )
+
+
 @router.get("/items")
-def get_pos_items(db: Session = Depends(get_db)):
+def get_pos_items_list(location_id: int = DEFAULT_LOCATION_ID, db: Session = Depends(get_db)):
     """
     Получить все товары и техкарты для отображения на кассе
 
@@ -18,98 +30,103 @@ def get_pos_items(db: Session = Depends(get_db)):
 
     Каждый элемент имеет поле 'type' для различения
     Сортировка: category_id (с display_order категории) → display_order товара → name
+
+    location_id - цены и доступность на точке (исключения из настроек точки);
+    без него - точка по умолчанию, та же, что у POST /orders без location_id,
+    чтобы касса показывала ту цену, которую потом выставит заказ.
+    Меню точки собирается один раз после изменения каталога и отдаётся из
+    кэша, поэтому читается с основной БД.
+
+    Доступность учитывает остатки точки: sellable_quantity -
+    сколько порций можно приготовить (null - не ограничено остатками),
+    при 0 позиция недоступна. Значения поддерживаются app/sellable.py по мере
+    движения остатков, а не считаются на каждый запрос.
+    """
+    _ensure_location(db, location_id)
+    return apply_to_items(get_pos_items(db, location_id), get_sellable(db, location_id))
+
+
+@router.get("/products/{product_id}/card")
+def get_pos_product_card(product_id: int, location_id: int = DEFAULT_LOCATION_ID, db: Session = Depends(get_db)):
     """
-    items = []
-
-    # Получаем Products с сортировкой
-    products = db.query(Product).filter(
-        Product.show_in_pos == True
-    ).order_by(
-        Product.category_id.asc().nulls_last(),
-        Product.display_order.asc(),
-        Product.name.asc()
-    ).all()
-
-    for product in products:
-        # Проверяем наличие вариантов и модификаторов
-        has_variants = db.query(ProductVariant).filter(
-            ProductVariant.base_product_id == product.id,
-            ProductVariant.is_active == True
-        ).count() > 0
-
-        has_modifiers = db.query(ProductModifierGroup).filter(
-            ProductModifierGroup.product_id == product.id
-        ).count() > 0
-
-        items.append({
-            "id": product.id,
-            "type": "product",  # Тип: товар (покупной)
-            "name": product.name,
-            "price": product.price,
-            "category": product.category,  # DEPRECATED: старое поле для обратной совместимости
-            "category_id": product.category_id,
-            "category_name": product.category_rel.name if product.category_rel else None,
-            "display_order": product.display_order,
-            "is_available": product.is_available,
-            "image_url": product.image_url,
-            "cost": None,  # У товаров нет автоматической себестоимости
-            "markup_percentage": None,
-            "has_variants": has_variants,  # Есть варианты (размеры)
-            "has_modifiers": has_modifiers  # Есть модификации (добавки)
-        })
-
-    # Получаем Recipes с сортировкой
-    recipes = db.query(Recipe).filter(
-        Recipe.show_in_pos == True
-    ).order_by(
-        Recipe.category_id.asc().nulls_last(),
-        Recipe.display_order.asc(),
-        Recipe.name.asc()
-    ).all()
-
-    for recipe in recipes:
-        items.append({
-            "id": recipe.id,
-            "type": "recipe",  # Тип: техкарта (готовится)
-            "name": recipe.name,
-            "price": recipe.price,
-            "category": recipe.category,  # DEPRECATED: старое поле для обратной совместимости
-            "category_id": recipe.category_id,
-            "category_name": recipe.category_rel.name if recipe.category_rel else None,
-            "display_order": recipe.display_order,
-            "is_available": True,  # Всегда доступно если показывается
-            "image_url": recipe.image_url,
-            "cost": recipe.cost,  # Себестоимость из ингредиентов
-            "markup_percentage": recipe.markup_percentage,
-            "output_weight": recipe.output_weight,
-            "has_variants": False,  # Техкарты не имеют вариантов
-            "has_modifiers": False  # Техкарты не имеют модификаций
-        })
-
-    # Сортировка уже выполнена на уровне БД, возвращаем как есть
-    return items
+    Карточка товара для диалога опций: товар, активные варианты (с техкартой
+    и себестоимостью) и группы модификаций одним запросом
+
+    Отдаётся из кэша каталога (сбрасывается при изменении каталога), поэтому
+    читается с основной БД - устаревшие данные с реплики не попадут в кэш.
+    location_id (по умолчанию - точка по умолчанию) - цены и доступность на
+    точке, для вариантов - sellable_quantity и is_sellable по остаткам точки.
+    """
+    _ensure_location(db, location_id)
+    card = get_product_card(db, product_id, location_id)
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Товар с ID {product_id} не найден"
+        )
+    return apply_to_card(card, get_sellable(db, location_id))
+
+
+def _accepted_encodings(header: str) -> set:
+    """Accept-Encoding -> множество кодировок с q > 0"""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _pick_encoding(header: str, available: List[str]) -> Optional[str]:
+    accepted = _accepted_encodings(header)
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+@router.get("/menu-bundle")
+def get_pos_menu_bundle(request: Request, location_id: int = DEFAULT_LOCATION_ID, db: Session = Depends(get_db)):
+    """
+    Всё меню кассы одним сжатым документом (для офлайн-кэша планшета)
+
+    Категории, позиции (как /pos/items) и карточки товаров (как
+    /pos/products/{id}/card). ETag - версия пакета: при If-None-Match с той же
+    версией отвечаем 304 без тела. Сжатие - brotli или gzip по Accept-Encoding.
+    location_id - пакет точки (её цены и доступность), по умолчанию - точка по умолчанию.
+    """
+    _ensure_location(db, location_id)
+    bundle = get_menu_bundle(db, location_id)
+    headers = {
+        "ETag": bundle.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Menu-Version": bundle.version,
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if bundle.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""), bundle.encodings())
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=bundle.body(encoding), media_type="application/json", headers=headers)
 
 
 @router.get("/categories")
-def get_pos_categories(db: Session = Depends(get_db)):
+def get_pos_categories(db: Session = Depends(get_read_db)):
     """
     Получить категории для отображения на кассе
 
     Возвращает только активные категории типа POS (или PRODUCT/RECIPE для обратной совместимости),
     отсортированные по display_order
     """
-    categories = db.query(Category).filter(
-        Category.type.in_(['pos', 'product', 'recipe']),
-        Category.is_active == True
-    ).order_by(Category.display_order.asc(), Category.name.asc()).all()
-
-    return [
-        {
-            "id": cat.id,
-            "name": cat.name,
-            "type": cat.type,  # type is String, not Enum, so no .value needed
-            "color": cat.color,
-            "display_order": cat.display_order
-        }
-        for cat in categories
-    ]
+    return load_pos_categories(db)
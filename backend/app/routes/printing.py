@@ -0,0 +1,52 @@
+import base64
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy.orm import Session, selectinload
+from ..db import get_db
+from ..models import Order, Settings
+from ..escpos import render_receipt, render_runners
+
+router = APIRouter(prefix="/print", tags=["print"])
+
+
+def _get_order(order_id: int, db: Session) -> Order:
+    order = db.query(Order).options(selectinload(Order.order_items)).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with id {order_id} not found"
+        )
+    return order
+
+
+def _print_response(data: bytes, output_format: str):
+    """raw - байты для принт-прокси, base64 - для RawBT на Android"""
+    if output_format == "base64":
+        return {"data": base64.b64encode(data).decode("ascii"), "size": len(data)}
+    return Response(content=data, media_type="application/octet-stream")
+
+
+@router.get("/orders/{order_id}/receipt")
+def get_receipt(order_id: int, format: str = "raw", db: Session = Depends(get_db)):
+    """
+    Готовый к печати чек заказа (ESC/POS, CP866)
+
+    Планшет просто пересылает байты на принт-прокси (localhost:9100).
+    Чек запрашивают сразу после создания заказа, поэтому читаем с основной
+    БД - на отстающей реплике заказа ещё может не быть.
+    """
+    order = _get_order(order_id, db)
+    settings = db.query(Settings).first()
+    data = render_receipt(
+        order,
+        business_name=settings.business_name if settings else "",
+        phone=settings.phone if settings else ""
+    )
+    return _print_response(data, format)
+
+
+@router.get("/orders/{order_id}/runners")
+def get_runners(order_id: int, format: str = "raw", db: Session = Depends(get_db)):
+    """Бегунки заказа: отдельная этикетка на каждый стакан (ESC/POS, CP866), с основной БД как и чек"""
+    order = _get_order(order_id, db)
+    return _print_response(render_runners(order), format)
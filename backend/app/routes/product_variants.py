@@ -22,14 +22,16 @@ def get_product_variants(product_id: int, db: Session = Depends(get_db)):
             detail=f"Товар с ID {product_id} не найден"
         )
 
-    variants = db.query(ProductVariant).filter(
+    variants = db.query(ProductVariant).options(
+        joinedload(ProductVariant.recipe)
+    ).filter(
         ProductVariant.base_product_id == product_id
     ).order_by(ProductVariant.display_order, ProductVariant.id).all()
 
-    # Обогащаем данными о техкартах
+    # Обогащаем данными о техкартах (загружены тем же запросом)
     result = []
     for variant in variants:
-        recipe = db.query(Recipe).filter(Recipe.id == variant.recipe_id).first()
+        recipe = variant.recipe
         variant_dict = {
             "id": variant.id,
             "base_product_id": variant.base_product_id,
@@ -4,6 +4,8 @@ from typing import List
 from ..db import get_db
 from ..models import Product
 from ..schemas import ProductCreate, ProductUpdate, ProductResponse
+from ..reorder import apply_display_order
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -90,6 +92,9 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
             detail=f"Product with id {product_id} not found"
         )
 
+    # Проданный товар удалять нельзя - позиции заказов ссылаются на него
+    ensure_can_delete(db, "product", product_id, hint="Скройте товар с кассы вместо удаления")
+
     db.delete(db_product)
     db.commit()
     return None
@@ -101,12 +106,7 @@ def reorder_products(order: List[dict], db: Session = Depends(get_db)):
     Обновить порядок отображения товаров
     Body: [{"id": 1, "display_order": 0}, {"id": 3, "display_order": 1}, ...]
     """
-    for item in order:
-        product = db.query(Product).filter(Product.id == item["id"]).first()
-        if product:
-            product.display_order = item["display_order"]
-    db.commit()
-    return {"status": "ok", "updated": len(order)}
+    return apply_display_order(db, Product, order)
 
 
 @router.get("/categories/list", response_model=List[str])
@@ -1,22 +1,76 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, joinedload
-from typing import List
-from ..db import get_db
-from ..models import Recipe, RecipeIngredient, Ingredient, RecipeSemifinished, Semifinished
-from ..schemas import (
-    RecipeCreate,
-    RecipeUpdate,
-    RecipeResponse,
-    RecipeListItem,
-    RecipeIngredientResponse,
-    RecipeSemifinishedResponse
-)
+from typing import List, Optional
+from ..catalog import recipe_cost_options
+from ..costing import CostCalculator, markup_percentage
+from ..db import get_db, get_read_db
+from ..models import Category, Recipe, RecipeIngredient, Ingredient, RecipeSemifinished, Semifinished
+from ..schemas import RecipeCreate, RecipeUpdate, RecipeResponse, RecipeListItem
+from ..reorder import apply_display_order
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
 
-def _enrich_recipe_response(recipe: Recipe, db: Session) -> dict:
-    """Обогащает данные рецепта информацией об ингредиентах и полуфабрикатах"""
+def _load_recipe(db: Session, recipe_id: int, refresh: bool = False) -> Optional[Recipe]:
+    """
+    Техкарта со всем графом для ответа: категория, состав, ингредиенты,
+    полуфабрикаты и их состав - 4 запроса независимо от размера техкарты
+    """
+    query = db.query(Recipe).options(joinedload(Recipe.category_rel), *recipe_cost_options())
+    if refresh:
+        query = query.populate_existing()
+    return query.filter(Recipe.id == recipe_id).first()
+
+
+def _ensure_exist(db: Session, model, ids: List[int], label: str):
+    """Проверить одним запросом, что все id есть в таблице (404 на первый отсутствующий)"""
+    wanted = set(ids)
+    if not wanted:
+        return
+    found = {row.id for row in db.query(model.id).filter(model.id.in_(wanted))}
+    for item_id in ids:
+        if item_id not in found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{label} с ID {item_id} не найден"
+            )
+
+
+def _insert_ingredients(db: Session, recipe_id: int, ingredients):
+    """Ингредиенты техкарты одним INSERT (executemany) независимо от числа строк"""
+    if ingredients:
+        db.execute(insert(RecipeIngredient), [
+            {
+                "recipe_id": recipe_id,
+                "ingredient_id": ing_data.ingredient_id,
+                "gross_weight": ing_data.gross_weight,
+                "net_weight": ing_data.net_weight,
+                "cooking_method": ing_data.cooking_method,
+                "is_cleaned": ing_data.is_cleaned
+            }
+            for ing_data in ingredients
+        ])
+
+
+def _insert_semifinished(db: Session, recipe_id: int, semifinished):
+    """Полуфабрикаты техкарты одним INSERT (executemany)"""
+    if semifinished:
+        db.execute(insert(RecipeSemifinished), [
+            {"recipe_id": recipe_id, "semifinished_id": sf_data.semifinished_id, "quantity": sf_data.quantity}
+            for sf_data in semifinished
+        ])
+
+
+def _enrich_recipe_response(recipe: Recipe, calculator: Optional[CostCalculator] = None) -> dict:
+    """
+    Обогащает данные рецепта информацией об ингредиентах и полуфабрикатах
+
+    Граф должен быть загружен заранее (_load_recipe) - здесь запросов к БД нет.
+    """
+    calculator = calculator or CostCalculator()
+    cost = calculator.recipe_cost(recipe)
     recipe_dict = {
         "id": recipe.id,
         "name": recipe.name,
@@ -29,9 +83,9 @@ def _enrich_recipe_response(recipe: Recipe, db: Session) -> dict:
         "exclude_from_discounts": recipe.exclude_from_discounts,
         "show_in_pos": recipe.show_in_pos,
         "image_url": recipe.image_url,
-        "cost": recipe.cost,
-        "markup_percentage": recipe.markup_percentage,
-        "profit": recipe.profit,
+        "cost": cost,
+        "markup_percentage": markup_percentage(recipe.price, cost),
+        "profit": recipe.price - cost,
         "created_at": recipe.created_at,
         "updated_at": recipe.updated_at,
         "ingredients": [],
@@ -40,7 +94,7 @@ def _enrich_recipe_response(recipe: Recipe, db: Session) -> dict:
 
     # Добавляем информацию об ингредиентах
     for recipe_ing in recipe.ingredients:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == recipe_ing.ingredient_id).first()
+        ingredient = recipe_ing.ingredient
         if ingredient:
             recipe_dict["ingredients"].append({
                 "id": recipe_ing.id,
@@ -52,12 +106,12 @@ def _enrich_recipe_response(recipe: Recipe, db: Session) -> dict:
                 "net_weight": recipe_ing.net_weight,
                 "cooking_method": recipe_ing.cooking_method,
                 "is_cleaned": recipe_ing.is_cleaned,
-                "cost": recipe_ing.cost
+                "cost": calculator.recipe_ingredient_cost(recipe_ing)
             })
 
     # Добавляем информацию о полуфабрикатах
     for recipe_sf in recipe.semifinished_items:
-        semifinished = db.query(Semifinished).filter(Semifinished.id == recipe_sf.semifinished_id).first()
+        semifinished = recipe_sf.semifinished
         if semifinished:
             recipe_dict["semifinished"].append({
                 "id": recipe_sf.id,
@@ -66,7 +120,7 @@ def _enrich_recipe_response(recipe: Recipe, db: Session) -> dict:
                 "semifinished_name": semifinished.name,
                 "semifinished_unit": semifinished.unit,
                 "quantity": recipe_sf.quantity,
-                "cost": recipe_sf.cost
+                "cost": calculator.recipe_semifinished_cost(recipe_sf)
             })
 
     return recipe_dict
@@ -77,14 +131,14 @@ def get_recipes(
     skip: int = 0,
     limit: int = 100,
     category: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получить список всех техкарт"""
-    from sqlalchemy.orm import joinedload
-    from ..models import Category
-
-    # Загружаем техкарты с категориями
-    query = db.query(Recipe).outerjoin(Recipe.category_rel).options(joinedload(Recipe.category_rel))
+    # Загружаем техкарты с категориями и составом для себестоимости
+    query = db.query(Recipe).outerjoin(Recipe.category_rel).options(
+        joinedload(Recipe.category_rel),
+        *recipe_cost_options()
+    )
 
     if category:
         query = query.filter(Recipe.category == category)
@@ -98,6 +152,8 @@ def get_recipes(
     ).offset(skip).limit(limit).all()
 
     # Формируем ответ для списка (без детализации ингредиентов)
+    calculator = CostCalculator()
+    costs = {r.id: calculator.recipe_cost(r) for r in recipes}
     return [
         {
             "id": r.id,
@@ -107,8 +163,8 @@ def get_recipes(
             "category_name": r.category_rel.name if r.category_rel else None,
             "output_weight": r.output_weight,
             "price": r.price,
-            "cost": r.cost,
-            "markup_percentage": r.markup_percentage,
+            "cost": costs[r.id],
+            "markup_percentage": markup_percentage(r.price, costs[r.id]),
             "is_weight_based": r.is_weight_based,
             "exclude_from_discounts": r.exclude_from_discounts,
             "show_in_pos": r.show_in_pos,
@@ -120,13 +176,9 @@ def get_recipes(
 
 
 @router.get("/{recipe_id}", response_model=RecipeResponse)
-def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
+def get_recipe(recipe_id: int, db: Session = Depends(get_read_db)):
     """Получить техкарту по ID с полным составом"""
-    recipe = db.query(Recipe).options(
-        joinedload(Recipe.ingredients),
-        joinedload(Recipe.semifinished_items),
-        joinedload(Recipe.category_rel)
-    ).filter(Recipe.id == recipe_id).first()
+    recipe = _load_recipe(db, recipe_id)
 
     if not recipe:
         raise HTTPException(
@@ -134,7 +186,7 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
             detail=f"Техкарта с ID {recipe_id} не найдена"
         )
 
-    return _enrich_recipe_response(recipe, db)
+    return _enrich_recipe_response(recipe)
 
 
 @router.post("", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
@@ -148,23 +200,9 @@ def create_recipe(recipe_data: RecipeCreate, db: Session = Depends(get_db)):
             detail=f"Техкарта '{recipe_data.name}' уже существует"
         )
 
-    # Проверяем что все ингредиенты существуют
-    for ing in recipe_data.ingredients:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == ing.ingredient_id).first()
-        if not ingredient:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Ингредиент с ID {ing.ingredient_id} не найден"
-            )
-
-    # Проверяем что все полуфабрикаты существуют
-    for sf in recipe_data.semifinished:
-        semifinished = db.query(Semifinished).filter(Semifinished.id == sf.semifinished_id).first()
-        if not semifinished:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Полуфабрикат с ID {sf.semifinished_id} не найден"
-            )
+    # Проверяем что все ингредиенты и полуфабрикаты существуют (по запросу на таблицу)
+    _ensure_exist(db, Ingredient, [ing.ingredient_id for ing in recipe_data.ingredients], "Ингредиент")
+    _ensure_exist(db, Semifinished, [sf.semifinished_id for sf in recipe_data.semifinished], "Полуфабрикат")
 
     # Создаем техкарту
     recipe = Recipe(
@@ -181,31 +219,13 @@ def create_recipe(recipe_data: RecipeCreate, db: Session = Depends(get_db)):
     db.add(recipe)
     db.flush()  # Чтобы получить ID
 
-    # Создаем связи с ингредиентами
-    for ing_data in recipe_data.ingredients:
-        recipe_ingredient = RecipeIngredient(
-            recipe_id=recipe.id,
-            ingredient_id=ing_data.ingredient_id,
-            gross_weight=ing_data.gross_weight,
-            net_weight=ing_data.net_weight,
-            cooking_method=ing_data.cooking_method,
-            is_cleaned=ing_data.is_cleaned
-        )
-        db.add(recipe_ingredient)
-
-    # Создаем связи с полуфабрикатами
-    for sf_data in recipe_data.semifinished:
-        recipe_semifinished = RecipeSemifinished(
-            recipe_id=recipe.id,
-            semifinished_id=sf_data.semifinished_id,
-            quantity=sf_data.quantity
-        )
-        db.add(recipe_semifinished)
+    # Создаем связи с ингредиентами и полуфабрикатами (по одному INSERT на таблицу)
+    _insert_ingredients(db, recipe.id, recipe_data.ingredients)
+    _insert_semifinished(db, recipe.id, recipe_data.semifinished)
 
     db.commit()
-    db.refresh(recipe)
 
-    return _enrich_recipe_response(recipe, db)
+    return _enrich_recipe_response(_load_recipe(db, recipe.id, refresh=True))
 
 
 @router.put("/{recipe_id}", response_model=RecipeResponse)
@@ -222,6 +242,12 @@ def update_recipe(
             detail=f"Техкарта с ID {recipe_id} не найдена"
         )
 
+    # Проверяем новый состав до изменений (по запросу на таблицу)
+    if recipe_data.ingredients is not None:
+        _ensure_exist(db, Ingredient, [ing.ingredient_id for ing in recipe_data.ingredients], "Ингредиент")
+    if recipe_data.semifinished is not None:
+        _ensure_exist(db, Semifinished, [sf.semifinished_id for sf in recipe_data.semifinished], "Полуфабрикат")
+
     # Обновляем основные поля
     update_data = recipe_data.model_dump(exclude_unset=True, exclude={'ingredients', 'semifinished'})
     for field, value in update_data.items():
@@ -233,24 +259,7 @@ def update_recipe(
         db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id == recipe_id).delete()
 
         # Создаем новые
-        for ing_data in recipe_data.ingredients:
-            # Проверяем существование ингредиента
-            ingredient = db.query(Ingredient).filter(Ingredient.id == ing_data.ingredient_id).first()
-            if not ingredient:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Ингредиент с ID {ing_data.ingredient_id} не найден"
-                )
-
-            recipe_ingredient = RecipeIngredient(
-                recipe_id=recipe.id,
-                ingredient_id=ing_data.ingredient_id,
-                gross_weight=ing_data.gross_weight,
-                net_weight=ing_data.net_weight,
-                cooking_method=ing_data.cooking_method,
-                is_cleaned=ing_data.is_cleaned
-            )
-            db.add(recipe_ingredient)
+        _insert_ingredients(db, recipe.id, recipe_data.ingredients)
 
     # Если переданы полуфабрикаты - обновляем состав
     if recipe_data.semifinished is not None:
@@ -258,26 +267,11 @@ def update_recipe(
         db.query(RecipeSemifinished).filter(RecipeSemifinished.recipe_id == recipe_id).delete()
 
         # Создаем новые
-        for sf_data in recipe_data.semifinished:
-            # Проверяем существование полуфабриката
-            semifinished = db.query(Semifinished).filter(Semifinished.id == sf_data.semifinished_id).first()
-            if not semifinished:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Полуфабрикат с ID {sf_data.semifinished_id} не найден"
-                )
-
-            recipe_semifinished = RecipeSemifinished(
-                recipe_id=recipe.id,
-                semifinished_id=sf_data.semifinished_id,
-                quantity=sf_data.quantity
-            )
-            db.add(recipe_semifinished)
+        _insert_semifinished(db, recipe.id, recipe_data.semifinished)
 
     db.commit()
-    db.refresh(recipe)
 
-    return _enrich_recipe_response(recipe, db)
+    return _enrich_recipe_response(_load_recipe(db, recipe.id, refresh=True))
 
 
 @router.delete("/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -290,6 +284,9 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
             detail=f"Техкарта с ID {recipe_id} не найдена"
         )
 
+    # Техкарту из вариантов товаров и проданных позиций удалять нельзя
+    ensure_can_delete(db, "recipe", recipe_id)
+
     # Связанные RecipeIngredient удалятся автоматически (cascade)
     db.delete(recipe)
     db.commit()
@@ -302,20 +299,11 @@ def reorder_recipes(order: List[dict], db: Session = Depends(get_db)):
     Обновить порядок отображения техкарт
     Body: [{"id": 1, "display_order": 0}, {"id": 3, "display_order": 1}, ...]
     """
-    updated_count = 0
-    for item in order:
-        recipe = db.query(Recipe).filter(Recipe.id == item["id"]).first()
-        if recipe:
-            print(f"[REORDER] Updating recipe ID={recipe.id} '{recipe.name}': display_order {recipe.display_order} -> {item['display_order']}")
-            recipe.display_order = item["display_order"]
-            updated_count += 1
-    db.commit()
-    print(f"[REORDER] Committed {updated_count} recipe updates to database")
-    return {"status": "ok", "updated": updated_count}
+    return apply_display_order(db, Recipe, order)
 
 
 @router.get("/categories/list", response_model=List[str])
-def get_recipe_categories(db: Session = Depends(get_db)):
+def get_recipe_categories(db: Session = Depends(get_read_db)):
     """Получить список всех категорий техкарт"""
     categories = db.query(Recipe.category).distinct().filter(Recipe.category.isnot(None)).all()
     return [cat[0] for cat in categories if cat[0]]
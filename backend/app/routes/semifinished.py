@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from ..catalog import semifinished_cost_options
+from ..costing import CostCalculator
 from ..db import get_db
 from ..models import Semifinished, SemifinishedIngredient, Ingredient
 from ..schemas import (
@@ -9,19 +12,60 @@ from ..schemas import (
     SemifinishedResponse,
     SemifinishedListItem
 )
+from ..usage import ensure_can_delete
 
 router = APIRouter(prefix="/semifinished", tags=["semifinished"])
 
 
-def _enrich_semifinished_response(semifinished: Semifinished, db: Session) -> dict:
-    """Обогащает данные полуфабриката информацией об ингредиентах"""
+def _load_semifinished(db: Session, semifinished_id: int, refresh: bool = False) -> Optional[Semifinished]:
+    """Полуфабрикат с составом и ингредиентами для ответа - 2 запроса"""
+    query = db.query(Semifinished).options(semifinished_cost_options())
+    if refresh:
+        query = query.populate_existing()
+    return query.filter(Semifinished.id == semifinished_id).first()
+
+
+def _ensure_ingredients_exist(db: Session, ingredient_ids: List[int]):
+    """Проверить одним запросом, что все ингредиенты есть (404 на первый отсутствующий)"""
+    wanted = set(ingredient_ids)
+    if not wanted:
+        return
+    found = {row.id for row in db.query(Ingredient.id).filter(Ingredient.id.in_(wanted))}
+    for ingredient_id in ingredient_ids:
+        if ingredient_id not in found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Ингредиент с ID {ingredient_id} не найден"
+            )
+
+
+def _insert_ingredients(db: Session, semifinished_id: int, ingredients):
+    """Состав полуфабриката одним INSERT (executemany) независимо от числа строк"""
+    if ingredients:
+        db.execute(insert(SemifinishedIngredient), [
+            {
+                "semifinished_id": semifinished_id,
+                "ingredient_id": ing_data.ingredient_id,
+                "weight": ing_data.weight
+            }
+            for ing_data in ingredients
+        ])
+
+
+def _enrich_semifinished_response(semifinished: Semifinished, calculator: Optional[CostCalculator] = None) -> dict:
+    """
+    Обогащает данные полуфабриката информацией об ингредиентах
+
+    Состав должен быть загружен заранее (_load_semifinished) - здесь запросов к БД нет.
+    """
+    calculator = calculator or CostCalculator()
     semifinished_dict = {
         "id": semifinished.id,
         "name": semifinished.name,
         "category": semifinished.category,
         "unit": semifinished.unit,
         "output_quantity": semifinished.output_quantity,
-        "cost": semifinished.cost,
+        "cost": calculator.semifinished_cost(semifinished),
         "created_at": semifinished.created_at,
         "updated_at": semifinished.updated_at,
         "ingredients": []
@@ -29,7 +73,7 @@ def _enrich_semifinished_response(semifinished: Semifinished, db: Session) -> di
 
     # Добавляем информацию об ингредиентах
     for sf_ing in semifinished.ingredients:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == sf_ing.ingredient_id).first()
+        ingredient = sf_ing.ingredient
         if ingredient:
             semifinished_dict["ingredients"].append({
                 "id": sf_ing.id,
@@ -38,7 +82,7 @@ def _enrich_semifinished_response(semifinished: Semifinished, db: Session) -> di
                 "ingredient_name": ingredient.name,
                 "ingredient_unit": ingredient.unit,
                 "weight": sf_ing.weight,
-                "cost": sf_ing.cost
+                "cost": calculator.ingredient_cost(ingredient, sf_ing.weight)
             })
 
     return semifinished_dict
@@ -52,7 +96,7 @@ def get_semifinished_list(
     db: Session = Depends(get_db)
 ):
     """Получить список всех полуфабрикатов"""
-    query = db.query(Semifinished)
+    query = db.query(Semifinished).options(semifinished_cost_options())
 
     if category:
         query = query.filter(Semifinished.category == category)
@@ -60,6 +104,7 @@ def get_semifinished_list(
     semifinished = query.offset(skip).limit(limit).all()
 
     # Формируем ответ для списка (без детализации ингредиентов)
+    calculator = CostCalculator()
     return [
         {
             "id": sf.id,
@@ -67,7 +112,7 @@ def get_semifinished_list(
             "category": sf.category,
             "unit": sf.unit,
             "output_quantity": sf.output_quantity,
-            "cost": sf.cost,
+            "cost": calculator.semifinished_cost(sf),
             "created_at": sf.created_at
         }
         for sf in semifinished
@@ -77,7 +122,7 @@ def get_semifinished_list(
 @router.get("/{semifinished_id}", response_model=SemifinishedResponse)
 def get_semifinished(semifinished_id: int, db: Session = Depends(get_db)):
     """Получить полуфабрикат по ID с полным составом"""
-    semifinished = db.query(Semifinished).filter(Semifinished.id == semifinished_id).first()
+    semifinished = _load_semifinished(db, semifinished_id)
 
     if not semifinished:
         raise HTTPException(
@@ -85,7 +130,7 @@ def get_semifinished(semifinished_id: int, db: Session = Depends(get_db)):
             detail=f"Полуфабрикат с ID {semifinished_id} не найден"
         )
 
-    return _enrich_semifinished_response(semifinished, db)
+    return _enrich_semifinished_response(semifinished)
 
 
 @router.post("", response_model=SemifinishedResponse, status_code=status.HTTP_201_CREATED)
@@ -99,14 +144,8 @@ def create_semifinished(semifinished_data: SemifinishedCreate, db: Session = Dep
             detail=f"Полуфабрикат '{semifinished_data.name}' уже существует"
         )
 
-    # Проверяем что все ингредиенты существуют
-    for ing in semifinished_data.ingredients:
-        ingredient = db.query(Ingredient).filter(Ingredient.id == ing.ingredient_id).first()
-        if not ingredient:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Ингредиент с ID {ing.ingredient_id} не найден"
-            )
+    # Проверяем что все ингредиенты существуют (одним запросом)
+    _ensure_ingredients_exist(db, [ing.ingredient_id for ing in semifinished_data.ingredients])
 
     # Создаем полуфабрикат
     semifinished = Semifinished(
@@ -119,18 +158,11 @@ def create_semifinished(semifinished_data: SemifinishedCreate, db: Session = Dep
     db.flush()  # Чтобы получить ID
 
     # Создаем связи с ингредиентами
-    for ing_data in semifinished_data.ingredients:
-        sf_ingredient = SemifinishedIngredient(
-            semifinished_id=semifinished.id,
-            ingredient_id=ing_data.ingredient_id,
-            weight=ing_data.weight
-        )
-        db.add(sf_ingredient)
+    _insert_ingredients(db, semifinished.id, semifinished_data.ingredients)
 
     db.commit()
-    db.refresh(semifinished)
 
-    return _enrich_semifinished_response(semifinished, db)
+    return _enrich_semifinished_response(_load_semifinished(db, semifinished.id, refresh=True))
 
 
 @router.put("/{semifinished_id}", response_model=SemifinishedResponse)
@@ -147,6 +179,10 @@ def update_semifinished(
             detail=f"Полуфабрикат с ID {semifinished_id} не найден"
         )
 
+    # Проверяем новый состав до изменений (одним запросом)
+    if semifinished_data.ingredients is not None:
+        _ensure_ingredients_exist(db, [ing.ingredient_id for ing in semifinished_data.ingredients])
+
     # Обновляем основные поля
     update_data = semifinished_data.model_dump(exclude_unset=True, exclude={'ingredients'})
     for field, value in update_data.items():
@@ -158,26 +194,11 @@ def update_semifinished(
         db.query(SemifinishedIngredient).filter(SemifinishedIngredient.semifinished_id == semifinished_id).delete()
 
         # Создаем новые
-        for ing_data in semifinished_data.ingredients:
-            # Проверяем существование ингредиента
-            ingredient = db.query(Ingredient).filter(Ingredient.id == ing_data.ingredient_id).first()
-            if not ingredient:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Ингредиент с ID {ing_data.ingredient_id} не найден"
-                )
-
-            sf_ingredient = SemifinishedIngredient(
-                semifinished_id=semifinished.id,
-                ingredient_id=ing_data.ingredient_id,
-                weight=ing_data.weight
-            )
-            db.add(sf_ingredient)
+        _insert_ingredients(db, semifinished.id, semifinished_data.ingredients)
 
     db.commit()
-    db.refresh(semifinished)
 
-    return _enrich_semifinished_response(semifinished, db)
+    return _enrich_semifinished_response(_load_semifinished(db, semifinished.id, refresh=True))
 
 
 @router.delete("/{semifinished_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -190,6 +211,9 @@ def delete_semifinished(semifinished_id: int, db: Session = Depends(get_db)):
             detail=f"Полуфабрикат с ID {semifinished_id} не найден"
         )
 
+    # Полуфабрикат из техкарт удалять нельзя
+    ensure_can_delete(db, "semifinished", semifinished_id)
+
     # Связанные SemifinishedIngredient удалятся автоматически (cascade)
     db.delete(semifinished)
     db.commit()
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import List, Optional
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..models import Stock, Ingredient, Location
+from ..metrics import STOCK_ADJUSTMENTS, STOCK_ADJUSTMENT_REJECTED
 from ..schemas import (
     StockCreate,
     StockUpdate,
@@ -19,7 +20,7 @@ router = APIRouter(prefix="/stock", tags=["stock"])
 def get_stock(
     location_id: int = 1,
     low_stock: bool = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Получить остатки всех ингредиентов для указанной точки
@@ -161,6 +162,7 @@ def create_or_update_stock(stock_data: StockCreate, db: Session = Depends(get_db
         existing_stock.min_stock = stock_data.min_stock
         db.commit()
         db.refresh(existing_stock)
+        STOCK_ADJUSTMENTS.labels(kind="set").inc()
         stock = existing_stock
     else:
         # Создаем новый
@@ -168,6 +170,7 @@ def create_or_update_stock(stock_data: StockCreate, db: Session = Depends(get_db
         db.add(stock)
         db.commit()
         db.refresh(stock)
+        STOCK_ADJUSTMENTS.labels(kind="create").inc()
 
     return StockResponse(
         id=stock.id,
@@ -208,6 +211,7 @@ def adjust_stock(
     ).first()
 
     if not stock:
+        STOCK_ADJUSTMENT_REJECTED.labels(reason="stock_not_found").inc()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Stock for ingredient {ingredient_id} at location {location_id} not found. Create it first."
@@ -217,6 +221,7 @@ def adjust_stock(
 
     # Проверяем что остаток не уходит в минус
     if new_quantity < 0:
+        STOCK_ADJUSTMENT_REJECTED.labels(reason="insufficient_stock").inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient stock. Available: {stock.quantity}, requested: {abs(adjustment.adjustment)}"
@@ -225,6 +230,7 @@ def adjust_stock(
     stock.quantity = new_quantity
     db.commit()
     db.refresh(stock)
+    STOCK_ADJUSTMENTS.labels(kind="increase" if adjustment.adjustment >= 0 else "decrease").inc()
 
     # Получаем дополнительную информацию
     ingredient = db.query(Ingredient).filter(Ingredient.id == stock.ingredient_id).first()
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import uuid
+from ..db import get_db, get_read_db
+from ..models import StockTransfer
+from ..schemas import StockTransferCreate, StockDistributionCreate, StockTransferResponse
+from ..stock_transfer import load_transfers, merge_items, move_stock, transfer_options, transfer_to_dict
+
+router = APIRouter(prefix="/stock-transfers", tags=["stock-transfers"])
+
+
+@router.get("", response_model=List[StockTransferResponse])
+def get_transfers(
+    location_id: Optional[int] = None,
+    batch_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Журнал перемещений (новые первыми)
+
+    Параметры:
+    - location_id: перемещения с точки или на точку
+    - batch_id: документы одной развозки
+    """
+    query = db.query(StockTransfer).options(*transfer_options())
+    if location_id is not None:
+        query = query.filter(or_(
+            StockTransfer.from_location_id == location_id,
+            StockTransfer.to_location_id == location_id
+        ))
+    if batch_id:
+        query = query.filter(StockTransfer.batch_id == batch_id)
+    transfers = query.order_by(StockTransfer.id.desc()).offset(skip).limit(limit).all()
+    return [transfer_to_dict(transfer) for transfer in transfers]
+
+
+@router.get("/{transfer_id}", response_model=StockTransferResponse)
+def get_transfer(transfer_id: int, db: Session = Depends(get_read_db)):
+    """Документ перемещения"""
+    transfer = db.query(StockTransfer).options(*transfer_options()).filter(
+        StockTransfer.id == transfer_id
+    ).first()
+    if not transfer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Перемещение с ID {transfer_id} не найдено"
+        )
+    return transfer_to_dict(transfer)
+
+
+@router.post("", response_model=StockTransferResponse, status_code=status.HTTP_201_CREATED)
+def create_transfer(transfer_data: StockTransferCreate, db: Session = Depends(get_db)):
+    """
+    Переместить ингредиенты с одной точки на другую
+
+    Все строки проводятся одной транзакцией: если хоть чего-то не хватает
+    на точке-отправителе - 400 со списком нехватки, остатки не меняются.
+    """
+    transfers = move_stock(
+        db,
+        transfer_data.from_location_id,
+        [(transfer_data.to_location_id, merge_items(transfer_data.items))],
+        comment=transfer_data.comment
+    )
+    return load_transfers(db, [transfer.id for transfer in transfers])[0]
+
+
+@router.post("/bulk", response_model=List[StockTransferResponse], status_code=status.HTTP_201_CREATED)
+def create_distribution(distribution: StockDistributionCreate, db: Session = Depends(get_db)):
+    """
+    Развозка с одной точки на несколько (например, центральный цех -> все кофейни)
+
+    Один документ на каждую точку-получатель, общий batch_id, одна транзакция
+    на всю развозку: хватать должно на все точки сразу.
+    """
+    transfers = move_stock(
+        db,
+        distribution.from_location_id,
+        [(target.to_location_id, merge_items(target.items)) for target in distribution.destinations],
+        comment=distribution.comment,
+        batch_id=uuid.uuid4().hex
+    )
+    return load_transfers(db, [transfer.id for transfer in transfers])
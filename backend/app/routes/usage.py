@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from ..db import get_db
+from ..usage import REFERENCES, where_used
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+@router.get("/{kind}/{obj_id}")
+def get_usage(kind: str, obj_id: int, db: Session = Depends(get_db)):
+    """
+    Где используется объект
+
+    kind: location, category, ingredient, recipe, semifinished, product
+
+    Для каждой ссылающейся таблицы - количество строк, блокирует ли она удаление
+    и названия владельцев (например, техкарты, в которых есть ингредиент).
+    """
+    if kind not in REFERENCES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Неизвестный вид объекта '{kind}'. Доступны: {', '.join(REFERENCES)}"
+        )
+
+    model, title, _ = REFERENCES[kind]
+    if db.query(model.id).filter(model.id == obj_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{title} с ID {obj_id} не существует"
+        )
+
+    return where_used(db, kind, obj_id)
@@ -1,27 +1,41 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 import json
 import asyncio
+import time
+from ..db import SessionLocal
+from ..stock_alerts import load_low_stock
+from ..metrics import (
+    WEBSOCKET_CONNECTIONS,
+    WEBSOCKET_BROADCAST_SECONDS,
+    WEBSOCKET_BROADCAST_RECIPIENTS,
+    WEBSOCKET_SEND_ERRORS
+)
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
 
 
 class ConnectionManager:
-    """Управление WebSocket соединениями для Kitchen Display"""
+    """Управление WebSocket соединениями (Kitchen Display, админка)"""
 
-    def __init__(self):
+    def __init__(self, channel: str = "kitchen", title: str = "Kitchen Display"):
         self.active_connections: List[WebSocket] = []
+        self.channel = channel  # метка для метрик
+        self.title = title  # для логов
 
     async def connect(self, websocket: WebSocket):
         """Подключить новый WebSocket"""
         await websocket.accept()
         self.active_connections.append(websocket)
-        print(f"✅ Kitchen Display подключен. Всего подключений: {len(self.active_connections)}")
+        WEBSOCKET_CONNECTIONS.labels(channel=self.channel).set(len(self.active_connections))
+        print(f"✅ {self.title} подключен. Всего подключений: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """Отключить WebSocket"""
         self.active_connections.remove(websocket)
-        print(f"❌ Kitchen Display отключен. Осталось подключений: {len(self.active_connections)}")
+        WEBSOCKET_CONNECTIONS.labels(channel=self.channel).set(len(self.active_connections))
+        print(f"❌ {self.title} отключен. Осталось подключений: {len(self.active_connections)}")
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Отправить сообщение конкретному клиенту"""
@@ -29,12 +43,15 @@ class ConnectionManager:
 
     async def broadcast(self, message: dict):
         """Отправить сообщение всем подключенным клиентам"""
+        started = time.perf_counter()
+        recipients = len(self.active_connections)
         disconnected = []
         for connection in self.active_connections:
             try:
                 await connection.send_json(message)
             except Exception as e:
                 print(f"⚠️ Ошибка отправки сообщения: {e}")
+                WEBSOCKET_SEND_ERRORS.labels(channel=self.channel).inc()
                 disconnected.append(connection)
 
         # Удаляем разорванные соединения
@@ -42,9 +59,14 @@ class ConnectionManager:
             if connection in self.active_connections:
                 self.active_connections.remove(connection)
 
+        WEBSOCKET_CONNECTIONS.labels(channel=self.channel).set(len(self.active_connections))
+        WEBSOCKET_BROADCAST_RECIPIENTS.labels(channel=self.channel).observe(recipients)
+        WEBSOCKET_BROADCAST_SECONDS.labels(channel=self.channel).observe(time.perf_counter() - started)
 
-# Singleton instance
+
+# Singleton instances
 manager = ConnectionManager()
+admin_manager = ConnectionManager(channel="admin", title="Экран админки")
 
 
 @router.websocket("/kitchen")
@@ -80,5 +102,47 @@ async def kitchen_websocket(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-# Экспортируем manager для использования в других модулях
-__all__ = ["router", "manager"]
+def _low_stock_snapshot(location_id: Optional[int]) -> list:
+    db = SessionLocal()
+    try:
+        return load_low_stock(db, location_id)
+    finally:
+        db.close()
+
+
+@router.websocket("/admin")
+async def admin_websocket(websocket: WebSocket, location_id: Optional[int] = None):
+    """
+    WebSocket endpoint для админки
+
+    При подключении - список остатков ниже минимума (low_stock_snapshot),
+    дальше - уведомления stock_alerts о переходе остатков через минимум
+    (см. app/stock_alerts.py). location_id - снимок только по одной точке.
+    """
+    await admin_manager.connect(websocket)
+
+    try:
+        await websocket.send_json({
+            "type": "connected",
+            "message": "Админка подключена к серверу",
+            "timestamp": asyncio.get_event_loop().time()
+        })
+        await websocket.send_json({
+            "type": "low_stock_snapshot",
+            "items": await run_in_threadpool(_low_stock_snapshot, location_id)
+        })
+
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_json({"type": "pong"})
+
+    except WebSocketDisconnect:
+        admin_manager.disconnect(websocket)
+    except Exception as e:
+        print(f"WebSocket ошибка: {e}")
+        admin_manager.disconnect(websocket)
+
+
+# Экспортируем менеджеры для использования в других модулях
+__all__ = ["router", "manager", "admin_manager"]
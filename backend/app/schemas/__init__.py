@@ -6,7 +6,9 @@ from .ingredient import (
     IngredientCreate,
     IngredientUpdate,
     IngredientResponse,
-    IngredientStockUpdate
+    IngredientStockUpdate,
+    IngredientPriceChange,
+    IngredientPriceBulkUpdate
 )
 from .recipe import (
     RecipeCreate,
@@ -44,7 +46,10 @@ from .modifier import (
 from .location import (
     LocationCreate,
     LocationUpdate,
-    LocationResponse
+    LocationResponse,
+    LocationOverrideItem,
+    LocationOverridesUpdate,
+    LocationOverrideResponse
 )
 from .stock import (
     StockCreate,
@@ -53,6 +58,14 @@ from .stock import (
     StockResponse,
     StockListItem
 )
+from .stock_transfer import (
+    StockTransferItemCreate,
+    StockTransferCreate,
+    StockDistributionTarget,
+    StockDistributionCreate,
+    StockTransferItemResponse,
+    StockTransferResponse
+)
 
 __all__ = [
     "ProductCreate",
@@ -71,6 +84,8 @@ __all__ = [
     "IngredientUpdate",
     "IngredientResponse",
     "IngredientStockUpdate",
+    "IngredientPriceChange",
+    "IngredientPriceBulkUpdate",
     "RecipeCreate",
     "RecipeUpdate",
     "RecipeResponse",
@@ -99,9 +114,18 @@ __all__ = [
     "LocationCreate",
     "LocationUpdate",
     "LocationResponse",
+    "LocationOverrideItem",
+    "LocationOverridesUpdate",
+    "LocationOverrideResponse",
     "StockCreate",
     "StockUpdate",
     "StockAdjust",
     "StockResponse",
-    "StockListItem"
+    "StockListItem",
+    "StockTransferItemCreate",
+    "StockTransferCreate",
+    "StockDistributionTarget",
+    "StockDistributionCreate",
+    "StockTransferItemResponse",
+    "StockTransferResponse"
 ]
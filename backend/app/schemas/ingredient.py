@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
 
 
@@ -7,6 +7,7 @@ class IngredientBase(BaseModel):
     """Базовые поля ингредиента"""
     name: str = Field(..., min_length=1, max_length=200, description="Название ингредиента")
     category: Optional[str] = Field(None, max_length=100, description="Категория (Молочные, Кофе и т.д.)")
+    category_id: Optional[int] = Field(None, description="ID категории из таблицы categories")
     unit: Literal["кг", "г", "л", "мл", "шт"] = Field(..., description="Единица измерения")
     purchase_price: float = Field(..., ge=0, description="Закупочная цена за единицу")
     packaging_info: Optional[str] = Field(None, description="Информация об упаковке (например: 'Коробка 12шт по 1.2кг')")
@@ -21,6 +22,7 @@ class IngredientUpdate(BaseModel):
     """Схема для обновления ингредиента (все поля опциональные)"""
     name: Optional[str] = Field(None, min_length=1, max_length=200)
     category: Optional[str] = Field(None, max_length=100)
+    category_id: Optional[int] = None
     unit: Optional[Literal["кг", "г", "л", "мл", "шт"]] = None
     purchase_price: Optional[float] = Field(None, ge=0)
     packaging_info: Optional[str] = None
@@ -31,6 +33,7 @@ class IngredientResponse(BaseModel):
     id: int
     name: str
     category: Optional[str]
+    category_id: Optional[int] = None
     unit: str
     purchase_price: float
     packaging_info: Optional[str]
@@ -49,3 +52,18 @@ class IngredientStockUpdate(BaseModel):
     """Схема для обновления остатка (приход/расход)"""
     quantity: float = Field(..., description="Количество (положительное для прихода, отрицательное для расхода)")
     reason: Optional[str] = Field(None, description="Причина изменения (закупка, списание, инвентаризация)")
+
+
+class IngredientPriceChange(BaseModel):
+    """Новая закупочная цена одного ингредиента"""
+    ingredient_id: int
+    purchase_price: float = Field(..., ge=0, description="Новая закупочная цена за единицу")
+
+
+class IngredientPriceBulkUpdate(BaseModel):
+    """Схема для массового изменения цен (прайс поставщика)"""
+    items: List[IngredientPriceChange] = Field(..., min_length=1, description="Новые цены")
+    dry_run: bool = Field(False, description="Только посчитать последствия, цены не менять")
+    min_markup: Optional[float] = Field(
+        None, description="Наценка (%), ниже которой техкарта отмечается как проблемная"
+    )
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -32,3 +32,51 @@ class LocationResponse(LocationBase):
 
     class Config:
         from_attributes = True
+
+
+class LocationOverrideItem(BaseModel):
+    """Цена/доступность товара или техкарты на точке (None - общее значение)"""
+    product_id: Optional[int] = None
+    recipe_id: Optional[int] = None
+    price: Optional[float] = Field(None, ge=0, description="Цена на точке")
+    is_available: Optional[bool] = Field(None, description="Доступность на точке")
+
+    @model_validator(mode='after')
+    def validate_target(self):
+        """Ровно одно из product_id / recipe_id"""
+        if (self.product_id is None) == (self.recipe_id is None):
+            raise ValueError('Укажите product_id или recipe_id (одно из двух)')
+        return self
+
+
+class LocationOverridesUpdate(BaseModel):
+    """
+    Изменение исключений точки
+
+    Строка с price=None и is_available=None удаляет исключение
+    (товар на точке снова по общей цене и доступности).
+    """
+    items: List[LocationOverrideItem] = Field(..., min_length=1)
+
+    @model_validator(mode='after')
+    def validate_unique_targets(self):
+        """Каждый товар/техкарта - не больше одного раза (иначе удаление и создание одной строки конфликтуют)"""
+        seen = set()
+        for item in self.items:
+            key = ("product_id", item.product_id) if item.product_id is not None else ("recipe_id", item.recipe_id)
+            if key in seen:
+                raise ValueError(f'{key[0]}={key[1]} указан несколько раз')
+            seen.add(key)
+        return self
+
+
+class LocationOverrideResponse(BaseModel):
+    """Исключение точки + общие значения для сравнения"""
+    id: int
+    location_id: int
+    product_id: Optional[int] = None
+    recipe_id: Optional[int] = None
+    name: Optional[str] = None
+    base_price: Optional[float] = None
+    price: Optional[float] = None
+    is_available: Optional[bool] = None
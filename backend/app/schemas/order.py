@@ -1,14 +1,24 @@
 from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Optional
 from datetime import datetime
+from ..models.location import DEFAULT_LOCATION_ID
 from ..models.order import PaymentMethod, OrderStatus, ItemType
 
 
+class OrderItemModifier(BaseModel):
+    """Модификатор позиции (название и цена берутся из каталога, от кассы - только id)"""
+    modifier_id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+
+
 class OrderItemBase(BaseModel):
     """Позиция в заказе"""
     item_type: ItemType = ItemType.PRODUCT
     product_id: Optional[int] = None
     recipe_id: Optional[int] = None
+    variant_id: Optional[int] = None  # Вариант (размер) товара
+    modifiers: Optional[List[OrderItemModifier]] = None
     quantity: int = Field(..., gt=0)
 
     @model_validator(mode='after')
@@ -18,6 +28,8 @@ class OrderItemBase(BaseModel):
             raise ValueError('product_id is required for product items')
         if self.item_type == ItemType.RECIPE and not self.recipe_id:
             raise ValueError('recipe_id is required for recipe items')
+        if self.variant_id and self.item_type != ItemType.PRODUCT:
+            raise ValueError('variant_id is allowed only for product items')
 
         return self
 
@@ -28,6 +40,8 @@ class OrderItemResponse(BaseModel):
     item_type: ItemType
     product_id: Optional[int] = None
     recipe_id: Optional[int] = None
+    variant_id: Optional[int] = None
+    modifiers: Optional[List[dict]] = None
     item_name: str
     quantity: int
     price: float
@@ -41,12 +55,19 @@ class OrderCreate(BaseModel):
     """Создание заказа"""
     items: List[OrderItemBase] = Field(..., min_length=1)
     payment_method: PaymentMethod
+    location_id: int = Field(
+        DEFAULT_LOCATION_ID, description="ID точки (по умолчанию та же, что у меню кассы без location_id)"
+    )
+    check_stock: bool = Field(
+        True, description="Проверять остатки точки (false - заказ из офлайн-очереди, уже продан)"
+    )
 
 
 class OrderResponse(BaseModel):
     """Ответ с заказом"""
     id: int
     order_number: str
+    location_id: Optional[int] = None
     total_amount: float
     payment_method: PaymentMethod
     status: OrderStatus
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class StockTransferItemCreate(BaseModel):
+    """Строка перемещения"""
+    ingredient_id: int = Field(..., description="ID ингредиента")
+    quantity: float = Field(..., gt=0, description="Количество (в единицах ингредиента)")
+
+
+class StockTransferCreate(BaseModel):
+    """Перемещение остатков с одной точки на другую"""
+    from_location_id: int = Field(..., description="Откуда")
+    to_location_id: int = Field(..., description="Куда")
+    items: List[StockTransferItemCreate] = Field(..., min_length=1)
+    comment: Optional[str] = Field(None, max_length=500)
+
+
+class StockDistributionTarget(BaseModel):
+    """Точка-получатель в развозке"""
+    to_location_id: int = Field(..., description="Куда")
+    items: List[StockTransferItemCreate] = Field(..., min_length=1)
+
+
+class StockDistributionCreate(BaseModel):
+    """Развозка с одной точки (центральный цех) на несколько точек одной транзакцией"""
+    from_location_id: int = Field(..., description="Откуда")
+    destinations: List[StockDistributionTarget] = Field(..., min_length=1)
+    comment: Optional[str] = Field(None, max_length=500)
+
+
+class StockTransferItemResponse(BaseModel):
+    """Строка перемещения (ответ)"""
+    ingredient_id: int
+    ingredient_name: Optional[str] = None
+    unit: Optional[str] = None
+    quantity: float
+
+
+class StockTransferResponse(BaseModel):
+    """Документ перемещения"""
+    id: int
+    number: str
+    from_location_id: int
+    from_location_name: Optional[str] = None
+    to_location_id: int
+    to_location_name: Optional[str] = None
+    batch_id: Optional[str] = None
+    comment: Optional[str] = None
+    created_at: datetime
+    items: List[StockTransferItemResponse] = []
@@ -0,0 +1,48 @@
+"""
+Нормализация названий для поиска (ингредиенты)
+
+В БД рядом с названием хранится search_name: название в нижнем регистре
+(ё -> е, лишние пробелы убраны) и, если в нём есть кириллица, через пробел
+его транслитерация латиницей. Поэтому один LIKE по search_name находит
+«Молоко» и по «мол», и по «molo», а китайская часть названия ищется как есть.
+
+На PostgreSQL по search_name построен триграммный GIN-индекс (pg_trgm),
+и LIKE '%...%' идёт по индексу; на SQLite - обычный просмотр колонки.
+"""
+import re
+from typing import Optional
+
+_TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    # Казахские буквы
+    "ә": "a", "ғ": "g", "қ": "q", "ң": "n", "ө": "o", "ұ": "u", "ү": "u", "һ": "h", "і": "i",
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Нижний регистр, ё -> е, один пробел между словами"""
+    if not text:
+        return ""
+    return _SPACES.sub(" ", text.lower().replace("ё", "е")).strip()
+
+
+def transliterate(text: str) -> str:
+    """Кириллица -> латиница (остальные символы без изменений)"""
+    return "".join(_TRANSLIT.get(char, char) for char in text)
+
+
+def search_key(name: Optional[str]) -> str:
+    """Значение search_name для названия"""
+    normalized = normalize(name)
+    latin = transliterate(normalized)
+    return normalized if latin == normalized else f"{normalized} {latin}"
+
+
+def escape_like(text: str) -> str:
+    """Экранировать % и _ для LIKE ... ESCAPE '\\'"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,214 @@
+"""
+Сколько порций можно продать из текущих остатков (по точкам)
+
+Для каждой техкарты на точке: min(остаток / расход на порцию) по её
+ингредиентам, включая ингредиенты полуфабрикатов (app/consumption.py).
+Вариант товара продаётся столько раз, сколько его техкарта.
+
+Значения поддерживаются в памяти процесса, а не пересчитываются на каждый
+запрос меню:
+- состав техкарт и обратный индекс ингредиент -> техкарты строятся один раз
+  и перестраиваются после изменения каталога (ревизия catalog_cache)
+- остатки точки загружаются одним запросом при первом обращении к точке
+- дальше подписчик stock_events обновляет остаток и пересчитывает только
+  техкарты с изменившимся ингредиентом
+
+Касса (/pos/items, карточка товара) выключает позиции с 0 порций, POST /orders
+отклоняет заказ, если порций техкарты меньше, чем в заказе (кроме заказов из
+офлайн-очереди - они уже проданы). Продажи остатки пока не списывают, поэтому
+порции меняются только корректировками, приходом и перемещениями.
+
+Ингредиент без строки Stock на точке не учитывается (остатки по нему не
+ведутся) - техкарта без учитываемых ингредиентов не ограничена (None).
+
+Массовые update(Stock) и изменения из других процессов (несколько воркеров
+uvicorn) событий не дают - остатки точки перечитываются не реже чем раз
+в SELLABLE_REFRESH_SECONDS.
+"""
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from . import catalog_cache, stock_events
+from .consumption import Requirements, load_recipe_requirements
+from .models import ProductVariant, Stock
+from .stock_events import StockChange
+
+# Как часто перечитывать остатки точки целиком (секунды)
+SELLABLE_REFRESH_SECONDS = float(os.getenv("SELLABLE_REFRESH_SECONDS", "60"))
+
+# Погрешность float: 0.3 / 0.1 = 2.9999999999999996 - это 3 порции
+_EPSILON = 1e-9
+
+_lock = threading.Lock()
+_catalog_revision: Optional[int] = None
+_requirements: Dict[int, Requirements] = {}
+_recipes_by_ingredient: Dict[int, Set[int]] = {}
+_variant_recipes: Dict[int, int] = {}  # активный вариант -> техкарта
+_product_variants: Dict[int, List[int]] = {}  # товар -> активные варианты
+
+# Ниже - по точкам
+_stock: Dict[int, Dict[int, float]] = {}
+_portions: Dict[int, Dict[int, Optional[int]]] = {}
+_loaded_at: Dict[int, float] = {}
+
+
+def portions(requirements: Requirements, stock: Dict[int, float]) -> Optional[int]:
+    """Сколько порций выйдет из остатков (None - не ограничено остатками)"""
+    result = None
+    for ingredient_id, amount in requirements.items():
+        if amount <= 0 or ingredient_id not in stock:
+            continue
+        count = math.floor(max(stock[ingredient_id], 0.0) / amount + _EPSILON)
+        if result is None or count < result:
+            result = count
+    return result
+
+
+def _load_catalog(db: Session):
+    """Состав техкарт, обратный индекс и варианты товаров (под _lock)"""
+    global _catalog_revision, _requirements, _recipes_by_ingredient, _variant_recipes, _product_variants
+    revision = catalog_cache.revision()
+    requirements = load_recipe_requirements(db)
+
+    by_ingredient: Dict[int, Set[int]] = defaultdict(set)
+    for recipe_id, items in requirements.items():
+        for ingredient_id in items:
+            by_ingredient[ingredient_id].add(recipe_id)
+
+    variant_recipes: Dict[int, int] = {}
+    product_variants: Dict[int, List[int]] = defaultdict(list)
+    for row in db.query(ProductVariant.id, ProductVariant.base_product_id, ProductVariant.recipe_id).filter(
+        ProductVariant.is_active == True
+    ):
+        variant_recipes[row.id] = row.recipe_id
+        product_variants[row.base_product_id].append(row.id)
+
+    _requirements = requirements
+    _recipes_by_ingredient = dict(by_ingredient)
+    _variant_recipes = variant_recipes
+    _product_variants = dict(product_variants)
+    _catalog_revision = revision
+    # Состав мог измениться - пересчитать уже загруженные точки по имеющимся остаткам
+    for location_id, stock in _stock.items():
+        _portions[location_id] = _compute(stock)
+    print(f"🧮 Доступность по остаткам: {len(requirements)} техкарт, {len(by_ingredient)} ингредиентов")
+
+
+def _compute(stock: Dict[int, float]) -> Dict[int, Optional[int]]:
+    return {recipe_id: portions(items, stock) for recipe_id, items in _requirements.items()}
+
+
+def _load_location(db: Session, location_id: int):
+    """Остатки точки одним запросом и порции всех техкарт (под _lock)"""
+    stock = dict(db.query(Stock.ingredient_id, Stock.quantity).filter(Stock.location_id == location_id).all())
+    _stock[location_id] = stock
+    _portions[location_id] = _compute(stock)
+    _loaded_at[location_id] = time.monotonic()
+
+
+def _on_stock_change(changes: List[StockChange]):
+    """Подписчик stock_events: обновить остатки и пересчитать затронутые техкарты"""
+    with _lock:
+        affected: Dict[int, Set[int]] = defaultdict(set)
+        for change in changes:
+            stock = _stock.get(change.location_id)
+            if stock is None:
+                continue  # точку ещё не запрашивали - загрузится целиком
+            if change.quantity is None:
+                stock.pop(change.ingredient_id, None)
+            else:
+                stock[change.ingredient_id] = change.quantity
+            affected[change.location_id] |= _recipes_by_ingredient.get(change.ingredient_id, set())
+
+        for location_id, recipe_ids in affected.items():
+            stock = _stock[location_id]
+            location_portions = _portions[location_id]
+            for recipe_id in recipe_ids:
+                location_portions[recipe_id] = portions(_requirements[recipe_id], stock)
+
+
+stock_events.subscribe(_on_stock_change)
+
+
+def get_sellable(db: Session, location_id: int) -> dict:
+    """
+    Порции по техкартам и вариантам на точке
+
+    {"recipes": {recipe_id: порций}, "variants": {variant_id: порций},
+    "products": {product_id: порций}} - None значит «не ограничено остатками».
+    Товар с вариантами продаётся, пока продаётся хотя бы один вариант.
+    Запросы к БД - только после изменения каталога или раз в SELLABLE_REFRESH_SECONDS.
+    """
+    with _lock:
+        if _catalog_revision != catalog_cache.revision():
+            _load_catalog(db)
+        loaded_at = _loaded_at.get(location_id)
+        if loaded_at is None or time.monotonic() - loaded_at >= SELLABLE_REFRESH_SECONDS:
+            _load_location(db, location_id)
+
+        recipes = dict(_portions[location_id])
+        variants = {
+            variant_id: recipes.get(recipe_id)
+            for variant_id, recipe_id in _variant_recipes.items()
+        }
+        products = {}
+        for product_id, variant_ids in _product_variants.items():
+            counts = [variants[variant_id] for variant_id in variant_ids]
+            products[product_id] = None if None in counts else max(counts)
+    return {"recipes": recipes, "variants": variants, "products": products}
+
+
+def apply_to_items(items: List[dict], sellable: dict) -> List[dict]:
+    """
+    Позиции кассы (catalog.load_pos_items) с доступностью по остаткам
+
+    Кэшированные словари не меняются - возвращаются копии с полем
+    sellable_quantity; is_available сбрасывается, если порций 0.
+    """
+    result = []
+    for item in items:
+        if item["type"] == "recipe":
+            quantity = sellable["recipes"].get(item["id"])
+        else:
+            quantity = sellable["products"].get(item["id"])
+        result.append({
+            **item,
+            "is_available": bool(item["is_available"]) and quantity != 0,
+            "sellable_quantity": quantity
+        })
+    return result
+
+
+def apply_to_card(card: dict, sellable: dict) -> dict:
+    """Карточка товара (catalog.load_product_card) с доступностью вариантов по остаткам"""
+    variants = []
+    for variant in card["variants"]:
+        quantity = sellable["variants"].get(variant["id"])
+        variants.append({**variant, "sellable_quantity": quantity, "is_sellable": quantity != 0})
+    product = card["product"]
+    quantity = sellable["products"].get(product["id"])
+    return {
+        **card,
+        "product": {
+            **product,
+            "is_available": bool(product["is_available"]) and quantity != 0,
+            "sellable_quantity": quantity
+        },
+        "variants": variants
+    }
+
+
+def reset():
+    """Забыть всё (после массовых изменений остатков в обход ORM)"""
+    global _catalog_revision
+    with _lock:
+        _catalog_revision = None
+        _stock.clear()
+        _portions.clear()
+        _loaded_at.clear()
@@ -0,0 +1,184 @@
+"""
+Уведомления о низком остатке (push в админку по WebSocket /api/ws/admin)
+
+Остатки не сканируются: проверяются только строки Stock, изменённые
+закоммиченной транзакцией (app/stock_events.py), и только переход через
+порог quantity <= min_stock:
+- low_stock - остаток опустился до минимума или ниже
+- stock_restored - остаток снова выше минимума
+
+Debounce: переходы копятся STOCK_ALERT_DEBOUNCE_SECONDS, затем уходят одним
+сообщением, и по каждой паре точка/ингредиент - только итоговое состояние,
+если оно отличается от уже отправленного. Продажа, которая несколько раз
+дёргает остаток туда-обратно через порог, даёт одно уведомление или ни одного.
+
+Движок работает в процессе приложения: start() при запуске (lifespan),
+stop() при остановке. Без start() (скрипты, миграции) подписки нет.
+"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import stock_events
+from .db import SessionLocal
+from .metrics import STOCK_ALERTS
+from .models import Ingredient, Location, Stock
+from .stock_events import StockChange
+
+# Сколько секунд копить переходы перед отправкой
+STOCK_ALERT_DEBOUNCE_SECONDS = float(os.getenv("STOCK_ALERT_DEBOUNCE_SECONDS", "2"))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_broadcast: Optional[Callable[[dict], Awaitable[None]]] = None
+
+# Ниже доступны только из потока event loop
+_pending: Dict[Tuple[int, int], StockChange] = {}
+_low_sent: Dict[Tuple[int, int], bool] = {}  # последнее отправленное состояние (True - низкий)
+_flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+def start(loop: asyncio.AbstractEventLoop, broadcast: Callable[[dict], Awaitable[None]]):
+    """Подписаться на изменения остатков и слать уведомления через broadcast"""
+    global _loop, _broadcast
+    _loop, _broadcast = loop, broadcast
+    stock_events.subscribe(_on_stock_change)
+
+
+def stop():
+    global _loop, _broadcast, _flush_handle
+    stock_events.unsubscribe(_on_stock_change)
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+    _loop, _broadcast, _flush_handle = None, None, None
+    _pending.clear()
+    _low_sent.clear()
+
+
+def _on_stock_change(changes: List[StockChange]):
+    """Подписчик stock_events: отбираем переходы через порог и передаём в event loop"""
+    crossings = [
+        change for change in changes
+        if change.was_low != change.is_low or change.quantity is None
+    ]
+    loop = _loop
+    if crossings and loop is not None and not loop.is_closed():
+        loop.call_soon_threadsafe(_enqueue, crossings)
+
+
+def _enqueue(crossings: List[StockChange]):
+    global _flush_handle
+    for change in crossings:
+        key = (change.location_id, change.ingredient_id)
+        if change.quantity is None:
+            # Строку остатка удалили - ингредиент больше не отслеживается на точке
+            _pending.pop(key, None)
+            _low_sent.pop(key, None)
+            continue
+        # Первое изменение пары: «отправленное» состояние - то, что было до него
+        _low_sent.setdefault(key, change.was_low)
+        _pending[key] = change
+    if _pending and _flush_handle is None:
+        _flush_handle = _loop.call_later(STOCK_ALERT_DEBOUNCE_SECONDS, _schedule_flush)
+
+
+def _schedule_flush():
+    global _flush_handle
+    _flush_handle = None
+    asyncio.ensure_future(_flush())
+
+
+async def _flush():
+    batch = list(_pending.values())
+    _pending.clear()
+
+    changed = []
+    for change in batch:
+        key = (change.location_id, change.ingredient_id)
+        if _low_sent.get(key) == change.is_low:
+            continue  # вернулось к уже отправленному состоянию
+        if change.is_low:
+            _low_sent[key] = True
+        else:
+            _low_sent.pop(key, None)
+        changed.append(change)
+    if not changed or _broadcast is None:
+        return
+
+    names = await asyncio.get_running_loop().run_in_executor(None, _load_names, changed)
+    alerts = []
+    for change in changed:
+        ingredient_name, unit, location_name = names.get(
+            (change.location_id, change.ingredient_id), (None, None, None)
+        )
+        alert_type = "low_stock" if change.is_low else "stock_restored"
+        STOCK_ALERTS.labels(type=alert_type).inc()
+        alerts.append({
+            "type": alert_type,
+            "location_id": change.location_id,
+            "location_name": location_name,
+            "ingredient_id": change.ingredient_id,
+            "ingredient_name": ingredient_name,
+            "unit": unit,
+            "quantity": change.quantity,
+            "min_stock": change.min_stock
+        })
+
+    low = sum(1 for alert in alerts if alert["type"] == "low_stock")
+    print(f"🔔 Остатки: {low} ниже минимума, {len(alerts) - low} восстановлено")
+    await _broadcast({"type": "stock_alerts", "alerts": alerts})
+
+
+def _load_names(changes: List[StockChange]) -> Dict[Tuple[int, int], tuple]:
+    """Названия ингредиентов и точек для уведомлений - один запрос"""
+    ingredient_ids = {change.ingredient_id for change in changes}
+    location_ids = {change.location_id for change in changes}
+    db = SessionLocal()
+    try:
+        ingredients = {
+            row.id: (row.name, row.unit)
+            for row in db.query(Ingredient.id, Ingredient.name, Ingredient.unit).filter(Ingredient.id.in_(ingredient_ids))
+        }
+        locations = {
+            row.id: row.name
+            for row in db.query(Location.id, Location.name).filter(Location.id.in_(location_ids))
+        }
+    finally:
+        db.close()
+    return {
+        (change.location_id, change.ingredient_id): (
+            *ingredients.get(change.ingredient_id, (None, None)),
+            locations.get(change.location_id)
+        )
+        for change in changes
+    }
+
+
+def load_low_stock(db: Session, location_id: Optional[int] = None) -> List[dict]:
+    """Текущие остатки ниже минимума (снимок для только что подключившейся админки)"""
+    query = db.query(
+        Stock.location_id,
+        Location.name.label("location_name"),
+        Stock.ingredient_id,
+        Ingredient.name.label("ingredient_name"),
+        Ingredient.unit,
+        Stock.quantity,
+        Stock.min_stock
+    ).join(Ingredient, Stock.ingredient_id == Ingredient.id).join(
+        Location, Stock.location_id == Location.id
+    ).filter(Stock.quantity <= Stock.min_stock)
+    if location_id is not None:
+        query = query.filter(Stock.location_id == location_id)
+    return [
+        {
+            "location_id": row.location_id,
+            "location_name": row.location_name,
+            "ingredient_id": row.ingredient_id,
+            "ingredient_name": row.ingredient_name,
+            "unit": row.unit,
+            "quantity": row.quantity,
+            "min_stock": row.min_stock
+        }
+        for row in query.order_by(Stock.location_id, Ingredient.name)
+    ]
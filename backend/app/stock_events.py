@@ -0,0 +1,116 @@
+"""
+События изменения остатков (Stock)
+
+Любое изменение остатка через ORM (корректировка, приход, перемещение)
+попадает сюда из событий сессии (продажи остатки пока не списывают): в after_flush
+запоминаются только затронутые строки Stock со значениями «было / стало»,
+после коммита подписчики получают список StockChange. Откат транзакции -
+изменения забываются, подписчики ничего не получают.
+
+Подписка:
+    @stock_events.subscribe
+    def on_change(changes: List[StockChange]): ...
+
+Подписчик вызывается в потоке, который сделал коммит (обычно поток
+threadpool FastAPI) - долгую работу он должен передавать дальше сам.
+Массовые update(Stock) без ORM-объектов сюда не попадают.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from .db import SessionLocal
+
+_SESSION_KEY = "stock_changes"
+
+_subscribers: List[Callable[[List["StockChange"]], None]] = []
+
+
+class StockChange(NamedTuple):
+    """Изменение остатка ингредиента на точке за транзакцию"""
+    location_id: int
+    ingredient_id: int
+    old_quantity: Optional[float]  # None - строки не было
+    quantity: Optional[float]  # None - строка удалена
+    old_min_stock: Optional[float]
+    min_stock: Optional[float]
+
+    @property
+    def was_low(self) -> bool:
+        return self.old_quantity is not None and self.old_quantity <= (self.old_min_stock or 0)
+
+    @property
+    def is_low(self) -> bool:
+        return self.quantity is not None and self.quantity <= (self.min_stock or 0)
+
+
+def subscribe(callback: Callable[[List[StockChange]], None]):
+    """Подписаться на изменения остатков (можно как декоратор)"""
+    _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback: Callable[[List[StockChange]], None]):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def _old_value(state, attr: str):
+    """Значение атрибута до изменения (для незагруженного - текущее)"""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect(session, flush_context):
+    from .models import Stock  # models импортирует db - импорт здесь, без цикла
+
+    changes: Dict[Tuple[int, int], list] = session.info.get(_SESSION_KEY)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Stock):
+            continue
+        state = inspect(obj)
+        key = (obj.location_id, obj.ingredient_id)
+        if obj in session.new:
+            old = (None, None)
+            new = (obj.quantity, obj.min_stock)
+        elif obj in session.deleted:
+            old = (_old_value(state, "quantity"), _old_value(state, "min_stock"))
+            new = (None, None)
+        else:
+            if not (state.attrs.quantity.history.has_changes() or state.attrs.min_stock.history.has_changes()):
+                continue
+            old = (_old_value(state, "quantity"), _old_value(state, "min_stock"))
+            new = (obj.quantity, obj.min_stock)
+
+        if changes is None:
+            changes = session.info[_SESSION_KEY] = {}
+        if key in changes:
+            # Несколько flush в одной транзакции: «было» - из первого
+            changes[key][1] = new
+        else:
+            changes[key] = [old, new]
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _dispatch(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if not changes or not _subscribers:
+        return
+    batch = [
+        StockChange(location_id, ingredient_id, old[0], new[0], old[1], new[1])
+        for (location_id, ingredient_id), (old, new) in changes.items()
+    ]
+    for callback in list(_subscribers):
+        try:
+            callback(batch)
+        except Exception as e:
+            # Подписчик не должен ломать уже закоммиченный запрос
+            print(f"⚠️ Ошибка обработчика изменений остатков {callback.__name__}: {e}")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget(session):
+    session.info.pop(_SESSION_KEY, None)
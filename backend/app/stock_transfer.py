@@ -0,0 +1,208 @@
+"""
+Перемещение остатков между точками
+
+Списание на точке-отправителе и приход на точках-получателях проводятся
+одной транзакцией вместе с документами StockTransfer - либо всё, либо ничего
+(раньше это были два отдельных adjust_stock, и второй мог не пройти).
+
+Строки Stock всех участвующих точек блокируются одним SELECT ... FOR UPDATE
+в порядке (location_id, ingredient_id): два встречных перемещения берут
+блокировки в одном и том же порядке и не попадают в deadlock. На SQLite
+FOR UPDATE не поддерживается - там пишущая транзакция и так одна.
+
+Изменения идут через ORM-объекты Stock, поэтому stock_events (уведомления
+о низком остатке и т.п.) видят перемещения как обычные движения остатков.
+"""
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from .metrics import STOCK_ADJUSTMENTS
+from .models import Ingredient, Location, Stock, StockTransfer, StockTransferItem
+
+# (точка-получатель, {ingredient_id: количество})
+Move = Tuple[int, Dict[int, float]]
+
+
+def generate_transfer_number() -> str:
+    """Номер документа: TR-<время>-<случайная часть>"""
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    return f"TR-{timestamp}-{uuid.uuid4().hex[:8].upper()}"
+
+
+def merge_items(items) -> Dict[int, float]:
+    """Строки StockTransferItemCreate -> {ingredient_id: количество} (повторы складываются)"""
+    result: Dict[int, float] = {}
+    for item in items:
+        result[item.ingredient_id] = result.get(item.ingredient_id, 0.0) + item.quantity
+    return result
+
+
+def _format_quantity(value: float, unit: str) -> str:
+    return f"{round(value, 3):g} {unit}"
+
+
+def move_stock(
+    db: Session,
+    from_location_id: int,
+    moves: List[Move],
+    comment: Optional[str] = None,
+    batch_id: Optional[str] = None
+) -> List[StockTransfer]:
+    """
+    Провести перемещения с одной точки на одну или несколько точек
+
+    Одна транзакция: проверка точек и ингредиентов, блокировка остатков,
+    проверка, что на отправителе хватает на все перемещения сразу, списание,
+    приход (строка Stock на получателе создаётся при необходимости), документы.
+    """
+    location_ids = {from_location_id} | {to_location_id for to_location_id, _ in moves}
+    if any(to_location_id == from_location_id for to_location_id, _ in moves):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Точка-получатель совпадает с точкой-отправителем"
+        )
+    if len({to_location_id for to_location_id, _ in moves}) != len(moves):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Точка-получатель указана несколько раз"
+        )
+
+    locations = dict(db.query(Location.id, Location.name).filter(Location.id.in_(location_ids)).all())
+    missing = sorted(location_ids - set(locations))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Точки с ID {', '.join(map(str, missing))} не найдены"
+        )
+
+    totals: Dict[int, float] = {}
+    for _, items in moves:
+        for ingredient_id, quantity in items.items():
+            totals[ingredient_id] = totals.get(ingredient_id, 0.0) + quantity
+
+    ingredients = {
+        row.id: row
+        for row in db.query(Ingredient.id, Ingredient.name, Ingredient.unit).filter(Ingredient.id.in_(list(totals)))
+    }
+    missing = sorted(set(totals) - set(ingredients))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ингредиенты с ID {', '.join(map(str, missing))} не найдены"
+        )
+
+    # Блокировки в детерминированном порядке - одним запросом
+    stocks: Dict[Tuple[int, int], Stock] = {
+        (stock.location_id, stock.ingredient_id): stock
+        for stock in db.query(Stock).filter(
+            Stock.location_id.in_(location_ids),
+            Stock.ingredient_id.in_(list(totals))
+        ).order_by(Stock.location_id, Stock.ingredient_id).with_for_update()
+    }
+
+    shortages = []
+    for ingredient_id, needed in sorted(totals.items()):
+        source = stocks.get((from_location_id, ingredient_id))
+        available = source.quantity if source else 0.0
+        if available < needed:
+            ingredient = ingredients[ingredient_id]
+            shortages.append(
+                f"{ingredient.name} (есть {_format_quantity(available, ingredient.unit)}, "
+                f"нужно {_format_quantity(needed, ingredient.unit)})"
+            )
+    if shortages:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Недостаточно остатков на точке '{locations[from_location_id]}': {'; '.join(shortages)}"
+        )
+
+    for ingredient_id, needed in totals.items():
+        stocks[(from_location_id, ingredient_id)].quantity -= needed
+
+    transfers = []
+    for to_location_id, items in moves:
+        for ingredient_id, quantity in items.items():
+            target = stocks.get((to_location_id, ingredient_id))
+            if target is None:
+                target = Stock(location_id=to_location_id, ingredient_id=ingredient_id, quantity=0.0, min_stock=0.0)
+                db.add(target)
+                stocks[(to_location_id, ingredient_id)] = target
+            target.quantity += quantity
+
+        transfer = StockTransfer(
+            number=generate_transfer_number(),
+            from_location_id=from_location_id,
+            to_location_id=to_location_id,
+            batch_id=batch_id,
+            comment=comment,
+            items=[
+                StockTransferItem(ingredient_id=ingredient_id, quantity=quantity)
+                for ingredient_id, quantity in items.items()
+            ]
+        )
+        db.add(transfer)
+        transfers.append(transfer)
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Строку остатка на получателе параллельно создал другой запрос
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Остатки изменились во время перемещения, повторите запрос"
+        )
+
+    STOCK_ADJUSTMENTS.labels(kind="transfer").inc(len(transfers))
+    print(
+        f"🚚 Перемещение с '{locations[from_location_id]}': {len(transfers)} документов, "
+        f"{sum(len(items) for _, items in moves)} строк"
+    )
+    return transfers
+
+
+def transfer_options():
+    """Опции загрузки документа перемещения с точками и ингредиентами"""
+    return (
+        joinedload(StockTransfer.from_location),
+        joinedload(StockTransfer.to_location),
+        selectinload(StockTransfer.items).joinedload(StockTransferItem.ingredient),
+    )
+
+
+def transfer_to_dict(transfer: StockTransfer) -> dict:
+    """Документ в формате StockTransferResponse"""
+    return {
+        "id": transfer.id,
+        "number": transfer.number,
+        "from_location_id": transfer.from_location_id,
+        "from_location_name": transfer.from_location.name if transfer.from_location else None,
+        "to_location_id": transfer.to_location_id,
+        "to_location_name": transfer.to_location.name if transfer.to_location else None,
+        "batch_id": transfer.batch_id,
+        "comment": transfer.comment,
+        "created_at": transfer.created_at,
+        "items": [
+            {
+                "ingredient_id": item.ingredient_id,
+                "ingredient_name": item.ingredient.name if item.ingredient else None,
+                "unit": item.ingredient.unit if item.ingredient else None,
+                "quantity": item.quantity
+            }
+            for item in transfer.items
+        ]
+    }
+
+
+def load_transfers(db: Session, ids: List[int]) -> List[dict]:
+    """Документы по id (после проведения - уже с created_at из БД)"""
+    transfers = db.query(StockTransfer).options(*transfer_options()).filter(
+        StockTransfer.id.in_(ids)
+    ).order_by(StockTransfer.id).all()
+    return [transfer_to_dict(transfer) for transfer in transfers]
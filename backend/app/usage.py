@@ -0,0 +1,196 @@
+"""
+Где используется объект: проверки ссылок перед удалением и отчёт «где используется»
+
+Для каждого вида объекта (точка, категория, ингредиент, техкарта, полуфабрикат,
+товар) перечислены все таблицы, которые на него ссылаются. Ответы строятся
+запросами EXISTS/COUNT по индексированным внешним ключам - связи в память
+не загружаются, сколько бы заказов или строк техкарт ни было.
+
+- is_used(): один запрос EXISTS по всем ссылкам
+- usage_counts(): один запрос с COUNT по каждой ссылке
+- ensure_can_delete(): 400, если есть блокирующие ссылки (для DELETE-эндпоинтов)
+- where_used(): счётчики + названия владельцев (какие техкарты, какие товары)
+"""
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.orm import Session
+
+from .models import (
+    Category,
+    Ingredient,
+    Location,
+    LocationOverride,
+    Modifier,
+    ModifierGroup,
+    Order,
+    OrderItem,
+    Product,
+    ProductModifierGroup,
+    ProductVariant,
+    Recipe,
+    RecipeIngredient,
+    RecipeSemifinished,
+    Semifinished,
+    SemifinishedIngredient,
+    Stock,
+    StockTransfer,
+    StockTransferItem
+)
+
+# Сколько названий владельцев показывать в отчёте «где используется»
+WHERE_USED_LIMIT = 20
+
+
+class Reference:
+    """
+    Ссылка на объект из другой таблицы
+
+    column - внешний ключ, который указывает на объект
+    blocks_delete - удаление запрещено, пока есть такие строки
+      (RESTRICT в БД или история, которую нельзя терять)
+    owner - (модель, колонка с её id) - кому принадлежит строка: строка техкарты
+      принадлежит техкарте; None - владелец сама строка
+    """
+
+    def __init__(self, name: str, label: str, column, blocks_delete: bool = True,
+                 owner: Optional[Tuple[type, object]] = None):
+        self.name = name
+        self.label = label
+        self.column = column
+        self.blocks_delete = blocks_delete
+        self.owner = owner
+
+
+# Вид объекта -> (модель, название для сообщений, ссылки на него)
+REFERENCES: Dict[str, Tuple[type, str, List[Reference]]] = {
+    "location": (Location, "Точка", [
+        Reference("orders", "заказы", Order.location_id),
+        Reference("stocks", "остатки", Stock.location_id, blocks_delete=False),
+        Reference("stock_transfers_out", "перемещения с точки", StockTransfer.from_location_id),
+        Reference("stock_transfers_in", "перемещения на точку", StockTransfer.to_location_id),
+        Reference("location_overrides", "цены и доступность точки", LocationOverride.location_id, blocks_delete=False),
+    ]),
+    "category": (Category, "Категория", [
+        Reference("products", "товары", Product.category_id, owner=(Product, Product.id)),
+        Reference("recipes", "техкарты", Recipe.category_id, owner=(Recipe, Recipe.id)),
+        Reference("semifinished", "полуфабрикаты", Semifinished.category_id, blocks_delete=False,
+                  owner=(Semifinished, Semifinished.id)),
+        Reference("ingredients", "ингредиенты", Ingredient.category_id, blocks_delete=False,
+                  owner=(Ingredient, Ingredient.id)),
+    ]),
+    "ingredient": (Ingredient, "Ингредиент", [
+        Reference("recipe_ingredients", "строки техкарт", RecipeIngredient.ingredient_id,
+                  owner=(Recipe, RecipeIngredient.recipe_id)),
+        Reference("semifinished_ingredients", "строки полуфабрикатов", SemifinishedIngredient.ingredient_id,
+                  owner=(Semifinished, SemifinishedIngredient.semifinished_id)),
+        Reference("modifiers", "модификации", Modifier.ingredient_id, owner=(Modifier, Modifier.id)),
+        Reference("stocks", "остатки", Stock.ingredient_id, blocks_delete=False),
+        Reference("stock_transfer_items", "строки перемещений", StockTransferItem.ingredient_id),
+    ]),
+    "recipe": (Recipe, "Техкарта", [
+        Reference("product_variants", "варианты товаров", ProductVariant.recipe_id,
+                  owner=(Product, ProductVariant.base_product_id)),
+        Reference("order_items", "позиции заказов", OrderItem.recipe_id),
+        Reference("location_overrides", "цены на точках", LocationOverride.recipe_id, blocks_delete=False,
+                  owner=(Location, LocationOverride.location_id)),
+    ]),
+    "semifinished": (Semifinished, "Полуфабрикат", [
+        Reference("recipe_semifinished", "строки техкарт", RecipeSemifinished.semifinished_id,
+                  owner=(Recipe, RecipeSemifinished.recipe_id)),
+    ]),
+    "product": (Product, "Товар", [
+        Reference("order_items", "позиции заказов", OrderItem.product_id),
+        Reference("product_variants", "варианты", ProductVariant.base_product_id, blocks_delete=False),
+        Reference("product_modifier_groups", "группы модификаций", ProductModifierGroup.product_id,
+                  blocks_delete=False, owner=(ModifierGroup, ProductModifierGroup.modifier_group_id)),
+        Reference("location_overrides", "цены на точках", LocationOverride.product_id, blocks_delete=False,
+                  owner=(Location, LocationOverride.location_id)),
+    ]),
+}
+
+
+def _references(kind: str, blocking_only: bool = False) -> List[Reference]:
+    try:
+        references = REFERENCES[kind][2]
+    except KeyError:
+        raise ValueError(f"Неизвестный вид объекта: {kind}")
+    return [ref for ref in references if ref.blocks_delete or not blocking_only]
+
+
+def is_used(db: Session, kind: str, obj_id: int, blocking_only: bool = False) -> bool:
+    """Есть ли хоть одна ссылка на объект - один запрос EXISTS"""
+    references = _references(kind, blocking_only)
+    if not references:
+        return False
+    condition = or_(*(exists().where(ref.column == obj_id) for ref in references))
+    return bool(db.execute(select(condition)).scalar())
+
+
+def usage_counts(db: Session, kind: str, obj_id: int, blocking_only: bool = False) -> Dict[str, int]:
+    """Сколько раз объект используется: {ссылка: количество} - один запрос"""
+    references = _references(kind, blocking_only)
+    if not references:
+        return {}
+    columns = [
+        select(func.count()).select_from(ref.column.table).where(ref.column == obj_id)
+        .scalar_subquery().label(ref.name)
+        for ref in references
+    ]
+    row = db.execute(select(*columns)).one()
+    return {ref.name: row[index] for index, ref in enumerate(references)}
+
+
+def ensure_can_delete(db: Session, kind: str, obj_id: int, hint: str = ""):
+    """
+    400, если на объект есть блокирующие ссылки
+
+    Сначала дешёвый EXISTS; счётчики для сообщения считаются, только если
+    объект действительно используется.
+    """
+    if not is_used(db, kind, obj_id, blocking_only=True):
+        return
+    labels = {ref.name: ref.label for ref in _references(kind)}
+    counts = usage_counts(db, kind, obj_id, blocking_only=True)
+    used = ", ".join(f"{labels[name]}: {count}" for name, count in counts.items() if count)
+    detail = f"{REFERENCES[kind][1]} используется ({used}), удаление невозможно"
+    if hint:
+        detail = f"{detail}. {hint}"
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def where_used(db: Session, kind: str, obj_id: int) -> dict:
+    """
+    Отчёт «где используется»: счётчики по всем ссылкам и названия владельцев
+
+    Владельцы выбираются одним запросом на ссылку (DISTINCT, не больше
+    WHERE_USED_LIMIT), ссылки без владельца (заказы, остатки) - только счётчик.
+    """
+    references = _references(kind)
+    counts = usage_counts(db, kind, obj_id)
+    result = []
+    for ref in references:
+        count = counts[ref.name]
+        entry = {
+            "name": ref.name,
+            "label": ref.label,
+            "count": count,
+            "blocks_delete": ref.blocks_delete,
+            "items": []
+        }
+        if count and ref.owner is not None:
+            owner_model, owner_key = ref.owner
+            rows = db.query(owner_model.id, owner_model.name).filter(
+                owner_model.id.in_(select(owner_key).where(ref.column == obj_id).scalar_subquery())
+            ).order_by(owner_model.name).limit(WHERE_USED_LIMIT).all()
+            entry["items"] = [{"id": row.id, "name": row.name} for row in rows]
+        result.append(entry)
+
+    return {
+        "kind": kind,
+        "id": obj_id,
+        "used": any(entry["count"] for entry in result),
+        "can_delete": not any(entry["count"] and entry["blocks_delete"] for entry in result),
+        "references": result
+    }
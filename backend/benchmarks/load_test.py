@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест горячих эндпоинтов backend
+
+Гоняет /api/pos/items, /api/orders, /api/orders/stats/today, /api/stock,
+/api/recipes, /api/semifinished и карточки техкарты/полуфабриката
+(и POST /api/orders при --with-writes) в несколько потоков и считает:
+- p50/p95/p99 и максимум латентности по каждому эндпоинту
+- пропускную способность (запросов в секунду)
+- SQL-запросов на запрос (из заголовка Server-Timing)
+
+Результат можно сохранить как baseline и сравнивать с ним следующие прогоны:
+    cd backend
+    python benchmarks/generate_data.py --database-url sqlite:///./bench.db --drop
+    python benchmarks/load_test.py --spawn --database-url sqlite:///./bench.db --save-baseline
+    python benchmarks/load_test.py --spawn --database-url sqlite:///./bench.db --compare
+
+Без --spawn тест идёт против уже запущенного сервера (--base-url).
+Код выхода 1 - регрессия относительно baseline (латентность или число SQL-запросов)
+или превышен QUERY_BUDGETS (проверяется в каждом прогоне, baseline не нужен).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# (имя, метод, путь, вес в смеси запросов)
+SCENARIOS = [
+    ("pos_items", "GET", "/api/pos/items", 40),
+    ("orders", "GET", "/api/orders?limit=50", 15),
+    ("orders_stats_today", "GET", "/api/orders/stats/today", 15),
+    ("stock", "GET", "/api/stock?location_id=1", 15),
+    ("recipes", "GET", "/api/recipes", 15),
+    ("recipe_detail", "GET", "/api/recipes/1", 10),
+    ("semifinished", "GET", "/api/semifinished", 5),
+    ("semifinished_detail", "GET", "/api/semifinished/1", 5),
+]
+WRITE_SCENARIO = ("create_order", "POST", "/api/orders", 10)
+
+# Потолок SQL-запросов на запрос. Не зависит от объёма данных: эндпоинт, который
+# грузит граф через selectinload, делает одно и то же число запросов и на small,
+# и на large - рост числа строк не должен давать новых запросов (N+1)
+QUERY_BUDGETS = {
+    "pos_items": 7,
+    "orders": 1,
+    "orders_stats_today": 1,
+    "stock": 2,
+    "recipes": 4,
+    "recipe_detail": 4,
+    "semifinished": 2,
+    "semifinished_detail": 2,
+}
+
+_SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(values, p):
+    """Перцентиль по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _request(base_url, method, path, body=None, timeout=30):
+    """Один HTTP-запрос: (статус, мс, SQL-запросов или None)"""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method)
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status, headers = response.status, response.headers
+    except urllib.error.HTTPError as e:
+        e.read()
+        status, headers = e.code, e.headers
+    except (urllib.error.URLError, OSError):
+        return 0, (time.perf_counter() - started) * 1000, None
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    match = _SERVER_TIMING_QUERIES.search(headers.get("Server-Timing", "") or "")
+    return status, elapsed_ms, int(match.group(1)) if match else None
+
+
+def _order_payload(base_url, rnd):
+    """Тело POST /api/orders из случайных техкарт каталога"""
+    with urllib.request.urlopen(base_url + "/api/recipes", timeout=30) as response:
+        recipe_ids = [recipe["id"] for recipe in json.loads(response.read())]
+    if not recipe_ids:
+        raise SystemExit("❌ В каталоге нет техкарт - сначала запустите generate_data.py")
+    return lambda: {
+        "items": [
+            {"item_type": "recipe", "recipe_id": rnd.choice(recipe_ids), "quantity": rnd.randint(1, 2)}
+            for _ in range(rnd.randint(1, 3))
+        ],
+        "payment_method": rnd.choice(["cash", "card"])
+    }
+
+
+def run_load(base_url, scenarios, total_requests, concurrency, warmup, seed):
+    """Прогон смеси запросов: {сценарий: [(статус, мс, запросов), ...]}, общее время"""
+    rnd = random.Random(seed)
+    make_order = None
+    if any(name == WRITE_SCENARIO[0] for name, *_ in scenarios):
+        make_order = _order_payload(base_url, rnd)
+
+    weights = [weight for *_, weight in scenarios]
+    plan = rnd.choices(scenarios, weights=weights, k=total_requests)
+    bodies = [make_order() if name == WRITE_SCENARIO[0] else None for name, *_ in plan]
+
+    # Прогрев: по несколько запросов на каждый сценарий (кэши, пул соединений)
+    for name, method, path, _ in scenarios:
+        for _ in range(warmup):
+            _request(base_url, method, path, make_order() if name == WRITE_SCENARIO[0] else None)
+
+    def call(index):
+        name, method, path, _ = plan[index]
+        return name, _request(base_url, method, path, bodies[index])
+
+    results = {name: [] for name, *_ in scenarios}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, result in pool.map(call, range(total_requests)):
+            results[name].append(result)
+    return results, time.perf_counter() - started
+
+
+def summarize(results, wall_time):
+    """Сводка по сценариям"""
+    summary = {}
+    for name, samples in results.items():
+        if not samples:
+            continue
+        latencies = [ms for _, ms, _ in samples]
+        queries = [q for _, _, q in samples if q is not None]
+        errors = sum(1 for status, _, _ in samples if not 200 <= status < 300)
+        summary[name] = {
+            "requests": len(samples),
+            "errors": errors,
+            "throughput_rps": round(len(samples) / wall_time, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2),
+            "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+        }
+    return summary
+
+
+def print_summary(summary, wall_time, total):
+    print(f"\n📊 {total} запросов за {wall_time:.1f} с ({total / wall_time:.1f} в сек)\n")
+    print(f"   {'сценарий':<20} {'кол-во':>7} {'ошибки':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>6}")
+    for name, s in summary.items():
+        queries = "-" if s["queries_per_request"] is None else f"{s['queries_per_request']:g}"
+        print(
+            f"   {name:<20} {s['requests']:>7} {s['errors']:>7} {s['throughput_rps']:>8} "
+            f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {queries:>6}"
+        )
+
+
+def compare(summary, baseline, tolerance):
+    """Сравнение с baseline: список найденных регрессий"""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = summary.get(name)
+        if current is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            limit = base[key] * (1 + tolerance)
+            if current[key] > limit:
+                regressions.append(f"{name}: {key} {current[key]} > {base[key]} (+{tolerance:.0%})")
+        # Число SQL-запросов детерминировано - любой рост считаем регрессией (N+1)
+        if base.get("queries_per_request") is not None and current["queries_per_request"] is not None:
+            if current["queries_per_request"] > base["queries_per_request"]:
+                regressions.append(
+                    f"{name}: SQL-запросов {current['queries_per_request']} > {base['queries_per_request']}"
+                )
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} ошибочных ответов")
+    return regressions
+
+
+def check_query_budgets(summary, budgets=QUERY_BUDGETS):
+    """Сценарии, превысившие потолок SQL-запросов"""
+    violations = []
+    for name, budget in budgets.items():
+        current = summary.get(name)
+        if current is None or current["queries_per_request"] is None:
+            continue
+        if current["queries_per_request"] > budget:
+            violations.append(f"{name}: SQL-запросов {current['queries_per_request']} > {budget}")
+    return violations
+
+
+def _spawn_server(database_url, port):
+    """Запустить uvicorn с указанной БД и дождаться /api/health"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    env.pop("READ_REPLICA_URL", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Сервер завершился с кодом {process.returncode}")
+        status, _, _ = _request(base_url, "GET", "/api/health", timeout=1)
+        if status == 200:
+            return process, base_url
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("❌ Сервер не поднялся за 30 секунд")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест backend")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Запустить свой uvicorn (нужен --database-url)")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--port", type=int, default=8765, help="Порт для --spawn")
+    parser.add_argument("--requests", type=int, default=2000, help="Всего запросов")
+    parser.add_argument("--concurrency", type=int, default=8, help="Параллельных клиентов")
+    parser.add_argument("--warmup", type=int, default=3, help="Прогревочных запросов на сценарий")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-writes", action="store_true", help="Добавить POST /api/orders в смесь")
+    parser.add_argument("--only", nargs="*", help="Только указанные сценарии")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Файл baseline")
+    parser.add_argument("--dataset", default="generate_data.py --profile small --seed 42",
+                        help="Описание набора данных (сохраняется в baseline)")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результат как baseline")
+    parser.add_argument("--compare", action="store_true", help="Сравнить с baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимый рост латентности (доля)")
+    args = parser.parse_args()
+
+    scenarios = list(SCENARIOS) + ([WRITE_SCENARIO] if args.with_writes else [])
+    if args.only:
+        scenarios = [s for s in scenarios if s[0] in args.only]
+
+    process = None
+    base_url = args.base_url
+    if args.spawn:
+        process, base_url = _spawn_server(args.database_url, args.port)
+
+    try:
+        print(f"🚀 Нагрузка на {base_url}: {args.requests} запросов, {args.concurrency} потоков")
+        results, wall_time = run_load(base_url, scenarios, args.requests, args.concurrency, args.warmup, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(results, wall_time)
+    print_summary(summary, wall_time, args.requests)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "dataset": args.dataset,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "scenarios": summary
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n💾 Baseline сохранён: {args.baseline}")
+
+    violations = check_query_budgets(summary)
+    if violations:
+        print("\n❌ Превышен бюджет SQL-запросов (QUERY_BUDGETS):")
+        for line in violations:
+            print(f"   {line}")
+
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Регрессии относительно baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ Без регрессий относительно baseline")
+
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Бюджет SQL-запросов на запись и чтение техкарт и полуфабрикатов (in-process)
+
+    cd backend
+    python benchmarks/query_budget.py
+
+Без сервера и сгенерированных данных: приложение поднимается через TestClient
+на временной SQLite, для двух размеров графа (SIZES - ингредиентов и
+полуфабрикатов в составе) выполняются создание, изменение и карточка техкарты
+и полуфабриката внутри query_stats.assert_max_queries(бюджет). Число запросов
+должно укладываться в WRITE_BUDGETS и не зависеть от размера графа - рост
+с размером означает N+1. Код выхода 1 при нарушении.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (ингредиентов, полуфабрикатов) в составе техкарты; у полуфабриката - столько же ингредиентов
+SIZES = [(3, 1), (30, 8)]
+
+# Потолок SQL-запросов на операцию
+WRITE_BUDGETS = {
+    "semifinished_create": 7,
+    "semifinished_update": 7,
+    "semifinished_detail": 2,
+    "recipe_create": 11,
+    "recipe_update": 12,
+    "recipe_detail": 4,
+}
+
+
+def _setup_app(database_path):
+    """Приложение на пустой SQLite (переменные окружения - до импорта main)"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ["AUTO_CREATE_TABLES"] = "1"
+    os.environ["FORECAST_INTERVAL_SECONDS"] = "0"
+    sys.path.insert(0, BACKEND_DIR)
+    from fastapi.testclient import TestClient
+    import main
+    return TestClient(main.app)
+
+
+def _check(client, name, method, path, body=None):
+    """Один запрос внутри assert_max_queries: (ответ, число запросов)"""
+    from app.query_stats import assert_max_queries
+
+    with assert_max_queries(WRITE_BUDGETS[name]) as stats:
+        response = client.request(method, path, json=body)
+    if response.status_code >= 400:
+        raise AssertionError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+    return response.json(), stats.count
+
+
+def run_size(client, ingredients_count, semifinished_count, tag):
+    """Все операции на графе заданного размера: {операция: число запросов}"""
+    ingredient_ids = [
+        client.post("/api/ingredients", json={
+            "name": f"{tag} ингредиент {i}", "unit": "г", "purchase_price": 1 + i
+        }).json()["id"]
+        for i in range(ingredients_count)
+    ]
+    counts = {}
+
+    semifinished_body = {
+        "name": f"{tag} полуфабрикат",
+        "output_quantity": 500,
+        "ingredients": [{"ingredient_id": i, "weight": 10} for i in ingredient_ids]
+    }
+    semifinished, counts["semifinished_create"] = _check(
+        client, "semifinished_create", "POST", "/api/semifinished", semifinished_body
+    )
+    semifinished_ids = [semifinished["id"]] + [
+        client.post("/api/semifinished", json={**semifinished_body, "name": f"{tag} полуфабрикат {i}"}).json()["id"]
+        for i in range(semifinished_count - 1)
+    ]
+    _, counts["semifinished_update"] = _check(
+        client, "semifinished_update", "PUT", f"/api/semifinished/{semifinished['id']}",
+        {"ingredients": [{"ingredient_id": i, "weight": 20} for i in ingredient_ids]}
+    )
+    _, counts["semifinished_detail"] = _check(
+        client, "semifinished_detail", "GET", f"/api/semifinished/{semifinished['id']}"
+    )
+
+    recipe_body = {
+        "name": f"{tag} техкарта",
+        "price": 1000,
+        "output_weight": 500,
+        "ingredients": [{"ingredient_id": i, "gross_weight": 10, "net_weight": 8} for i in ingredient_ids],
+        "semifinished": [{"semifinished_id": i, "quantity": 50} for i in semifinished_ids]
+    }
+    recipe, counts["recipe_create"] = _check(client, "recipe_create", "POST", "/api/recipes", recipe_body)
+    _, counts["recipe_update"] = _check(
+        client, "recipe_update", "PUT", f"/api/recipes/{recipe['id']}",
+        {
+            "ingredients": [{"ingredient_id": i, "gross_weight": 12, "net_weight": 9} for i in ingredient_ids],
+            "semifinished": [{"semifinished_id": i, "quantity": 60} for i in semifinished_ids]
+        }
+    )
+    _, counts["recipe_detail"] = _check(client, "recipe_detail", "GET", f"/api/recipes/{recipe['id']}")
+    return counts
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        with _setup_app(os.path.join(directory, "query_budget.db")) as client:
+            results = [
+                (size, run_size(client, *size, tag=f"R{index}"))
+                for index, size in enumerate(SIZES)
+            ]
+
+    failed = False
+    print(f"{'операция':<22}" + "".join(f"{f'{i}+{s}':>10}" for (i, s), _ in results) + f"{'бюджет':>10}")
+    for name, budget in WRITE_BUDGETS.items():
+        counts = [result[name] for _, result in results]
+        constant = len(set(counts)) == 1
+        failed |= not constant
+        print(
+            f"{name:<22}" + "".join(f"{count:>10}" for count in counts) + f"{budget:>10}"
+            + ("" if constant else "  ❌ зависит от размера")
+        )
+    if failed:
+        print("❌ Число запросов растёт с размером графа")
+        return 1
+    print("✅ Бюджет SQL-запросов соблюдён")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
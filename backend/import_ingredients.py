@@ -2,10 +2,12 @@
 Скрипт для массового импорта ингредиентов
 """
 import requests
-import json
 
 API_URL = "https://backend-production-5eddb.up.railway.app/api/ingredients"
 
+# Существующие ингредиенты: "skip" - пропустить, "update" - обновить цену и упаковку
+ON_CONFLICT = "skip"
+
 # Данные ингредиентов
 names = [
     "芒果颗粒果酱 Гранулированный джем из манго",
@@ -178,38 +180,42 @@ def create_ingredients():
     return ingredients
 
 def import_to_api():
-    """Импортировать ингредиенты через API"""
+    """Импортировать ингредиенты через API одним запросом (POST /ingredients/bulk)"""
     ingredients = create_ingredients()
 
     print(f"🚀 Начинаю импорт {len(ingredients)} ингредиентов...\n")
 
-    success_count = 0
-    error_count = 0
-
-    for i, ingredient in enumerate(ingredients, 1):
-        try:
-            response = requests.post(
-                API_URL,
-                json=ingredient,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-
-            if response.status_code == 201:
-                success_count += 1
-                print(f"✅ {i}/{len(ingredients)}: {ingredient['name'][:50]}... ({ingredient['purchase_price']} тг/{ingredient['unit']})")
-            else:
-                error_count += 1
-                print(f"❌ {i}/{len(ingredients)}: {ingredient['name'][:50]}... - Ошибка {response.status_code}: {response.text[:100]}")
-
-        except Exception as e:
-            error_count += 1
-            print(f"❌ {i}/{len(ingredients)}: {ingredient['name'][:50]}... - Ошибка: {str(e)}")
+    try:
+        response = requests.post(
+            f"{API_URL}/bulk",
+            json=ingredients,
+            params={"on_conflict": ON_CONFLICT},
+            timeout=60
+        )
+    except Exception as e:
+        print(f"❌ Ошибка: {str(e)}")
+        return
+
+    if response.status_code != 200:
+        print(f"❌ Ошибка {response.status_code}: {response.text[:300]}")
+        return
+
+    report = response.json()
+    for row in report["rows"]:
+        name = row["name"][:50] if row.get("name") else "-"
+        if row["status"] == "error":
+            print(f"❌ {row['row']}/{report['total']}: {name}... - {row['error']}")
+        elif row["status"] == "skipped":
+            print(f"⚠️  {row['row']}/{report['total']}: {name}... - уже есть, пропущен")
+        else:
+            print(f"✅ {row['row']}/{report['total']}: {name}... ({row['status']})")
 
     print(f"\n{'='*60}")
-    print(f"✅ Успешно: {success_count}")
-    print(f"❌ Ошибок: {error_count}")
-    print(f"📊 Всего: {len(ingredients)}")
+    print(f"✅ Создано: {report['created']}")
+    print(f"🔄 Обновлено: {report['updated']}")
+    print(f"⚠️  Пропущено: {report['skipped']}")
+    print(f"❌ Ошибок: {report['errors']}")
+    print(f"📊 Всего: {report['total']}")
     print(f"{'='*60}")
 
 if __name__ == "__main__":
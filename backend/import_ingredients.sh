@@ -5,10 +5,12 @@ API_URL="https://backend-production-5eddb.up.railway.app/api/ingredients"
 echo "🚀 Начинаю импорт ингредиентов..."
 echo ""
 
-SUCCESS=0
-ERROR=0
+# Все строки собираются в один CSV и отправляются одним запросом (POST /ingredients/bulk)
+CSV_FILE=$(mktemp)
+trap 'rm -f "$CSV_FILE"' EXIT
+echo "name,category,unit,purchase_price,packaging_info" > "$CSV_FILE"
 
-# Функция для создания ингредиента
+# Функция для добавления ингредиента в пачку
 create_ingredient() {
     local name="$1"
     local category="$2"
@@ -16,19 +18,7 @@ create_ingredient() {
     local price="$4"
     local packaging="$5"
 
-    RESPONSE=$(curl -s -w "\n%{http_code}" -X POST "$API_URL" \
-        -H "Content-Type: application/json" \
-        -d "{\"name\":\"$name\",\"category\":\"$category\",\"unit\":\"$unit\",\"purchase_price\":$price,\"packaging_info\":\"$packaging\"}")
-
-    HTTP_CODE=$(echo "$RESPONSE" | tail -n1)
-
-    if [ "$HTTP_CODE" = "201" ]; then
-        SUCCESS=$((SUCCESS + 1))
-        echo "✅ $name ($price тг/$unit)"
-    else
-        ERROR=$((ERROR + 1))
-        echo "❌ $name - Ошибка $HTTP_CODE"
-    fi
+    echo "\"$name\",\"$category\",$unit,$price,\"$packaging\"" >> "$CSV_FILE"
 }
 
 # Импорт ингредиентов
@@ -78,8 +68,20 @@ create_ingredient "四杯袋 сумка на четыре чашки" "Упак
 create_ingredient "16A中空纸杯 16A Полый бумажный стаканчик" "Упаковка" "шт" "63.00" "500 шт./кор."
 create_ingredient "90注塑防漏连体盖-черная 90 литая герметичная цельная крышка - черная" "Упаковка" "шт" "17.50" "1000 шт./кор."
 
+RESPONSE=$(curl -s -w "\n%{http_code}" -X POST "$API_URL/bulk?on_conflict=skip" \
+    -H "Content-Type: text/csv" \
+    --data-binary @"$CSV_FILE")
+
+HTTP_CODE=$(echo "$RESPONSE" | tail -n1)
+BODY=$(echo "$RESPONSE" | sed '$d')
+
 echo ""
 echo "======================================================================"
-echo "✅ Успешно: $SUCCESS"
-echo "❌ Ошибок: $ERROR"
+if [ "$HTTP_CODE" = "200" ]; then
+    for field in created updated skipped errors total; do
+        echo "$field: $(echo "$BODY" | grep -o "\"$field\":[0-9]*" | head -n1 | cut -d: -f2)"
+    done
+else
+    echo "❌ Ошибка $HTTP_CODE: $BODY"
+fi
 echo "======================================================================"
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Схема БД через Alembic, в том числе для БД, созданных без него
+
+    cd backend
+    python scripts/migrate_db.py            # alembic upgrade head
+    python scripts/migrate_db.py --stamp    # БД создана create_all: пометить head, затем upgrade
+
+Пустая БД (или уже под Alembic) - просто alembic upgrade head.
+
+Таблицы есть, а alembic_version нет - БД создана create_all
+(AUTO_CREATE_TABLES=1, init_db) или старыми ручными скриптами. Накатывать на
+неё миграции нельзя: 9f48fc54de79 добавит колонки, которые create_all уже
+создал. Без --stamp скрипт останавливается с кодом 1. С --stamp выполняется
+alembic stamp head - только если схема создана create_all из ТЕКУЩИХ моделей
+(иначе сначала доведите её до моделей вручную или пересоздайте БД).
+
+Старая БД до перехода на Alembic (без variant_id в order_items): без --stamp,
+с переменной BASELINE_LEGACY_DB=1 - миграции начнутся с 9f48fc54de79, как раньше.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="alembic upgrade head (+ stamp для БД из create_all)")
+    parser.add_argument("--stamp", action="store_true",
+                        help="таблицы созданы create_all из текущих моделей - пометить head без миграций")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+    from app.db import engine
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    tables = set(inspect(engine).get_table_names())
+    untracked = bool(tables) and "alembic_version" not in tables
+
+    if untracked and args.stamp:
+        print("🏷️  Таблицы созданы без Alembic - alembic stamp head")
+        command.stamp(config, "head")
+    elif untracked and os.getenv("BASELINE_LEGACY_DB") != "1":
+        print("❌ В БД есть таблицы, но нет alembic_version (создана create_all?)")
+        print("   Схема из текущих моделей: python scripts/migrate_db.py --stamp")
+        print("   Старая БД до Alembic: BASELINE_LEGACY_DB=1 python scripts/migrate_db.py")
+        return 1
+
+    command.upgrade(config, "head")
+    print("✅ Схема БД актуальна (alembic head)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
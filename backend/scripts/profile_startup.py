@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Профиль холодного старта backend (import main)
+
+Запускает `import main` в отдельных процессах с -X importtime и проверяет:
+- медианное время импорта укладывается в бюджет (STARTUP_BUDGET_MS)
+- импорт не трогает БД (файл SQLite не создаётся до события startup)
+
+Использование:
+    cd backend
+    python scripts/profile_startup.py              # бюджет по умолчанию
+    python scripts/profile_startup.py --budget 1500 --runs 7 --top 25
+
+Код выхода 1 - бюджет превышен или импорт создал БД.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "2500"))
+
+_CHILD_CODE = (
+    "import time; t = time.perf_counter(); import main; "
+    "print(round((time.perf_counter() - t) * 1000, 1))"
+)
+
+
+def _run_once(db_path: str):
+    """Один холодный импорт: (время в мс, строки -X importtime)"""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    env.pop("READ_REPLICA_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ import main завершился с ошибкой (код {result.returncode})")
+    elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+    return elapsed_ms, result.stderr.splitlines()
+
+
+def _parse_importtime(lines):
+    """Разбор вывода -X importtime: {модуль: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Профиль времени старта backend")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="Бюджет на import main, мс")
+    parser.add_argument("--runs", type=int, default=5, help="Количество холодных запусков")
+    parser.add_argument("--top", type=int, default=15, help="Сколько самых тяжёлых модулей показать")
+    args = parser.parse_args()
+
+    timings = []
+    profile = {}
+    side_effects = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup_check.db")
+        for _ in range(args.runs):
+            elapsed_ms, lines = _run_once(db_path)
+            timings.append(elapsed_ms)
+            profile = _parse_importtime(lines)
+            if os.path.exists(db_path):
+                side_effects = True
+                os.unlink(db_path)
+
+    median_ms = statistics.median(timings)
+
+    print("🚀 Профиль старта backend (import main)")
+    print(f"   Запусков: {args.runs}, медиана: {median_ms:.1f} мс, "
+          f"мин: {min(timings):.1f} мс, макс: {max(timings):.1f} мс, бюджет: {args.budget:.0f} мс")
+
+    print(f"\n📊 Топ-{args.top} модулей по суммарному времени импорта:")
+    heaviest = sorted(profile.items(), key=lambda kv: kv[1][1], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in heaviest:
+        print(f"   {cumulative_us / 1000:8.1f} мс (собственное {self_us / 1000:6.1f} мс)  {name}")
+
+    app_modules = sorted(
+        ((name, t) for name, t in profile.items() if name == "main" or name.startswith("app")),
+        key=lambda kv: kv[1][0],
+        reverse=True
+    )
+    print("\n📦 Модули приложения (собственное время):")
+    for name, (self_us, _) in app_modules[:args.top]:
+        print(f"   {self_us / 1000:8.1f} мс  {name}")
+
+    failed = False
+    if side_effects:
+        print("\n❌ import main создал файл БД - старт не должен трогать БД до события startup")
+        failed = True
+    if median_ms > args.budget:
+        print(f"\n❌ Бюджет превышен: {median_ms:.1f} мс > {args.budget:.0f} мс")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("\n✅ Старт укладывается в бюджет")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@ fi
 # Активация виртуального окружения
 source venv/bin/activate
 
+# Схема БД - через миграции Alembic (БД из create_all: python scripts/migrate_db.py --stamp)
+python scripts/migrate_db.py || exit 1
+
 # Запуск сервера
 echo "✅ Backend запущен на http://localhost:8000"
 echo "📚 API документация: http://localhost:8000/docs"
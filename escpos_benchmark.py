@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк перекодировки ESC/POS (escpos_transcoder) на больших пачках бегунков
+
+Сравнивает новый табличный транскодер со старым побайтовым алгоритмом из
+принт-прокси на двух вариантах потока:
+- cp866 - как шлёт фронтенд (текст уже в CP866)
+- utf8  - текст в UTF-8 (другие клиенты)
+
+Использование:
+    python escpos_benchmark.py                 # 500 бегунков, 5 повторов
+    python escpos_benchmark.py --labels 5000 --repeat 10
+"""
+
+import argparse
+import time
+
+from escpos_transcoder import convert_utf8_to_cp866
+
+ESC_INIT = b'\x1b@'
+ESC_CP866 = b'\x1bt\x11'
+ESC_RUSSIA = b'\x1bR\x07'
+ALIGN_CENTER = b'\x1ba\x01'
+ALIGN_LEFT = b'\x1ba\x00'
+DOUBLE_SIZE = b'\x1b!\x30'
+NORMAL = b'\x1b!\x00'
+BOLD_ON = b'\x1bE\x01'
+BOLD_OFF = b'\x1bE\x00'
+CUT = b'\x1dV\x00'
+
+DRINKS = ['Молочный чай с тапиокой', 'Латте карамельный', 'Тайский чай', 'Матча латте', 'Фруктовый чай манго']
+MODIFIERS = ['Тапиока черная', 'Кокосовое желе', 'Без сахара', 'Меньше льда', 'Сироп ваниль']
+
+
+def legacy_convert(data):
+    """Старый алгоритм из usb-printer-proxy.py (для сравнения)"""
+    result = bytearray()
+    i = 0
+    while i < len(data):
+        if data[i] in (0x1B, 0x1D) or data[i] < 0x20:
+            result.append(data[i])
+            i += 1
+        else:
+            text_bytes = bytearray()
+            while i < len(data) and data[i] >= 0x20 and data[i] not in (0x1B, 0x1D):
+                text_bytes.append(data[i])
+                i += 1
+            if text_bytes:
+                try:
+                    result.extend(text_bytes.decode('utf-8').encode('cp866', errors='replace'))
+                except UnicodeError:
+                    result.extend(text_bytes)
+    return bytes(result)
+
+
+def build_labels(count, encoding):
+    """Пачка бегунков, похожая на вывод labelPrinter.js"""
+    parts = []
+    for n in range(count):
+        drink = DRINKS[n % len(DRINKS)]
+        parts += [
+            ESC_INIT, ESC_CP866, ESC_RUSSIA, ALIGN_CENTER, DOUBLE_SIZE,
+            f'#{1000 + n}'.encode(encoding), b'\n', NORMAL, BOLD_ON,
+            f'{drink} {n % 3 + 1}/3'.encode(encoding), b'\n', BOLD_OFF, ALIGN_LEFT,
+        ]
+        for modifier in MODIFIERS[:n % len(MODIFIERS) + 1]:
+            parts += [f'+ {modifier}'.encode(encoding), b'\n']
+        parts += [f'Размер: 700мл (M)  Сахар: 50%'.encode(encoding), b'\n\n\n', CUT]
+    return b''.join(parts)
+
+
+def measure(func, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк перекодировки ESC/POS')
+    parser.add_argument('--labels', type=int, default=500, help='Бегунков в пачке')
+    parser.add_argument('--repeat', type=int, default=5, help='Повторов (берётся лучший)')
+    args = parser.parse_args()
+
+    print(f'🏷️  {args.labels} бегунков, лучший из {args.repeat} повторов\n')
+    for encoding in ('cp866', 'utf-8'):
+        data = build_labels(args.labels, encoding)
+        expected = build_labels(args.labels, 'cp866')
+        converted = convert_utf8_to_cp866(data)
+        if converted != expected:
+            raise SystemExit(f'❌ {encoding}: результат отличается от эталона')
+
+        legacy = measure(legacy_convert, data, args.repeat)
+        current = measure(convert_utf8_to_cp866, data, args.repeat)
+        size_kb = len(data) / 1024
+        print(f'   {encoding:<6} {size_kb:8.1f} КБ   старый: {legacy * 1000:8.2f} мс   '
+              f'новый: {current * 1000:7.2f} мс   ускорение: x{legacy / current:.1f}')
+
+    print('\n✅ Результат совпадает с эталоном (текст в CP866, команды без изменений)')
+
+
+if __name__ == '__main__':
+    main()
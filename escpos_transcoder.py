@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Перекодировка ESC/POS потока из UTF-8 в CP866 за один проход
+
+Принтеры Xprinter понимают только однобайтовую кириллицу (CP866, ESC t 17),
+а клиенты присылают смесь команд и текста: фронтенд - уже в CP866, другие
+клиенты - в UTF-8. Модуль разбирает поток по командам ESC/POS с учётом длины
+их аргументов (ESC ! n, GS V m n, растровые картинки GS v 0 ...), поэтому
+байты параметров и картинок никогда не принимаются за текст.
+
+Текстовые участки между командами:
+- только ASCII - копируются как есть (срез memoryview, без декодирования)
+- корректный UTF-8 - перекодируются в CP866 по заранее построенной таблице
+- всё остальное (уже CP866) - копируется как есть
+
+Используется printer_proxy.py (transform задания в print_spooler); прежние
+usb-printer-proxy*.py - тонкие обёртки над ним.
+"""
+
+import codecs
+import re
+
+ESC = 0x1B
+GS = 0x1D
+FS = 0x1C
+DLE = 0x10
+
+# Таблица кодирования str -> CP866, строится один раз (codecs.charmap_encode работает на C)
+_CP866_DECODING_TABLE = bytes(range(256)).decode('cp866')
+_CP866_ENCODING_MAP = codecs.charmap_build(_CP866_DECODING_TABLE)
+
+# Символы, которых нет в CP866, но которые часто встречаются в названиях и чеках
+_TEXT_FIXUPS = str.maketrans({
+    '₸': 'тг',
+    '—': '-',
+    '–': '-',
+    '«': '"',
+    '»': '"',
+    '„': '"',
+    '“': '"',
+    '”': '"',
+    '’': "'",
+    '…': '...',
+})
+
+# Начало любой команды: ESC, GS, FS, DLE
+_COMMAND_START = re.compile(rb'[\x10\x1b\x1c\x1d]')
+_NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+# Русский текст в CP866 иногда случайно оказывается корректным UTF-8 ("раз" = E0 A0 A7 -> U+0827).
+# Настоящий текст чеков - кириллица, латиница, пунктуация и эмодзи; такие символы
+# означают, что участок на самом деле уже в CP866
+_MISREAD_CP866 = re.compile('[\u0800-\u1fff\u2c00-\uffff\U00020000-\U0010ffff]')
+
+
+def _until_nul(data, pos):
+    """Аргумент до завершающего NUL включительно (ESC D, GS k m=0..6)"""
+    end = data.find(b'\x00', pos)
+    return len(data) if end < 0 else end + 1
+
+
+def _esc_bit_image(data, pos):
+    """ESC * m nL nH d1...dk: k = n или 3n для 24-точечных режимов"""
+    if pos + 3 > len(data):
+        return len(data)
+    m, n = data[pos], data[pos + 1] + data[pos + 2] * 256
+    return pos + 3 + (n * 3 if m in (32, 33) else n)
+
+
+def _gs_cut(data, pos):
+    """GS V m [n]: для m = 65, 66, 97, 98, 103, 104 есть ещё байт подачи"""
+    if pos >= len(data):
+        return len(data)
+    return pos + (2 if data[pos] in (65, 66, 97, 98, 103, 104) else 1)
+
+
+def _gs_barcode(data, pos):
+    """GS k m ...: m = 0..6 - данные до NUL, m = 65..79 - n d1...dn"""
+    if pos >= len(data):
+        return len(data)
+    m = data[pos]
+    if m <= 6:
+        return _until_nul(data, pos + 1)
+    if pos + 1 >= len(data):
+        return len(data)
+    return pos + 2 + data[pos + 1]
+
+
+def _gs_raster(data, pos):
+    """GS v 0 m xL xH yL yH d1...dk: k = (xL + xH*256) * (yL + yH*256)"""
+    if pos + 6 > len(data):
+        return len(data)
+    width = data[pos + 2] + data[pos + 3] * 256
+    height = data[pos + 4] + data[pos + 5] * 256
+    return pos + 6 + width * height
+
+
+def _gs_downloaded_image(data, pos):
+    """GS * x y d1...dk: k = x * y * 8"""
+    if pos + 2 > len(data):
+        return len(data)
+    return pos + 2 + data[pos] * data[pos + 1] * 8
+
+
+def _with_length(data, pos):
+    """GS ( fn pL pH ... / FS ( fn pL pH ...: pL + pH*256 байт параметров"""
+    if pos + 3 > len(data):
+        return len(data)
+    return pos + 3 + data[pos + 1] + data[pos + 2] * 256
+
+
+# Длина аргументов после байта команды: число или функция (data, pos) -> конец команды
+_ESC_COMMANDS = {
+    ord('@'): 0, ord('!'): 1, ord('a'): 1, ord('E'): 1, ord('G'): 1, ord('d'): 1, ord('e'): 1,
+    ord('t'): 1, ord('-'): 1, ord('R'): 1, ord('M'): 1, ord('J'): 1, ord('K'): 1, ord('2'): 0,
+    ord('3'): 1, ord(' '): 1, ord('V'): 1, ord('{'): 1, ord('r'): 1, ord('U'): 1, ord('='): 1,
+    ord('%'): 1, ord('T'): 1, ord('$'): 2, ord('\\'): 2, ord('p'): 3, ord('c'): 2, ord('B'): 2,
+    ord('W'): 8, ord('i'): 0, ord('m'): 0, ord('L'): 0, ord('S'): 0,
+    ord('*'): _esc_bit_image, ord('D'): _until_nul,
+}
+
+_GS_COMMANDS = {
+    ord('!'): 1, ord('B'): 1, ord('b'): 1, ord('a'): 1, ord('r'): 1, ord('I'): 1, ord('f'): 1,
+    ord('h'): 1, ord('w'): 1, ord('H'): 1, ord('T'): 1, ord('/'): 1, ord('L'): 2, ord('W'): 2,
+    ord('P'): 2, ord('$'): 2, ord('\\'): 2, ord('^'): 3, ord(':'): 0,
+    ord('V'): _gs_cut, ord('k'): _gs_barcode, ord('v'): _gs_raster, ord('*'): _gs_downloaded_image,
+    ord('('): _with_length,
+}
+
+_FS_COMMANDS = {
+    ord('&'): 0, ord('.'): 0, ord('!'): 1, ord('-'): 1, ord('C'): 1, ord('p'): 2,
+    ord('('): _with_length,
+}
+
+_DLE_COMMANDS = {
+    0x04: 1, 0x05: 1, 0x14: 3,
+}
+
+_COMMAND_TABLES = {ESC: _ESC_COMMANDS, GS: _GS_COMMANDS, FS: _FS_COMMANDS, DLE: _DLE_COMMANDS}
+
+
+def _command_end(data, pos):
+    """Конец команды, начинающейся в pos (data[pos] - ESC/GS/FS/DLE)"""
+    if pos + 1 >= len(data):
+        return len(data)
+    table = _COMMAND_TABLES[data[pos]]
+    args = table.get(data[pos + 1], 0)
+    if isinstance(args, int):
+        end = pos + 2 + args
+    else:
+        end = args(data, pos + 2)
+    return min(end, len(data))
+
+
+def _transcode_text(run):
+    """Текстовый участок: UTF-8 -> CP866, иначе (уже CP866) - без изменений"""
+    try:
+        text = str(run, 'utf-8')
+    except UnicodeDecodeError:
+        return run
+    if _MISREAD_CP866.search(text):
+        return run
+    return codecs.charmap_encode(text.translate(_TEXT_FIXUPS), 'replace', _CP866_ENCODING_MAP)[0]
+
+
+def tokenize(data):
+    """
+    Разбор потока на участки: [('text' | 'command', start, end), ...]
+
+    Управляющие байты вроде LF/CR остаются внутри текстовых участков -
+    в UTF-8 и CP866 они совпадают.
+    """
+    tokens = []
+    pos = 0
+    length = len(data)
+    while pos < length:
+        match = _COMMAND_START.search(data, pos)
+        if match is None:
+            tokens.append(('text', pos, length))
+            break
+        start = match.start()
+        if start > pos:
+            tokens.append(('text', pos, start))
+        end = _command_end(data, start)
+        tokens.append(('command', start, end))
+        pos = end
+    return tokens
+
+
+def _build_skip_pattern():
+    """
+    Регулярка, которая за один вызов (на C) проглатывает подряд идущие команды
+    фиксированной длины и ASCII-текст. Останавливается на не-ASCII тексте или
+    на команде переменной длины (картинки, штрихкоды) - их разбирает Python.
+    """
+    branches = []
+    for prefix, table in _COMMAND_TABLES.items():
+        by_length = {}
+        for command, args in table.items():
+            if isinstance(args, int):
+                by_length.setdefault(args, []).append(command)
+        for args, commands in sorted(by_length.items()):
+            klass = b''.join(re.escape(bytes([c])) for c in sorted(commands))
+            branches.append(re.escape(bytes([prefix])) + b'[' + klass + b']' + (b'.{%d}' % args if args else b''))
+        # Неизвестная команда - без аргументов
+        known = b''.join(re.escape(bytes([c])) for c in sorted(table))
+        branches.append(re.escape(bytes([prefix])) + b'[^' + known + b']')
+    branches.append(rb'[^\x10\x1b\x1c\x1d\x80-\xff]+')
+    return re.compile(b'(?:' + b'|'.join(branches) + b')*', re.DOTALL)
+
+
+_SKIP = _build_skip_pattern()
+_TEXT_RUN = re.compile(rb'[^\x10\x1b\x1c\x1d]+')
+
+
+def convert_utf8_to_cp866(data):
+    """
+    Перекодировать текст ESC/POS потока из UTF-8 в CP866
+
+    Команды и их аргументы (включая картинки и штрихкоды) копируются как есть,
+    текст уже в CP866 не трогается. Если менять нечего - возвращаются исходные байты.
+    """
+    data = bytes(data)
+    if data.isascii():
+        return data
+
+    view = memoryview(data)
+    parts = []
+    copied = 0  # до какой позиции исходные байты уже в parts
+    pos = 0
+    length = len(data)
+    skip = _SKIP.match
+    text_run = _TEXT_RUN.match
+    while True:
+        pos = skip(data, pos).end()
+        if pos >= length:
+            break
+        if data[pos] in _COMMAND_TABLES:
+            # Команда переменной длины (или обрезанная в конце потока)
+            pos = _command_end(data, pos)
+            continue
+        end = text_run(data, pos).end()
+        run = view[pos:end]
+        converted = _transcode_text(run)
+        if converted is not run:
+            parts.append(view[copied:pos])
+            parts.append(converted)
+            copied = end
+        pos = end
+
+    if not parts:
+        return data
+    parts.append(view[copied:])
+    return b''.join(parts)
@@ -20,6 +20,13 @@ const getApiBaseUrl = () => {
 
 const API_BASE_URL = getApiBaseUrl();
 
+// Точка кассы: ?location_id=N в адресе страницы, иначе VITE_POS_LOCATION_ID, иначе 1
+// (та же точка по умолчанию, что и на backend). Меню, карточки и заказы - одной точки
+export const POS_LOCATION_ID =
+  Number(new URLSearchParams(window.location.search).get('location_id')) ||
+  Number(import.meta.env.VITE_POS_LOCATION_ID) ||
+  1;
+
 class ApiClient {
   async request(endpoint, options = {}) {
     const url = `${API_BASE_URL}${endpoint}`;
@@ -100,6 +107,11 @@ class ApiClient {
     });
   }
 
+  // Готовые ESC/POS байты заказа (kind: receipt | runners) в base64 - планшет только пересылает их
+  async getPrintData(orderId, kind) {
+    return this.request(`/print/orders/${orderId}/${kind}?format=base64`);
+  }
+
   async getOrders(params = {}) {
     const query = new URLSearchParams(params).toString();
     return this.request(`/orders${query ? `?${query}` : ''}`);
@@ -135,6 +147,12 @@ class ApiClient {
     return this.request(`/ingredients${query ? `?${query}` : ''}`);
   }
 
+  async searchIngredients(q, params = {}) {
+    // params: category_id, limit, cursor (next_cursor из предыдущего ответа)
+    const query = new URLSearchParams({ q, ...params }).toString();
+    return this.request(`/ingredients/search?${query}`);
+  }
+
   async getIngredient(id) {
     return this.request(`/ingredients/${id}`);
   }
@@ -166,6 +184,17 @@ class ApiClient {
     });
   }
 
+  // Массовый импорт: массив объектов (JSON) или файл CSV/XLSX; onConflict - skip | update
+  async bulkImportIngredients(data, onConflict = 'skip') {
+    const isFile = typeof Blob !== 'undefined' && data instanceof Blob;
+    const isXlsx = isFile && /\.xlsx$/i.test(data.name || '');
+    return this.request(`/ingredients/bulk?on_conflict=${onConflict}${isXlsx ? '&format=xlsx' : ''}`, {
+      method: 'POST',
+      headers: isFile ? { 'Content-Type': isXlsx ? 'application/octet-stream' : 'text/csv' } : {},
+      body: isFile ? data : JSON.stringify(data),
+    });
+  }
+
   async getIngredientCategories() {
     return this.request('/ingredients/categories/list');
   }
@@ -283,14 +312,34 @@ class ApiClient {
   }
 
   // POS (Касса - объединенный список товаров и техкарт)
-  async getPOSItems() {
-    return this.request('/pos/items');
+  // locationId - цены точки и доступность по её остаткам
+  async getPOSItems(locationId = POS_LOCATION_ID) {
+    return this.request(`/pos/items?location_id=${locationId}`);
   }
 
   async getPOSCategories() {
     return this.request('/pos/categories');
   }
 
+  // Пакет меню для офлайн-кэша: null, если версия не изменилась (304)
+  async getMenuBundle(version, locationId = POS_LOCATION_ID) {
+    const response = await fetch(`${API_BASE_URL}/pos/menu-bundle?location_id=${locationId}`, {
+      headers: version ? { 'If-None-Match': `"${version}"` } : {},
+    });
+    if (response.status === 304) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error('Menu bundle request failed');
+    }
+    return await response.json();
+  }
+
+  // Карточка товара: активные варианты + модификаторы одним запросом
+  async getPOSProductCard(productId, locationId = POS_LOCATION_ID) {
+    return this.request(`/pos/products/${productId}/card?location_id=${locationId}`);
+  }
+
   // Product Variants (Варианты товаров - размеры)
   async getProductVariants(productId) {
     return this.request(`/products/${productId}/variants`);
@@ -384,6 +433,11 @@ class ApiClient {
       method: 'DELETE',
     });
   }
+
+  // Где используется объект (kind: location, category, ingredient, recipe, semifinished, product)
+  async getUsage(kind, id) {
+    return this.request(`/usage/${kind}/${id}`);
+  }
 }
 
 export default new ApiClient();
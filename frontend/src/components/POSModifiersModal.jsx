@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { X, Check } from 'lucide-react';
 import api from '../api/client';
+import offlineDB from '../utils/offlineDB';
 import toast from 'react-hot-toast';
 import { Button } from './ui/Button';
 
@@ -19,13 +20,17 @@ function POSModifiersModal({ product, onClose, onConfirm }) {
   const loadOptions = async () => {
     setLoading(true);
     try {
-      const [variantsData, modifiersData] = await Promise.all([
-        api.getProductVariants(product.id),
-        api.getProductModifiers(product.id)
-      ]);
-
-      // Filter active variants
-      const activeVariants = variantsData.filter(v => v.is_active);
+      // Variants (only active) and modifiers in one request, offline - from menu bundle
+      let card;
+      try {
+        card = await api.getPOSProductCard(product.id);
+      } catch (error) {
+        const bundle = await offlineDB.getMenuBundle();
+        card = bundle?.cards?.[String(product.id)];
+        if (!card) throw error;
+      }
+      const activeVariants = card.variants;
+      const modifiersData = card.modifier_groups;
       setVariants(activeVariants);
 
       // Set default variant
@@ -11,13 +11,14 @@
 import { useState, useEffect, useCallback } from 'react';
 import offlineDB, { type PendingOrder } from '../utils/offlineDB';
 import api from '../api/client';
-import type { OrderCreate } from '../types';
+import type { Order, OrderCreate } from '../types';
 import toast from 'react-hot-toast';
 
 interface UseOfflineQueueReturn {
   isOnline: boolean;
   pendingCount: number;
-  createOrder: (orderData: OrderCreate) => Promise<void>;
+  // Созданный на сервере заказ или null, если заказ ушёл в офлайн-очередь
+  createOrder: (orderData: OrderCreate) => Promise<Order | null>;
   syncPendingOrders: () => Promise<void>;
   isSyncing: boolean;
 }
@@ -76,12 +77,13 @@ export function useOfflineQueue(): UseOfflineQueueReturn {
    * Create order (online or offline)
    */
   const createOrder = useCallback(
-    async (orderData: OrderCreate): Promise<void> => {
+    async (orderData: OrderCreate): Promise<Order | null> => {
       if (isOnline) {
         // Try to create order online
         try {
-          await api.createOrder(orderData);
+          const order = await api.createOrder(orderData);
           toast.success('Заказ создан');
+          return order;
         } catch (error) {
           console.error('Failed to create order online:', error);
 
@@ -97,6 +99,7 @@ export function useOfflineQueue(): UseOfflineQueueReturn {
             toast.error(
               'Ошибка сети. Заказ сохранен локально и отправится автоматически'
             );
+            return null;
           } else {
             // Other errors (validation, etc.)
             throw error;
@@ -110,6 +113,7 @@ export function useOfflineQueue(): UseOfflineQueueReturn {
         toast.success(
           `Заказ сохранен локально. Отправится когда появится интернет (${pendingCount + 1} в очереди)`
         );
+        return null;
       }
     },
     [isOnline, pendingCount, updatePendingCount]
@@ -142,8 +146,8 @@ export function useOfflineQueue(): UseOfflineQueueReturn {
         try {
           await offlineDB.updateOrderStatus(order.id!, 'syncing');
 
-          // Try to create order on server
-          await api.createOrder(order.orderData);
+          // Try to create order on server (уже продан офлайн - остатки не проверяем)
+          await api.createOrder({ ...order.orderData, check_stock: false });
 
           // Success - remove from queue
           await offlineDB.removeOrder(order.id!);
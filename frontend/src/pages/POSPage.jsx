@@ -4,11 +4,12 @@ import {
   Package, Trash2, Settings, Wifi, WifiOff, Clock, RefreshCw
 } from 'lucide-react';
 import toast, { Toaster } from 'react-hot-toast';
-import api from '../api/client';
+import api, { POS_LOCATION_ID } from '../api/client';
 import ReceiptPrinter from '../utils/receiptPrinter';
 import LabelPrinter from '../utils/labelPrinter';
 import POSModifiersModal from '../components/POSModifiersModal';
 import { useOfflineQueue } from '../hooks/useOfflineQueue';
+import offlineDB from '../utils/offlineDB';
 
 function POSPage() {
   const [products, setProducts] = useState([]);
@@ -26,8 +27,31 @@ function POSPage() {
     loadProducts();
     loadCategories();
     loadSettings();
+    warmMenuBundle();
   }, []);
 
+  // Пакет меню в IndexedDB: касса продолжает работать, когда сеть пропала
+  const warmMenuBundle = async () => {
+    try {
+      const cached = await offlineDB.getMenuBundle();
+      const bundle = await api.getMenuBundle(cached?.version);
+      if (bundle) {
+        await offlineDB.saveMenuBundle(bundle);
+      }
+    } catch (error) {
+      console.error('Пакет меню не обновлён:', error);
+    }
+  };
+
+  const loadFromMenuBundle = async (key) => {
+    try {
+      const bundle = await offlineDB.getMenuBundle();
+      return bundle ? bundle[key] : null;
+    } catch {
+      return null;
+    }
+  };
+
   const loadSettings = async () => {
     try {
       const data = await api.getSettings();
@@ -45,7 +69,13 @@ function POSPage() {
       setProducts(data);
     } catch (error) {
       console.error('Ошибка загрузки товаров:', error);
-      toast.error('Не удалось загрузить товары');
+      const items = await loadFromMenuBundle('items');
+      if (items) {
+        setProducts(items);
+        toast('Нет сети: меню из офлайн-кэша', { icon: '📦' });
+      } else {
+        toast.error('Не удалось загрузить товары');
+      }
     } finally {
       setLoading(false);
     }
@@ -57,6 +87,10 @@ function POSPage() {
       setCategories([{ id: 'all', name: 'Все товары' }, ...data]);
     } catch (error) {
       console.error('Ошибка загрузки категорий:', error);
+      const cached = await loadFromMenuBundle('categories');
+      if (cached) {
+        setCategories([{ id: 'all', name: 'Все товары' }, ...cached]);
+      }
     }
   };
 
@@ -160,7 +194,8 @@ function POSPage() {
             price: m.price
           })) : null
         })),
-        payment_method: paymentMethod
+        payment_method: paymentMethod,
+        location_id: POS_LOCATION_ID  // та же точка, что и у меню - цены совпадают
       };
 
       // Генерируем локальный номер заказа для печати
@@ -184,7 +219,7 @@ function POSPage() {
 
       // Use offline queue instead of direct API call
       // This will save to IndexedDB if offline, or send to server if online
-      await createOrderOffline(orderData);
+      const createdOrder = await createOrderOffline(orderData);
 
       // Печать чека и этикетки через ESC/POS
       if (settings?.receipt_printer_ip || settings?.label_printer_ip) {
@@ -192,10 +227,25 @@ function POSPage() {
           // Печать чека + бегунков (один вызов для RawBT)
           if (settings.receipt_printer_ip) {
             const receiptPrinter = new ReceiptPrinter(settings.receipt_printer_ip);
-            await receiptPrinter.printReceiptWithRunners(orderForPrint, {
-              businessName: settings.business_name,
-              phone: settings.phone
-            });
+            if (createdOrder?.id) {
+              // Заказ на сервере - байты собирает backend, планшет только пересылает
+              const [receipt, runners] = await Promise.all([
+                api.getPrintData(createdOrder.id, 'receipt'),
+                api.getPrintData(createdOrder.id, 'runners')
+              ]);
+              const receiptBytes = receiptPrinter.base64ToUint8Array(receipt.data);
+              const runnerBytes = receiptPrinter.base64ToUint8Array(runners.data);
+              const data = new Uint8Array(receiptBytes.length + runnerBytes.length);
+              data.set(receiptBytes);
+              data.set(runnerBytes, receiptBytes.length);
+              await receiptPrinter.printBytes(data);
+            } else {
+              // Заказ в офлайн-очереди (id ещё нет) - собираем чек на планшете
+              await receiptPrinter.printReceiptWithRunners(orderForPrint, {
+                businessName: settings.business_name,
+                phone: settings.phone
+              });
+            }
             toast.success('Чек и бегунки отправлены на печать!');
           }
 
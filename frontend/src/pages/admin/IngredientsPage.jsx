@@ -142,7 +142,7 @@ function IngredientsPage() {
       loadCategories();
     } catch (error) {
       console.error('Ошибка удаления ингредиента:', error);
-      toast.error('Не удалось удалить ингредиент');
+      toast.error(error.message || 'Не удалось удалить ингредиент');
     }
   };
 
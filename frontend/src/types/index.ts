@@ -272,6 +272,7 @@ export interface CreateOrderRequest {
   }[];
   payment_method: PaymentMethod;
   total: number;
+  check_stock?: boolean;
 }
 
 export interface StockAdjustmentRequest {
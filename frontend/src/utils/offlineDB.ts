@@ -2,13 +2,24 @@
  * IndexedDB wrapper for offline order queue
  *
  * Stores orders when network is unavailable and syncs them when connection is restored.
+ * Also keeps the last menu bundle (/pos/menu-bundle) so the POS can sell offline.
  */
 
 import type { OrderCreate } from '../types';
 
 const DB_NAME = 'MyPOS_OfflineDB';
-const DB_VERSION = 1;
+const DB_VERSION = 2;
 const ORDERS_STORE = 'pending_orders';
+const MENU_STORE = 'menu_bundle';
+const MENU_KEY = 'current';
+
+export interface MenuBundle {
+  version: string;
+  format: number;
+  categories: any[];
+  items: any[];
+  cards: Record<string, any>;
+}
 
 export interface PendingOrder {
   id?: number;
@@ -55,6 +66,11 @@ class OfflineDB {
 
           console.log('📦 Created IndexedDB object store:', ORDERS_STORE);
         }
+
+        // Menu bundle for offline catalog (added in DB_VERSION 2)
+        if (!db.objectStoreNames.contains(MENU_STORE)) {
+          db.createObjectStore(MENU_STORE);
+        }
       };
     });
   }
@@ -190,6 +206,44 @@ class OfflineDB {
     });
   }
 
+  /**
+   * Save menu bundle (replaces the previous one)
+   */
+  async saveMenuBundle(bundle: MenuBundle): Promise<void> {
+    if (!this.db) await this.init();
+
+    return new Promise((resolve, reject) => {
+      const transaction = this.db!.transaction([MENU_STORE], 'readwrite');
+      const request = transaction.objectStore(MENU_STORE).put(bundle, MENU_KEY);
+
+      request.onsuccess = () => resolve();
+
+      request.onerror = () => {
+        reject(new Error('Failed to save menu bundle'));
+      };
+    });
+  }
+
+  /**
+   * Get cached menu bundle (null if the tablet never downloaded one)
+   */
+  async getMenuBundle(): Promise<MenuBundle | null> {
+    if (!this.db) await this.init();
+
+    return new Promise((resolve, reject) => {
+      const transaction = this.db!.transaction([MENU_STORE], 'readonly');
+      const request = transaction.objectStore(MENU_STORE).get(MENU_KEY);
+
+      request.onsuccess = () => {
+        resolve((request.result as MenuBundle) || null);
+      };
+
+      request.onerror = () => {
+        reject(new Error('Failed to get menu bundle'));
+      };
+    });
+  }
+
   /**
    * Clear all orders (use with caution!)
    */
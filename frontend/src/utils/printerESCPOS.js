@@ -106,6 +106,24 @@ class ESCPOSPrinter {
     return this.printViaNetwork(data);
   }
 
+  // Отправка готовых байт (собранных сервером) тем же способом, что и print()
+  async printBytes(data) {
+    if (this.useRawBT) {
+      return this.printViaRawBT(data);
+    }
+    return this.printViaNetwork(data);
+  }
+
+  // Конвертация Base64 (ответ /print/orders/...) в Uint8Array
+  base64ToUint8Array(base64) {
+    const binary = atob(base64);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+      bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes;
+  }
+
   // Печать через RawBT (Android)
   // RawBT принимает ESC/POS данные через URL схему rawbt:
   async printViaRawBT(data) {
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Очередь печати для принт-прокси (только стандартная библиотека)
+
+На каждый принтер - своя ограниченная очередь и свой рабочий поток, поэтому
+чек и бегунки одного заказа не ждут друг друга, а зависший принтер не
+блокирует остальные. HTTP-обработчик только ставит задание в очередь и сразу
+возвращает его ID; статус задания можно спросить позже.
+
+Куда отправлять байты, решает "sink":
+- LprSink    - lpr -o raw (CUPS, как раньше)
+- DeviceSink - запись напрямую в устройство (/dev/usb/lp0), файл держится открытым
+- TcpSink    - сетевой принтер по raw TCP 9100, сокет держится открытым
+- FallbackSink - устройство/сокет, а при ошибке - lpr
+- FileSink   - каждое задание в отдельный файл (для тестов и отладки)
+- WindowsShareSink - COPY /B в общий принтер Windows (\\\\localhost\\Имя)
+
+Пример:
+    spooler = Spooler()
+    spooler.add_printer('receipt', LprSink('Xprinter_USB_Printer_P'), transform=convert_utf8_to_cp866)
+    job = spooler.submit('receipt', data)   # QueueFull, если очередь переполнена
+    spooler.get_job(job.id).status          # queued / printing / done / failed
+    jobs = spooler.submit_batch('label', parse_batch(body, content_type))
+
+Пачка заданий (например, бегунки на все стаканы заказа) ставится одним
+вызовом submit_batch(): каждое задание перекодируется отдельно, а на принтер
+уходит один непрерывный поток в исходном порядке. Задание, которое не удалось
+подготовить, помечается failed, остальные печатаются.
+"""
+
+import itertools
+import os
+import queue
+import select
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from proxy_metrics import record_print
+
+# Сколько заданий может ждать в очереди одного принтера
+DEFAULT_QUEUE_SIZE = 50
+
+# Сколько завершённых заданий помнить для GET /jobs/<id>
+JOB_HISTORY_SIZE = 500
+
+# Как часто (в простое) проверять соединение с принтером, секунд
+HEALTH_CHECK_INTERVAL = 30
+
+# Сколько заданий можно прислать в одной пачке (POST /batch)
+MAX_BATCH_JOBS = 100
+
+# Формат пачки: [4 байта длины, big-endian][данные задания], и так подряд
+LENGTH_PREFIXED_TYPE = 'application/x-escpos-batch'
+
+
+class QueueFull(Exception):
+    """Очередь принтера переполнена - клиенту нужно повторить позже"""
+
+
+class UnknownPrinter(Exception):
+    """Принтер с таким именем не настроен"""
+
+
+class BatchFormatError(ValueError):
+    """Тело пачки не удалось разобрать"""
+
+
+# ==================== Sinks ====================
+
+class LprSink:
+    """Печать через lpr -o raw (временный файл на каждое задание)"""
+
+    def __init__(self, printer_name):
+        self.printer_name = printer_name
+
+    def describe(self):
+        return f"lpr -P {self.printer_name}"
+
+    def send(self, data):
+        with tempfile.NamedTemporaryFile(mode='wb', delete=False) as f:
+            f.write(data)
+            temp_file = f.name
+        try:
+            result = subprocess.run(
+                ['lpr', '-P', self.printer_name, '-o', 'raw', temp_file],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+        finally:
+            os.unlink(temp_file)
+        if result.returncode != 0:
+            raise IOError(result.stderr.strip() or f"lpr exited with code {result.returncode}")
+
+
+class WindowsShareSink:
+    """Печать в Windows: COPY /B временного файла на \\\\localhost\\<имя принтера>"""
+
+    def __init__(self, printer_name):
+        self.printer_name = printer_name
+
+    def describe(self):
+        return f"\\\\localhost\\{self.printer_name}"
+
+    def send(self, data):
+        with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.prn') as f:
+            f.write(data)
+            temp_file = f.name
+        try:
+            result = subprocess.run(
+                ['cmd', '/c', 'copy', '/B', temp_file, self.describe()],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+        finally:
+            os.unlink(temp_file)
+        if result.returncode != 0:
+            raise IOError(result.stderr.strip() or result.stdout.strip() or f"copy exited with code {result.returncode}")
+
+
+class _PersistentSink:
+    """
+    Общая логика постоянного соединения с принтером
+
+    Соединение открывается при первом задании и держится открытым. При ошибке
+    записи соединение переоткрывается и задание отправляется ещё раз (один раз).
+    check() вызывается рабочим потоком в простое - переподключает упавшее
+    соединение заранее, до следующего чека.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self.last_error = None
+        self.last_ok_at = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, conn, data):
+        raise NotImplementedError
+
+    def _is_alive(self, conn):
+        return True
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+    def send(self, data):
+        for attempt in (1, 2):
+            try:
+                self._write(self._connection(), data)
+                self.last_error = None
+                self.last_ok_at = time.time()
+                return
+            except OSError as e:
+                self.close()
+                self.last_error = str(e)
+                if attempt == 2:
+                    raise
+                print(f"⚠️  {self.describe()}: {e}, reconnecting...")
+
+    def check(self):
+        """Проверка соединения (в простое): переподключиться, если оно упало"""
+        try:
+            if self._conn is not None and not self._is_alive(self._conn):
+                self.close()
+            self._connection()
+            self.last_error = None
+        except OSError as e:
+            self.close()
+            self.last_error = str(e)
+
+    def health(self):
+        return {
+            'connected': self._conn is not None,
+            'last_error': self.last_error,
+            'last_ok_at': self.last_ok_at,
+        }
+
+
+class DeviceSink(_PersistentSink):
+    """Запись напрямую в файл устройства принтера (/dev/usb/lp0), файл держится открытым"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def describe(self):
+        return self.path
+
+    def _open(self):
+        return open(self.path, 'ab', buffering=0)
+
+    def _write(self, conn, data):
+        conn.write(data)
+
+    def _is_alive(self, conn):
+        # Принтер выдернули из USB - файла устройства больше нет
+        return os.path.exists(self.path)
+
+
+class TcpSink(_PersistentSink):
+    """Сетевой принтер: raw TCP (порт 9100), сокет держится открытым"""
+
+    def __init__(self, host, port=9100, timeout=10):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def describe(self):
+        return f"tcp://{self.host}:{self.port}"
+
+    def _open(self):
+        conn = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return conn
+
+    def _write(self, conn, data):
+        conn.sendall(data)
+
+    def _is_alive(self, conn):
+        # Читаемый сокет без данных - принтер закрыл соединение
+        readable, _, _ = select.select([conn], [], [], 0)
+        if not readable:
+            return True
+        try:
+            return conn.recv(1, socket.MSG_PEEK) != b''
+        except OSError:
+            return False
+
+
+class FallbackSink:
+    """Основной sink (устройство/сокет), при его ошибке - запасной (lpr)"""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def describe(self):
+        return f"{self.primary.describe()} (fallback: {self.fallback.describe()})"
+
+    def send(self, data):
+        try:
+            self.primary.send(data)
+        except OSError as e:
+            print(f"⚠️  {self.primary.describe()} unavailable ({e}), using {self.fallback.describe()}")
+            self.fallback.send(data)
+
+    def check(self):
+        self.primary.check()
+
+    def health(self):
+        return self.primary.health()
+
+
+class FileSink:
+    """Каждое задание - отдельный файл в каталоге (для тестов без принтера)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._counter = itertools.count(1)
+
+    def describe(self):
+        return f"{self.directory}/*.bin"
+
+    def send(self, data):
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._counter):06d}.bin")
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+# ==================== Задания и очереди ====================
+
+class PrintJob:
+    """Задание печати"""
+
+    __slots__ = (
+        'id', 'printer', 'data', 'size', 'status', 'error', 'batch_id', 'created_at', 'started_at', 'finished_at'
+    )
+
+    def __init__(self, job_id, printer, data, batch_id=None):
+        self.id = job_id
+        self.printer = printer
+        self.data = data
+        self.batch_id = batch_id
+        self.size = len(data)
+        self.status = 'queued'
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def as_dict(self):
+        return {
+            'job_id': self.id,
+            'printer': self.printer,
+            'status': self.status,
+            'bytes': self.size,
+            'error': self.error,
+            'batch_id': self.batch_id,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class PrinterQueue:
+    """Очередь одного принтера с рабочим потоком"""
+
+    def __init__(self, name, sink, transform=None, max_size=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.sink = sink
+        self.transform = transform
+        self._queue = queue.Queue(maxsize=max_size)
+        self._worker = threading.Thread(target=self._run, name=f"printer-{name}", daemon=True)
+        self._worker.start()
+
+    def put(self, jobs):
+        """Поставить в очередь задание или пачку заданий (список) - это один элемент очереди"""
+        try:
+            self._queue.put_nowait(jobs)
+        except queue.Full:
+            raise QueueFull(f"Print queue for '{self.name}' is full ({self._queue.maxsize} jobs)")
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                if hasattr(self.sink, 'check'):
+                    self.sink.check()
+                continue
+            self._print(item if isinstance(item, list) else [item])
+            self._queue.task_done()
+
+    def _print(self, jobs):
+        """Подготовить задания по отдельности и отправить одним потоком"""
+        started_at = time.time()
+        label = f"Job {jobs[0].id}" if len(jobs) == 1 else f"Batch {jobs[0].batch_id}"
+        chunks, ready = [], []
+        for job in jobs:
+            job.status = 'printing'
+            job.started_at = started_at
+            try:
+                if not job.data:
+                    raise ValueError('empty job')
+                chunks.append(self.transform(job.data) if self.transform else job.data)
+                ready.append(job)
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+                print(f"✗ [{self.name}] Job {job.id}: {e}")
+
+        if chunks:
+            try:
+                self.sink.send(chunks[0] if len(chunks) == 1 else b''.join(chunks))
+                for job in ready:
+                    job.status = 'done'
+                print(f"✓ [{self.name}] {label}: printed {sum(job.size for job in ready)} bytes"
+                      + (f" ({len(ready)}/{len(jobs)} jobs)" if len(jobs) > 1 else ""))
+            except Exception as e:
+                for job in ready:
+                    job.status = 'failed'
+                    job.error = str(e)
+                print(f"✗ [{self.name}] {label}: {e}")
+
+        finished_at = time.time()
+        for job in jobs:
+            job.finished_at = finished_at
+            job.data = b''  # байты больше не нужны, держим только статус
+            record_print(self.name, job.status == 'done', job.size, finished_at - started_at)
+
+    def join(self):
+        """Дождаться печати всех заданий в очереди (для тестов)"""
+        self._queue.join()
+
+
+class Spooler:
+    """Набор очередей по принтерам + история заданий"""
+
+    def __init__(self, history_size=JOB_HISTORY_SIZE):
+        self._printers = {}
+        self._jobs = OrderedDict()
+        self._history_size = history_size
+        self._lock = threading.Lock()
+
+    def add_printer(self, name, sink, transform=None, max_size=DEFAULT_QUEUE_SIZE):
+        self._printers[name] = PrinterQueue(name, sink, transform=transform, max_size=max_size)
+        return self._printers[name]
+
+    def printers(self):
+        return self._printers
+
+    def _queue_for(self, printer):
+        printer_queue = self._printers.get(printer)
+        if printer_queue is None:
+            raise UnknownPrinter(f"Printer '{printer}' is not configured")
+        return printer_queue
+
+    def _register(self, jobs):
+        with self._lock:
+            for job in jobs:
+                self._jobs[job.id] = job
+            # Забываем самые старые завершённые задания
+            while len(self._jobs) > self._history_size:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in ('queued', 'printing'):
+                    break
+                del self._jobs[oldest_id]
+
+    def _enqueue(self, printer_queue, item, jobs):
+        try:
+            printer_queue.put(item)
+        except QueueFull:
+            with self._lock:
+                for job in jobs:
+                    self._jobs.pop(job.id, None)
+            raise
+
+    def submit(self, printer, data):
+        """Поставить задание в очередь принтера, вернуть PrintJob"""
+        printer_queue = self._queue_for(printer)
+        job = PrintJob(uuid.uuid4().hex[:12], printer, data)
+        self._register([job])
+        self._enqueue(printer_queue, job, [job])
+        return job
+
+    def submit_batch(self, printer, parts):
+        """
+        Поставить пачку заданий одним элементом очереди, вернуть список PrintJob
+
+        Порядок заданий сохраняется; на принтер они уходят одной записью.
+        """
+        if not parts:
+            raise BatchFormatError('batch is empty')
+        if len(parts) > MAX_BATCH_JOBS:
+            raise BatchFormatError(f'batch is too large ({len(parts)} jobs, max {MAX_BATCH_JOBS})')
+        printer_queue = self._queue_for(printer)
+        batch_id = uuid.uuid4().hex[:12]
+        jobs = [PrintJob(uuid.uuid4().hex[:12], printer, data, batch_id=batch_id) for data in parts]
+        self._register(jobs)
+        self._enqueue(printer_queue, jobs, jobs)
+        return jobs
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_batch(self, batch_id):
+        """Задания пачки в исходном порядке (пустой список, если пачка забыта)"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.batch_id == batch_id]
+
+    def status(self):
+        result = {}
+        for name, printer_queue in self._printers.items():
+            sink = printer_queue.sink
+            result[name] = {'queue_depth': printer_queue.depth(), 'sink': sink.describe()}
+            if hasattr(sink, 'health'):
+                result[name]['health'] = sink.health()
+        return result
+
+    def join(self):
+        for printer_queue in self._printers.values():
+            printer_queue.join()
+
+
+# ==================== Разбор пачки ====================
+
+def parse_length_prefixed(body):
+    """[4 байта длины big-endian][данные] ... -> список заданий"""
+    parts = []
+    pos = 0
+    while pos < len(body):
+        if pos + 4 > len(body):
+            raise BatchFormatError(f'truncated length prefix at byte {pos}')
+        (size,) = struct.unpack_from('>I', body, pos)
+        pos += 4
+        if pos + size > len(body):
+            raise BatchFormatError(f'job #{len(parts) + 1} declares {size} bytes, only {len(body) - pos} left')
+        parts.append(body[pos:pos + size])
+        pos += size
+    return parts
+
+
+def parse_multipart(body, content_type):
+    """multipart/form-data или multipart/mixed -> список заданий (в порядке частей)"""
+    # email подгружается только для multipart - прокси стартует быстрее
+    from email.parser import BytesParser
+    from email.policy import HTTP
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        raise BatchFormatError('multipart body without boundary')
+    return [part.get_payload(decode=True) or b'' for part in message.iter_parts()]
+
+
+def parse_batch(body, content_type):
+    """Тело POST /batch -> список заданий по Content-Type"""
+    content_type = content_type or LENGTH_PREFIXED_TYPE
+    if content_type.lower().startswith('multipart/'):
+        return parse_multipart(body, content_type)
+    return parse_length_prefixed(body)
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Принт-прокси для MyPOS: один процесс на все принтеры и платформы
+
+Все HTTP-слушатели (по порту на принтер, как раньше 9100/9101) работают в одном
+asyncio event loop, задания ставятся в общий Spooler (очередь и рабочий поток на
+принтер), перекодировка UTF-8 -> CP866 - общий escpos_transcoder.
+
+Маршрутизация:
+- POST /                        - принтер, привязанный к порту (совместимо с фронтендом)
+- POST /batch                   - пачка заданий на принтер порта (см. print_spooler.parse_batch)
+- POST /printers/<name>         - любой принтер по имени, через любой порт
+- POST /printers/<name>/batch
+- GET /jobs/<id>, /batches/<id>, /status, /health, /metrics
+
+Конфигурация - JSON (--config или PRINTER_PROXY_CONFIG):
+    {
+      "host": "127.0.0.1",
+      "printers": [
+        {"name": "receipt", "port": 9100, "sink": {"type": "windows", "printer": "Касса"}},
+        {"name": "label", "port": 9101, "sink": {"type": "tcp", "host": "192.168.1.50"}}
+      ]
+    }
+
+Типы sink: lpr (printer), device (path), tcp (host, port), file (directory),
+windows (printer). Для device/tcp можно указать "fallback_lpr": "<имя в CUPS>".
+Без конфига: на Windows - два принтера (чеки 9100, этикетки 9101) через COPY /B,
+на Mac/Linux - один принтер из переменных PRINTER_* (как usb-printer-proxy.py).
+
+На Linux прокси целиком проверяется с file/tcp sink вместо принтеров Windows:
+    python printer_proxy.py --config printer-proxy.example.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from escpos_transcoder import convert_utf8_to_cp866
+from print_spooler import (
+    Spooler, LprSink, DeviceSink, TcpSink, FallbackSink, FileSink, WindowsShareSink,
+    QueueFull, UnknownPrinter, BatchFormatError, DEFAULT_QUEUE_SIZE, parse_batch
+)
+from proxy_metrics import render_metrics
+
+DEFAULT_HOST = '127.0.0.1'
+
+# Максимальный размер тела запроса (пачка бегунков с логотипами - сотни КБ)
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Сколько держать простаивающее keep-alive соединение, секунд
+KEEPALIVE_TIMEOUT = 30
+
+# Принтеры Windows (точные имена из "Устройства и принтеры")
+WINDOWS_PRINTERS = [
+    {'name': 'receipt', 'port': 9100, 'sink': {'type': 'windows', 'printer': 'Касса'}},
+    {'name': 'label', 'port': 9101, 'sink': {'type': 'windows', 'printer': 'XP-365B'}},
+]
+
+STATUS_TEXT = {
+    200: 'OK', 202: 'Accepted', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 503: 'Service Unavailable',
+}
+
+
+class ConfigError(Exception):
+    """Ошибка в конфигурации прокси"""
+
+
+# ==================== Конфигурация ====================
+
+def env_config():
+    """Один принтер на 9100 из переменных окружения (прежний usb-printer-proxy.py)"""
+    printer_name = os.getenv('PRINTER_NAME', 'Xprinter_USB_Printer_P')
+    sink_type = os.getenv('PRINTER_SINK', 'lpr')
+    if sink_type == 'file':
+        sink = {'type': 'file', 'directory': os.getenv('PRINTER_SPOOL_DIR', 'print-spool')}
+    elif sink_type == 'device':
+        sink = {'type': 'device', 'path': os.getenv('PRINTER_DEVICE', '/dev/usb/lp0')}
+    elif sink_type == 'tcp':
+        sink = {
+            'type': 'tcp',
+            'host': os.getenv('PRINTER_HOST', '192.168.1.100'),
+            'port': int(os.getenv('PRINTER_TCP_PORT', '9100')),
+        }
+    else:
+        sink = {'type': 'lpr', 'printer': printer_name}
+    # Для device/tcp: при ошибке печатать через lpr
+    if sink['type'] in ('device', 'tcp') and os.getenv('PRINTER_LPR_FALLBACK', '1') == '1':
+        sink['fallback_lpr'] = printer_name
+    return {
+        'host': os.getenv('PRINTER_PROXY_HOST', DEFAULT_HOST),
+        'printers': [{
+            'name': printer_name,
+            'port': int(os.getenv('PRINTER_PROXY_PORT', '9100')),
+            'sink': sink,
+            'queue_size': int(os.getenv('PRINTER_QUEUE_SIZE', str(DEFAULT_QUEUE_SIZE))),
+        }],
+    }
+
+
+def windows_config():
+    """Чеки и этикетки на 9100/9101 через общие принтеры Windows"""
+    return {'host': DEFAULT_HOST, 'printers': [dict(printer) for printer in WINDOWS_PRINTERS]}
+
+
+def load_config(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def default_config():
+    path = os.getenv('PRINTER_PROXY_CONFIG')
+    if path:
+        return load_config(path)
+    return windows_config() if sys.platform == 'win32' else env_config()
+
+
+def build_sink(spec):
+    """Описание sink из конфига -> объект sink из print_spooler"""
+    kind = spec.get('type')
+    try:
+        if kind == 'lpr':
+            return LprSink(spec['printer'])
+        if kind == 'windows':
+            return WindowsShareSink(spec['printer'])
+        if kind == 'file':
+            return FileSink(spec['directory'])
+        if kind == 'device':
+            sink = DeviceSink(spec['path'])
+        elif kind == 'tcp':
+            sink = TcpSink(spec['host'], int(spec.get('port', 9100)))
+        else:
+            raise ConfigError(f"Unknown sink type: {kind!r}")
+    except KeyError as e:
+        raise ConfigError(f"Sink '{kind}' requires {e.args[0]!r}")
+    if spec.get('fallback_lpr'):
+        return FallbackSink(sink, LprSink(spec['fallback_lpr']))
+    return sink
+
+
+def build_spooler(config):
+    """Spooler со всеми принтерами конфига; возвращает (spooler, {порт: принтер})"""
+    spooler = Spooler()
+    ports = {}
+    for printer in config.get('printers', []):
+        name = printer.get('name')
+        if not name or 'sink' not in printer:
+            raise ConfigError(f"Printer needs 'name' and 'sink': {printer}")
+        spooler.add_printer(
+            name,
+            build_sink(printer['sink']),
+            transform=convert_utf8_to_cp866 if printer.get('transcode', True) else None,
+            max_size=int(printer.get('queue_size', DEFAULT_QUEUE_SIZE)),
+        )
+        if printer.get('port') is not None:
+            port = int(printer['port'])
+            if port in ports:
+                raise ConfigError(f"Port {port} is used by '{ports[port]}' and '{name}'")
+            ports[port] = name
+    if not spooler.printers():
+        raise ConfigError('No printers configured')
+    # Порт без своего принтера - только маршрутизация по /printers/<name>
+    if config.get('port') is not None:
+        ports.setdefault(int(config['port']), None)
+    return spooler, ports
+
+
+# ==================== HTTP ====================
+
+def batch_response(jobs):
+    """Статус пачки: success - только если ни одно задание не упало"""
+    return {
+        'success': all(job.status != 'failed' for job in jobs),
+        'batch_id': jobs[0].batch_id,
+        'jobs': [{'job_id': job.id, 'status': job.status, 'error': job.error} for job in jobs],
+    }
+
+
+class PrinterProxy:
+    """Маршрутизация запросов к общему Spooler (без привязки к транспорту)"""
+
+    def __init__(self, spooler):
+        self.spooler = spooler
+
+    def route(self, path, default_printer):
+        """Путь POST -> (принтер, пачка ли это)"""
+        if path.startswith('/printers/'):
+            name, _, rest = path[len('/printers/'):].partition('/')
+            return name, rest == 'batch'
+        return default_printer, path == '/batch'
+
+    def handle(self, method, path, headers, body, default_printer=None):
+        """Обработать запрос, вернуть (status, content_type, bytes)"""
+        path = path.split('?', 1)[0]
+        if method == 'GET':
+            return self.handle_get(path)
+        if method == 'POST':
+            return self.handle_post(path, headers, body, default_printer)
+        return json_response(405, {'success': False, 'error': 'method not allowed'})
+
+    def handle_get(self, path):
+        if path == '/metrics':
+            return 200, 'text/plain; version=0.0.4; charset=utf-8', render_metrics().encode('utf-8')
+        if path.startswith('/jobs/'):
+            job = self.spooler.get_job(path[len('/jobs/'):])
+            if job is None:
+                return json_response(404, {'success': False, 'error': 'job not found'})
+            return json_response(200, job.as_dict())
+        if path.startswith('/batches/'):
+            jobs = self.spooler.get_batch(path[len('/batches/'):])
+            if not jobs:
+                return json_response(404, {'success': False, 'error': 'batch not found'})
+            return json_response(200, batch_response(jobs))
+        if path == '/status':
+            return json_response(200, {'printers': self.spooler.status()})
+        if path == '/health':
+            printers = self.spooler.status()
+            healthy = all(not p.get('health', {}).get('last_error') for p in printers.values())
+            return json_response(200 if healthy else 503, {'healthy': healthy, 'printers': printers})
+        return json_response(404, {'success': False, 'error': 'not found'})
+
+    def handle_post(self, path, headers, body, default_printer):
+        printer, is_batch = self.route(path, default_printer)
+        if printer is None:
+            return json_response(404, {'success': False, 'error': 'use /printers/<name> on this port'})
+        print(f"📥 [{printer}] POST {path}, {len(body)} bytes")
+        try:
+            if is_batch:
+                jobs = self.spooler.submit_batch(printer, parse_batch(body, headers.get('content-type')))
+                return json_response(202, batch_response(jobs))
+            job = self.spooler.submit(printer, body)
+            return json_response(202, {'success': True, 'job_id': job.id, 'status': job.status})
+        except UnknownPrinter as e:
+            return json_response(404, {'success': False, 'error': str(e)})
+        except BatchFormatError as e:
+            print(f"✗ [{printer}] Bad batch: {e}")
+            return json_response(400, {'success': False, 'error': str(e)})
+        except QueueFull as e:
+            print(f"✗ {e}")
+            return json_response(503, {'success': False, 'error': str(e)})
+
+
+def json_response(status, payload):
+    return status, 'application/json', json.dumps(payload).encode('utf-8')
+
+
+def http_response(status, content_type, body, keep_alive):
+    head = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Unknown')}",
+        'Access-Control-Allow-Origin: *',
+        'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers: Content-Type',
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if content_type:
+        head.append(f"Content-Type: {content_type}")
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def read_request(reader):
+    """Запрос HTTP/1.x -> (method, path, version, headers, body) или None, если клиент ушёл"""
+    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+    if not request_line.strip():
+        return None
+    method, path, version = request_line.decode('latin-1').split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_SIZE:
+        raise OverflowError(f"body of {length} bytes exceeds {MAX_BODY_SIZE}")
+    body = await reader.readexactly(length) if length else b''
+    return method, path, version, headers, body
+
+
+async def serve_connection(proxy, default_printer, reader, writer):
+    """Одно TCP-соединение: запросы друг за другом (keep-alive)"""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except OverflowError as e:
+                writer.write(http_response(*json_response(413, {'success': False, 'error': str(e)}), False))
+                await writer.drain()
+                break
+            if request is None:
+                break
+            method, path, version, headers, body = request
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            if method == 'OPTIONS':
+                response = http_response(204, None, b'', keep_alive)
+            else:
+                response = http_response(*proxy.handle(method, path, headers, body, default_printer), keep_alive)
+            writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(config, ready=None):
+    """Запустить все слушатели в текущем event loop и работать до отмены"""
+    spooler, ports = build_spooler(config)
+    proxy = PrinterProxy(spooler)
+    host = config.get('host', DEFAULT_HOST)
+
+    servers = []
+    for port, printer in ports.items():
+        handler = lambda reader, writer, printer=printer: serve_connection(proxy, printer, reader, writer)
+        servers.append(await asyncio.start_server(handler, host, port))
+
+    print(f"🖨️  MyPOS Printer Proxy")
+    print(f"=" * 60)
+    for port, printer in ports.items():
+        target = spooler.printers()[printer].sink.describe() if printer else 'routing only (/printers/<name>)'
+        print(f"📍 http://{host}:{port} → {printer or '-'}: {target}")
+    for name, printer_queue in spooler.printers().items():
+        if name not in ports.values():
+            print(f"📍 /printers/{name} → {printer_queue.sink.describe()}")
+    print(f"📊 Status: /status, /health, metrics: /metrics")
+    print(f"=" * 60)
+    print(f"✓ Ready to accept connections...\n")
+
+    if ready is not None:
+        ready.set()
+    try:
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+    finally:
+        for server in servers:
+            server.close()
+
+
+def main(config=None, argv=None):
+    parser = argparse.ArgumentParser(description='Принт-прокси MyPOS (ESC/POS)')
+    parser.add_argument('--config', help='JSON с принтерами (по умолчанию PRINTER_PROXY_CONFIG или встроенный)')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.config:
+            config = load_config(args.config)
+        elif config is None:
+            config = default_config()
+        asyncio.run(serve(config))
+    except KeyboardInterrupt:
+        print("\n\n👋 Server stopped")
+    except (ConfigError, OSError, ValueError) as e:
+        print(f"\n❌ Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Метрики принт-прокси в текстовом формате Prometheus (только стандартная библиотека)
+
+Используется принт-прокси (printer_proxy.py и его спулер print_spooler.py):
+    from proxy_metrics import record_print, render_metrics
+    record_print('receipt', ok, len(data), elapsed)  # print_spooler, после задания
+GET /metrics на порту прокси (printer_proxy.py) отдаёт render_metrics()
+"""
+
+import threading
+from bisect import bisect_left
+
+# Бакеты времени печати (секунды)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_jobs = {}        # (printer, result) -> количество заданий
+_bytes = {}       # printer -> отправлено байт
+_durations = {}   # printer -> [счётчики по бакетам..., +Inf], сумма, количество
+
+
+def record_print(printer, success, size, elapsed):
+    """Учесть одно задание печати"""
+    result = 'success' if success else 'failure'
+    with _lock:
+        _jobs[(printer, result)] = _jobs.get((printer, result), 0) + 1
+        if success:
+            _bytes[printer] = _bytes.get(printer, 0) + size
+        counts, total, count = _durations.get(printer, ([0] * (len(DURATION_BUCKETS) + 1), 0.0, 0))
+        counts[bisect_left(DURATION_BUCKETS, elapsed)] += 1
+        _durations[printer] = (counts, total + elapsed, count + 1)
+
+
+def render_metrics():
+    """Все метрики прокси в формате Prometheus"""
+    lines = [
+        '# HELP printer_proxy_jobs_total Задания печати по результату',
+        '# TYPE printer_proxy_jobs_total counter',
+    ]
+    with _lock:
+        for (printer, result), value in sorted(_jobs.items()):
+            lines.append(f'printer_proxy_jobs_total{{printer="{printer}",result="{result}"}} {value}')
+
+        lines.append('# HELP printer_proxy_bytes_total Отправлено байт на принтер')
+        lines.append('# TYPE printer_proxy_bytes_total counter')
+        for printer, value in sorted(_bytes.items()):
+            lines.append(f'printer_proxy_bytes_total{{printer="{printer}"}} {value}')
+
+        lines.append('# HELP printer_proxy_print_duration_seconds Время отправки задания на принтер')
+        lines.append('# TYPE printer_proxy_print_duration_seconds histogram')
+        for printer, (counts, total, count) in sorted(_durations.items()):
+            cumulative = 0
+            for le, bucket_count in zip(DURATION_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'printer_proxy_print_duration_seconds_bucket{{printer="{printer}",le="{le}"}} {cumulative}')
+            lines.append(f'printer_proxy_print_duration_seconds_bucket{{printer="{printer}",le="+Inf"}} {count}')
+            lines.append(f'printer_proxy_print_duration_seconds_sum{{printer="{printer}"}} {total}')
+            lines.append(f'printer_proxy_print_duration_seconds_count{{printer="{printer}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
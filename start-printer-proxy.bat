@@ -22,9 +22,14 @@ if errorlevel 1 (
 echo [OK] Python найден
 echo.
 
-REM Запуск прокси-сервера
+REM Запуск прокси-сервера: свой набор принтеров - в printer-proxy.json,
+REM иначе чеки (9100) и этикетки (9101) по умолчанию
 echo Запускаю прокси-сервер...
 echo.
-python usb-printer-proxy-windows.py
+if exist printer-proxy.json (
+    python printer_proxy.py --config printer-proxy.json
+) else (
+    python printer_proxy.py
+)
 
 pause